@@ -8,11 +8,15 @@ import json
 import os
 import random
 from utils.model_utils import load_model, make_prediction
-from utils.data_utils import save_prediction_data, load_student_data, save_parent_observation, load_parent_observations
+from utils.data_utils import save_prediction_data, load_student_data, save_parent_observation, load_parent_observations_page, start_data_retention
+from utils.data_utils import get_storage_health, get_query_profile_json, reset_query_profile
 from utils.image_utils import get_image_html, create_image_gallery, get_student_images
 from utils.educational_images import get_diverse_educational_images
 from utils.image_base64 import get_base64_images, get_image_html as get_b64_image_html
 from utils.language_utils import get_text, load_app_settings, save_app_settings
+from utils.lite_utils import is_lite_mode, is_lite_mode_forced, set_lite_mode, render_lite_payload_report
+from utils.theme_utils import apply_theme
+from utils.payload_utils import begin_page, get_payload_report, payload_report_json, reset_payload_report
 
 # IMPORTANT: Page config MUST be the first Streamlit command
 st.set_page_config(
@@ -22,6 +26,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Enforce data retention in the background (starts once per process)
+start_data_retention()
+
 # Initialize language in session state
 if 'app_language' not in st.session_state:
     settings = load_app_settings()
@@ -30,77 +37,11 @@ if 'app_language' not in st.session_state:
 # Get current language
 language = st.session_state.get('app_language', 'English')
 
+# Count the HTML this rerun sends to the browser
+begin_page(f"app/{st.session_state.get('current_page', 'dashboard')}")
+
 # Apply theme styling
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-    
-    .stApp {
-        font-family: 'Poppins', sans-serif !important;
-        background: #f8fafc !important;
-        min-height: 100vh !important;
-    }
-    
-    .stDeployButton {display: none;}
-    #MainMenu {visibility: hidden;}
-    .stHeader {display: none;}
-    .stToolbar {display: none;}
-    
-    .css-1d391kg {
-        background-color: white !important;
-        border-right: 1px solid #e5e7eb !important;
-    }
-    
-    .main .block-container {
-        background-color: #f8fafc !important;
-        padding: 1.5rem !important;
-        max-width: none !important;
-    }
-    
-    .page-header {
-        background: linear-gradient(135deg, #87CEEB 0%, #F8DC75 100%);
-        color: #1f2937;
-        padding: 2rem;
-        border-radius: 15px;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    
-    .sidebar .sidebar-content {
-        background-color: white !important;
-    }
-    
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 0.75rem;
-        box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1);
-        border: 1px solid #e5e7eb;
-        text-align: center;
-        margin-bottom: 1rem;
-    }
-    
-    .stSelectbox > div > div > div {
-        background-color: white;
-    }
-    
-    .stButton > button {
-        background: linear-gradient(135deg, #87CEEB 0%, #F8DC75 100%);
-        color: #1f2937;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 1rem;
-        font-weight: 600;
-        transition: all 0.3s;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-</style>
-""", unsafe_allow_html=True)
+apply_theme('app')
 
 def render_sidebar():
     """Render sidebar navigation"""
@@ -118,9 +59,22 @@ def render_sidebar():
         
         if selected_language != st.session_state.get('app_language'):
             st.session_state['app_language'] = selected_language
-            settings = load_app_settings()
-            settings['language'] = selected_language
-            save_app_settings(settings)
+            save_app_settings({'language': selected_language})
+            st.rerun()
+        
+        # Lite mode for slow connections, saved as the offline_mode setting;
+        # locked on when the server forces it with LITE_MODE=1
+        lite_mode_forced = is_lite_mode_forced()
+        lite_mode = st.checkbox(
+            get_text('offline_mode', language),
+            value=is_lite_mode(),
+            disabled=lite_mode_forced,
+            help="Lite mode is turned on for every session on this server" if lite_mode_forced
+            else "Skip decorative images and heavy styling on slow connections"
+        )
+        if not lite_mode_forced and lite_mode != is_lite_mode():
+            set_lite_mode(lite_mode)
+            save_app_settings({'offline_mode': lite_mode})
             st.rerun()
         
         st.markdown("---")
@@ -134,6 +88,10 @@ def render_sidebar():
             get_text('educational_content', language): "content"
         }
         
+        # Operator view, enabled with SHOW_ADMIN_VIEW=1
+        if os.environ.get('SHOW_ADMIN_VIEW') == '1':
+            pages["System Health"] = "admin"
+        
         for page_name, page_key in pages.items():
             if st.button(page_name, key=f"nav_{page_key}", use_container_width=True):
                 st.session_state['current_page'] = page_key
@@ -460,7 +418,7 @@ def render_tracker_page():
     st.markdown("---")
     st.subheader("📊 Recent Observations")
     
-    observations = load_parent_observations()
+    observations, _ = load_parent_observations_page(50)
     if observations:
         df = pd.DataFrame(observations)
         st.dataframe(df[['child_name', 'observation_date', 'focus_rating', 'motivation_rating']], 
@@ -543,6 +501,74 @@ def render_content_page():
         • Family involvement doubles success rates
         """)
 
+def render_admin_page():
+    """Render storage health and query latency profile"""
+    st.markdown("""
+    <div class="page-header">
+        <h1>🛠️ System Health</h1>
+        <p>Storage backend status and database query latency</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    health = get_storage_health()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Storage Backend", health['backend'])
+    with col2:
+        st.metric("Circuit", health['circuit']['state'] if health['circuit'] else "n/a")
+    with col3:
+        st.metric("Queued Writes", health['pending_replay'])
+    
+    if health['pool']:
+        st.subheader("🔌 Connection Pool")
+        st.json(health['pool'])
+    
+    st.subheader("⏱️ Query Latency")
+    if health['queries']:
+        profile_df = pd.DataFrame(health['queries']).drop(columns=['histogram'])
+        st.dataframe(profile_df, use_container_width=True)
+    else:
+        st.info("No queries recorded yet.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "📥 Download Profile (JSON)",
+            data=get_query_profile_json(),
+            file_name=f"query_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
+    with col2:
+        if st.button("Reset Profile"):
+            reset_query_profile()
+            st.rerun()
+    
+    st.subheader("📦 Page Payload")
+    payload_report = get_payload_report()
+    if payload_report:
+        payload_df = pd.DataFrame(payload_report)[['page', 'reruns', 'last_bytes', 'max_bytes', 'budget', 'over_budget']]
+        st.dataframe(payload_df, use_container_width=True)
+        with st.expander("Components per page"):
+            for row in payload_report:
+                st.markdown(f"**{row['page']}**")
+                st.json(row['components'])
+    else:
+        st.info("No page reruns recorded yet.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "📥 Download Payload Report (JSON)",
+            data=payload_report_json(),
+            file_name=f"payload_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
+    with col2:
+        if st.button("Reset Payload Report"):
+            reset_payload_report()
+            st.rerun()
+
 def main():
     """Main application function"""
     # Render sidebar navigation
@@ -562,6 +588,9 @@ def main():
         render_tracker_page()
     elif current_page == 'content':
         render_content_page()
+    elif current_page == 'admin':
+        render_admin_page()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    render_lite_payload_report()
\ No newline at end of file
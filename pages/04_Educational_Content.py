@@ -7,8 +7,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.image_utils import get_image_html, create_image_gallery, get_student_images
 from utils.educational_images import get_diverse_educational_images
-from utils.image_base64 import get_base64_images, get_image_html as get_b64_image_html
+from utils.image_base64 import get_asset_image_html
 from utils.language_utils import get_text, load_app_settings
+from utils.lite_utils import is_lite_mode, render_lite_payload_report
+from utils.theme_utils import apply_theme
+from utils.payload_utils import begin_page
 
 # Initialize language in session state
 if 'app_language' not in st.session_state:
@@ -18,146 +21,13 @@ if 'app_language' not in st.session_state:
 # Get current language
 language = st.session_state.get('app_language', 'English')
 
+# Count the HTML this rerun sends to the browser
+begin_page('04_Educational_Content')
+
 # Page config removed - handled by main app
 
 # CSS matching the main app design
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-    
-
-    
-    .stDeployButton {display: none;}
-    #MainMenu {visibility: hidden;}
-    .stHeader {display: none;}
-    .stToolbar {display: none;}
-    
-    .css-1d391kg {
-        background-color: white !important;
-        border-right: 1px solid #e5e7eb !important;
-    }
-    
-    .main .block-container {
-        background-color: #f8fafc !important;
-        padding: 1.5rem !important;
-        max-width: none !important;
-    }
-    
-    .page-header {
-        background: white;
-        padding: 1rem 1.5rem;
-        border-bottom: 1px solid #e5e7eb;
-        margin: -1.5rem -1.5rem 2rem -1.5rem;
-    }
-    
-    .page-title {
-        font-size: 1.5rem;
-        font-weight: 700;
-        color: #1f2937;
-        margin: 0;
-    }
-    
-    .content-section {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 0.75rem;
-        box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1);
-        border: 1px solid #e5e7eb;
-        margin-bottom: 1.5rem;
-    }
-    
-    .education-header {
-        background: linear-gradient(135deg, #8E44AD 0%, #3498DB 50%, #1ABC9C 100%);
-        color: white;
-        padding: 2rem;
-        border-radius: 20px;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .education-header::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: url('attached_assets/Exam-Students_1750847086459.jpg
-        opacity: 0.1;
-        z-index: 0;
-    }
-    
-    .education-header > * {
-        position: relative;
-        z-index: 1;
-    }
-    
-    .content-section {
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(10px);
-        padding: 2rem;
-        border-radius: 20px;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-        border: 1px solid rgba(255,255,255,0.18);
-        margin: 1rem 0;
-    }
-    
-    .research-showcase {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-        gap: 1.5rem;
-        margin: 2rem 0;
-    }
-    
-    .research-card {
-        text-align: center;
-        background: rgba(255, 255, 255, 0.9);
-        padding: 1.5rem;
-        border-radius: 15px;
-        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
-        transition: transform 0.3s ease;
-        border-left: 4px solid #8E44AD;
-    }
-    
-    .research-card:hover {
-        transform: translateY(-5px);
-    }
-    
-    .research-card img {
-        width: 100%;
-        height: 150px;
-        object-fit: cover;
-        border-radius: 10px;
-        margin-bottom: 1rem;
-    }
-    
-    .highlight-text {
-        background: linear-gradient(135deg, #8E44AD, #3498DB);
-        -webkit-background-clip: text;
-        background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-weight: bold;
-    }
-    
-    .statistics-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-        gap: 1rem;
-        margin: 2rem 0;
-    }
-    
-    .stat-highlight {
-        background: linear-gradient(135deg, #8E44AD20, #3498DB20);
-        padding: 1.5rem;
-        border-radius: 15px;
-        text-align: center;
-        border: 2px solid #8E44AD30;
-    }
-</style>
-""", unsafe_allow_html=True)
+apply_theme('04_Educational_Content')
 
 def main():
     # Page header
@@ -168,38 +38,38 @@ def main():
     """, unsafe_allow_html=True)
     
     # Add authentic educational images
-    st.markdown(f"### {get_text('educational_excellence_in_action', language)}")
-    images = get_student_images()
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown(get_image_html(images['happy_young_students'], "Research Excellence", "100%", "200px"), unsafe_allow_html=True)
-    with col2:
-        st.markdown(get_image_html(images['teacher_with_students'], "Academic Focus", "100%", "200px"), unsafe_allow_html=True)
+    if not is_lite_mode():
+        st.markdown(f"### {get_text('educational_excellence_in_action', language)}")
+        images = get_student_images()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(get_image_html(images['happy_young_students'], "Research Excellence", "100%", "200px", loading="eager"), unsafe_allow_html=True)
+        with col2:
+            st.markdown(get_image_html(images['teacher_with_students'], "Academic Focus", "100%", "200px", loading="eager"), unsafe_allow_html=True)
     
-    # Research showcase section with base64 images
-    b64_images = get_base64_images()
+    # Research showcase section with resized images
     
     st.markdown(f"""
     <div class="content-section">
         <h2 class="highlight-text">{get_text('building_educational_excellence', language)}</h2>
         <div class="research-showcase">
             <div class="research-card">
-                {get_b64_image_html(b64_images['global_practices'], "Educational research", "100%", "150px")}
+                {get_asset_image_html('global_practices', "Educational research", "100%", "150px")}
                 <h4>{get_text('global_best_practices', language)}</h4>
                 <p>{get_text('international_standards', language)}</p>
             </div>
             <div class="research-card">
-                {get_b64_image_html(b64_images['learning_science'], "Learning research", "100%", "150px")}
+                {get_asset_image_html('learning_science', "Learning research", "100%", "150px")}
                 <h4>{get_text('learning_science', language)}</h4>
                 <p>{get_text('neuroscience_cognitive_research', language)}</p>
             </div>
             <div class="research-card">
-                {get_b64_image_html(b64_images['intervention_studies'], "Intervention studies", "100%", "150px")}
+                {get_asset_image_html('intervention_studies', "Intervention studies", "100%", "150px")}
                 <h4>{get_text('intervention_studies', language)}</h4>
                 <p>{get_text('evidence_based_strategies', language)}</p>
             </div>
             <div class="research-card">
-                {get_b64_image_html(b64_images['cultural_adaptation'], "Cultural education", "100%", "150px")}
+                {get_asset_image_html('cultural_adaptation', "Cultural education", "100%", "150px")}
                 <h4>{get_text('cultural_adaptation', language)}</h4>
                 <p>{get_text('implementing_inclusive_education', language)}</p>
             </div>
@@ -208,17 +78,18 @@ def main():
     """, unsafe_allow_html=True)
     
     # Add comprehensive student gallery
-    st.markdown(f"### {get_text('educational_research_impact', language)}")
-    images = get_student_images()
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown(get_image_html(images['boys_in_classroom'], "Research Impact", "100%", "150px"), unsafe_allow_html=True)
-    with col2:
-        st.markdown(get_image_html(images['classroom_girls'], "Student Success", "100%", "150px"), unsafe_allow_html=True)
-    with col3:
-        st.markdown(get_image_html(images['happy_young_students'], "Learning Focus", "100%", "150px"), unsafe_allow_html=True)
-    with col4:
-        st.markdown(get_image_html(images['teacher_with_students'], "Educational Achievement", "100%", "150px"), unsafe_allow_html=True)
+    if not is_lite_mode():
+        st.markdown(f"### {get_text('educational_research_impact', language)}")
+        images = get_student_images()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.markdown(get_image_html(images['boys_in_classroom'], "Research Impact", "100%", "150px"), unsafe_allow_html=True)
+        with col2:
+            st.markdown(get_image_html(images['classroom_girls'], "Student Success", "100%", "150px"), unsafe_allow_html=True)
+        with col3:
+            st.markdown(get_image_html(images['happy_young_students'], "Learning Focus", "100%", "150px"), unsafe_allow_html=True)
+        with col4:
+            st.markdown(get_image_html(images['teacher_with_students'], "Educational Achievement", "100%", "150px"), unsafe_allow_html=True)
     
     # Sidebar navigation
     with st.sidebar:
@@ -952,3 +823,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    render_lite_payload_report()
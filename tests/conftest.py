@@ -0,0 +1,31 @@
+import os
+import sys
+import pytest
+
+# Tests import the app's utils package from the project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+@pytest.fixture
+def postgres_db(monkeypatch):
+    """utils.db_utils connected to an empty TEST_DATABASE_URL database, with migrations applied
+
+    Skipped unless TEST_DATABASE_URL is set; every table in that database is truncated.
+    """
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    pytest.importorskip('psycopg2')
+    from utils import db_utils
+
+    monkeypatch.setenv('DATABASE_URL', url)
+    monkeypatch.setattr(db_utils, '_pool', None)
+    # Ids cached by earlier tests point at truncated rows
+    monkeypatch.setattr(db_utils, '_student_ids', db_utils.StudentIdCache())
+    with db_utils.db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE students, predictions, parent_observations, users RESTART IDENTITY CASCADE")
+        conn.commit()
+    yield db_utils
+    db_utils._pool.closeall()
@@ -0,0 +1,379 @@
+"""
+Tests for utils.async_db_utils
+
+Most tests run the module against SQLiteConnection, a local stand-in for the
+subset of asyncpg it uses, so they need no server. The student upsert is
+PostgreSQL SQL (unnest, data-modifying CTEs): the stand-in answers it with an
+equivalent SQLite upsert, and the tests at the end run the real statement
+against TEST_DATABASE_URL with asyncpg.
+"""
+
+import asyncio
+import re
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+import pytest
+
+pytest.importorskip('psycopg2')
+import utils.async_db_utils as async_db_utils
+from utils.circuit_utils import CircuitBreaker
+from utils.db_utils import StudentIdCache
+
+SQLITE_SCHEMA = """
+    CREATE TABLE students (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        grade_level TEXT
+    );
+    CREATE TABLE predictions (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL REFERENCES students (id),
+        math_score REAL, reading_score REAL, writing_score REAL, attendance REAL,
+        behavior REAL, literacy REAL, prediction INTEGER, probability REAL,
+        risk_level TEXT, notes TEXT,
+        timestamp PGTIMESTAMP NOT NULL
+    );
+    CREATE TABLE parent_observations (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL REFERENCES students (id),
+        child_name TEXT NOT NULL,
+        date PGDATE NOT NULL,
+        homework_completion REAL, reading_time REAL, focus_level REAL, subjects_struggled TEXT,
+        behavior_rating REAL, mood_rating REAL, sleep_hours REAL, energy_level REAL,
+        social_interactions TEXT, learning_wins TEXT, challenges_faced TEXT, strategies_used TEXT,
+        screen_time REAL, physical_activity REAL, medication_taken INTEGER, special_events TEXT,
+        timestamp PGTIMESTAMP NOT NULL
+    );
+    CREATE TABLE table_stats (
+        table_name TEXT NOT NULL,
+        shard INTEGER NOT NULL DEFAULT 0,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        last_timestamp PGTIMESTAMP,
+        PRIMARY KEY (table_name, shard)
+    );
+    CREATE TABLE prediction_risk_counts (
+        risk_level TEXT NOT NULL,
+        shard INTEGER NOT NULL DEFAULT 0,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (risk_level, shard)
+    );
+    INSERT INTO table_stats (table_name) VALUES ('students'), ('predictions'), ('parent_observations'), ('users');
+    CREATE TRIGGER students_stats AFTER INSERT ON students BEGIN
+        UPDATE table_stats SET row_count = row_count + 1 WHERE table_name = 'students';
+    END;
+    CREATE TRIGGER predictions_stats AFTER INSERT ON predictions BEGIN
+        UPDATE table_stats SET row_count = row_count + 1,
+            last_timestamp = MAX(COALESCE(last_timestamp, NEW.timestamp), NEW.timestamp)
+        WHERE table_name = 'predictions';
+        INSERT INTO prediction_risk_counts (risk_level, row_count)
+        SELECT NEW.risk_level, 1 WHERE NEW.risk_level IS NOT NULL
+        ON CONFLICT (risk_level, shard) DO UPDATE SET row_count = row_count + 1;
+    END;
+    CREATE TRIGGER parent_observations_stats AFTER INSERT ON parent_observations BEGIN
+        UPDATE table_stats SET row_count = row_count + 1,
+            last_timestamp = MAX(COALESCE(last_timestamp, NEW.timestamp), NEW.timestamp)
+        WHERE table_name = 'parent_observations';
+    END;
+"""
+
+sqlite3.register_converter('PGTIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('PGDATE', lambda value: date.fromisoformat(value.decode()))
+
+STUDENT_UPSERT = async_db_utils.STUDENT_UPSERT.format(insert_guard="ON CONFLICT (name) DO NOTHING")
+
+def _sqlite_query(query):
+    """Rewrite the PostgreSQL spellings async_db_utils uses into SQLite"""
+    query = re.sub(r'\$(\d+)::date \+ 1', r"date(?\1, '+1 day')", query)
+    query = query.replace('p.timestamp::date', 'date(p.timestamp) AS "day [PGDATE]"')
+    query = query.replace('AS last_timestamp', 'AS "last_timestamp [PGTIMESTAMP]"')
+    return re.sub(r'\$(\d+)', r'?\1', query)
+
+def _sqlite_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+class SQLiteConnection:
+    """The subset of asyncpg.Connection that async_db_utils uses, over sqlite3 in a worker thread"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        self._conn.row_factory = sqlite3.Row
+
+    def _fetch(self, query, args):
+        if query == STUDENT_UPSERT:
+            names, grade_levels = args
+            self._conn.executemany(
+                "INSERT INTO students (name, grade_level) VALUES (?, ?) ON CONFLICT (name) DO NOTHING",
+                zip(names, grade_levels)
+            )
+            return self._conn.execute(
+                f"SELECT name, MIN(id) AS id FROM students WHERE name IN ({', '.join('?' * len(names))}) GROUP BY name",
+                names
+            ).fetchall()
+        return self._conn.execute(_sqlite_query(query), [_sqlite_value(arg) for arg in args]).fetchall()
+
+    async def fetch(self, query, *args):
+        return await asyncio.to_thread(self._fetch, query, args)
+
+    async def fetchrow(self, query, *args):
+        rows = await self.fetch(query, *args)
+        return rows[0] if rows else None
+
+    async def fetchval(self, query, *args):
+        row = await self.fetchrow(query, *args)
+        return row[0] if row else None
+
+    async def execute(self, query, *args):
+        await self.fetch(query, *args)
+
+    async def copy_records_to_table(self, table, records, columns):
+        await asyncio.to_thread(
+            self._conn.executemany,
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [[_sqlite_value(value) for value in record] for record in records]
+        )
+
+    @asynccontextmanager
+    async def transaction(self):
+        await self.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            await self.execute("ROLLBACK")
+            raise
+        await self.execute("COMMIT")
+
+    async def cursor(self, query, *args, prefetch=50):
+        cursor = await asyncio.to_thread(
+            self._conn.execute, _sqlite_query(query), [_sqlite_value(arg) for arg in args]
+        )
+        while True:
+            rows = await asyncio.to_thread(cursor.fetchmany, prefetch)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+    def close(self):
+        self._conn.close()
+
+class SQLitePool:
+    """A one-connection stand-in for an asyncpg pool; acquire waits while it is checked out"""
+
+    def __init__(self, path):
+        self.conn = SQLiteConnection(path)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, timeout=None):
+        await asyncio.wait_for(self._lock.acquire(), timeout)
+        return self.conn
+
+    async def release(self, conn):
+        self._lock.release()
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """async_db_utils on an empty SQLite database, one stand-in pool per event loop like the real one"""
+    path = str(tmp_path / 'eduscan.db')
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SQLITE_SCHEMA)
+
+    pools = {}
+
+    async def get_pool():
+        loop = asyncio.get_running_loop()
+        if loop not in pools:
+            pools[loop] = SQLitePool(path)
+        return pools[loop]
+
+    monkeypatch.setattr(async_db_utils, 'get_async_pool', get_pool)
+    monkeypatch.setattr(async_db_utils, 'database_circuit', CircuitBreaker())
+    monkeypatch.setattr(async_db_utils, '_student_ids', StudentIdCache())
+    monkeypatch.setattr(async_db_utils, '_student_identity_index_ready', True)
+    yield path
+    for pool in pools.values():
+        pool.conn.close()
+
+def _sqlite_rows(path, query):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(query).fetchall()
+
+def _prediction(name, day, risk_level, grade_level='Grade 3', math_score=60):
+    return {
+        'student_name': name,
+        'grade_level': grade_level,
+        'math_score': math_score,
+        'risk_level': risk_level,
+        'timestamp': f"2025-06-{day:02d}T09:00:00",
+    }
+
+def test_concurrent_saves_share_students_sqlite(sqlite_db):
+    names = [f"Student {index}" for index in range(10)]
+
+    async def save_all():
+        return await asyncio.gather(*(
+            async_db_utils.save_prediction({'student_name': name, 'risk_level': 'Low Risk'})
+            for _ in range(3) for name in names
+        ))
+
+    assert all(async_db_utils.run_async(save_all))
+    assert dict(_sqlite_rows(sqlite_db, "SELECT name, COUNT(*) FROM students GROUP BY name")) == {
+        name: 1 for name in names
+    }
+    assert _sqlite_rows(sqlite_db, "SELECT COUNT(*) FROM predictions") == [(30,)]
+
+def test_bulk_save_resolves_new_and_cached_students_sqlite(sqlite_db):
+    assert async_db_utils.run_async(async_db_utils.save_prediction, _prediction('Existing', 1, 'Low Risk'))
+    records = [_prediction(name, 2, 'High Risk', 'Grade 4') for name in ['Existing', 'New', 'New', 'Other new']]
+
+    assert async_db_utils.run_async(async_db_utils.save_predictions_bulk, records) == 4
+    assert _sqlite_rows(sqlite_db, "SELECT name FROM students ORDER BY id") == [('Existing',), ('New',), ('Other new',)]
+    assert async_db_utils._student_ids.get('New') is not None
+
+def test_failed_bulk_save_rolls_back_and_caches_nothing(sqlite_db):
+    # The second record's timestamp is not ISO, so building its row fails inside the transaction
+    records = [_prediction('First', 1, 'Low Risk'), {**_prediction('Second', 1, 'Low Risk'), 'timestamp': 'soon'}]
+
+    assert async_db_utils.run_async(async_db_utils.save_predictions_bulk, records) == 0
+    assert _sqlite_rows(sqlite_db, "SELECT COUNT(*) FROM students") == [(0,)]
+    assert async_db_utils._student_ids.get('First') is None
+
+def test_history_streams_newest_first_within_the_date_range_sqlite(sqlite_db):
+    async_db_utils.run_async(async_db_utils.save_predictions_bulk, [
+        _prediction('Amina', day, 'Low Risk') for day in range(1, 8)
+    ])
+
+    async def stream():
+        return [
+            record['timestamp'] async for record in async_db_utils.iter_student_predictions(
+                start_date=date(2025, 6, 3), end_date=date(2025, 6, 5), prefetch=2
+            )
+        ]
+
+    assert async_db_utils.run_async(stream) == [
+        '2025-06-05T09:00:00', '2025-06-04T09:00:00', '2025-06-03T09:00:00'
+    ]
+
+def test_dashboard_loads_pages_and_aggregates_sqlite(sqlite_db):
+    async_db_utils.run_async(async_db_utils.save_predictions_bulk, [
+        _prediction('Amina', 1, 'Low Risk', 'Grade 3', 80),
+        _prediction('Hassan', 1, 'High Risk', 'Grade 4', 40),
+        _prediction('Amina', 2, 'Low Risk', 'Grade 3', 70),
+    ])
+    for day in (1, 2, 3):
+        assert async_db_utils.run_async(async_db_utils.save_parent_observation, {
+            'child_name': 'Amina', 'date': f"2025-06-0{day}", 'timestamp': f"2025-06-0{day}T18:00:00",
+            'subjects_struggled': ['Math'],
+        })
+
+    dashboard = async_db_utils.run_async(async_db_utils.load_dashboard_data, 2)
+
+    assert dashboard['stats']['total_students'] == 2
+    assert dashboard['stats']['total_predictions'] == 3
+    assert dashboard['stats']['total_observations'] == 3
+    assert dashboard['stats']['last_prediction_date'] == '2025-06-02T09:00:00'
+    assert dashboard['stats']['risk_level_counts'] == {'Low Risk': 2, 'High Risk': 1}
+    assert dashboard['daily_risk_counts'] == [
+        {'date': '2025-06-01', 'risk_level': 'High Risk', 'count': 1},
+        {'date': '2025-06-01', 'risk_level': 'Low Risk', 'count': 1},
+        {'date': '2025-06-02', 'risk_level': 'Low Risk', 'count': 1},
+    ]
+    assert [(row['grade_level'], row['count'], row['math_score']) for row in dashboard['grade_averages']] == [
+        ('Grade 3', 2, 75.0), ('Grade 4', 1, 40.0)
+    ]
+
+    # Only the first page is fetched; the cursor leads to the rest
+    assert [record['timestamp'] for record in dashboard['predictions']] == [
+        '2025-06-02T09:00:00', '2025-06-01T09:00:00'
+    ]
+    rest, cursor = async_db_utils.run_async(
+        async_db_utils.load_student_predictions_page, 2, dashboard['predictions_cursor']
+    )
+    assert len(rest) == 1 and cursor is None
+    assert [record['date'] for record in dashboard['observations']] == ['2025-06-03', '2025-06-02']
+    assert dashboard['observations'][0]['subjects_struggled'] == ['Math']
+    assert dashboard['observations_cursor'] is not None
+
+class RecordingCircuit:
+    def __init__(self):
+        self.calls = []
+
+    def allow_request(self):
+        return True
+
+    def __getattr__(self, name):
+        return lambda: self.calls.append(name)
+
+async def _acquire():
+    async with async_db_utils.async_connection():
+        pass
+
+def test_connection_setup_errors_release_the_circuit_probe(monkeypatch):
+    circuit = RecordingCircuit()
+    monkeypatch.setattr(async_db_utils, 'database_circuit', circuit)
+
+    async def missing_url():
+        raise KeyError('DATABASE_URL')
+
+    monkeypatch.setattr(async_db_utils, 'get_async_pool', missing_url)
+    with pytest.raises(KeyError):
+        asyncio.run(_acquire())
+    assert circuit.calls == ['cancel']
+
+def test_connection_refused_is_a_circuit_failure(monkeypatch):
+    circuit = RecordingCircuit()
+    monkeypatch.setattr(async_db_utils, 'database_circuit', circuit)
+
+    async def refused():
+        raise ConnectionRefusedError("refused")
+
+    monkeypatch.setattr(async_db_utils, 'get_async_pool', refused)
+    with pytest.raises(async_db_utils.DatabaseUnavailableError):
+        asyncio.run(_acquire())
+    assert circuit.calls == ['record_failure']
+
+@pytest.fixture
+def async_db(postgres_db, monkeypatch):
+    pytest.importorskip('asyncpg')
+    monkeypatch.setattr(async_db_utils, '_student_ids', StudentIdCache())
+    return postgres_db
+
+def _student_rows(db_utils):
+    with db_utils.db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT name, COUNT(*) FROM students GROUP BY name")
+            rows = dict(cur.fetchall())
+        conn.rollback()
+    return rows
+
+def test_concurrent_saves_create_each_student_once(async_db):
+    names = [f"Student {index}" for index in range(10)]
+
+    async def save_all():
+        return await asyncio.gather(*(
+            async_db_utils.save_prediction({'student_name': name, 'risk_level': 'Low Risk'})
+            for _ in range(3) for name in names
+        ))
+
+    assert all(async_db_utils.run_async(save_all))
+    assert _student_rows(async_db) == {name: 1 for name in names}
+    assert async_db.get_database_stats()['total_predictions'] == 30
+
+def test_bulk_save_resolves_new_and_existing_students(async_db):
+    async_db.save_prediction_to_db({'student_name': 'Existing'})
+    records = [
+        {'student_name': name, 'grade_level': 'Grade 4', 'math_score': 70}
+        for name in ['Existing', 'New', 'New', 'Other new']
+    ]
+
+    assert async_db_utils.run_async(async_db_utils.save_predictions_bulk, records) == 4
+    assert _student_rows(async_db) == {'Existing': 1, 'New': 1, 'Other new': 1}
+    assert async_db_utils._student_ids.get('New') is not None
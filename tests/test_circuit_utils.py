@@ -0,0 +1,101 @@
+"""
+Tests for the database circuit breaker in utils.circuit_utils, on a fake clock
+"""
+
+from types import SimpleNamespace
+import pytest
+import utils.circuit_utils as circuit_utils
+from utils.circuit_utils import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_utils, 'time', SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+def _open(circuit):
+    for _ in range(circuit.failure_threshold):
+        assert circuit.allow_request()
+        circuit.record_failure()
+
+def test_opens_after_threshold_and_rejects_until_timeout(clock):
+    circuit = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    states = []
+    circuit.add_listener(states.append)
+
+    for _ in range(2):
+        circuit.record_failure()
+    assert circuit.state == CLOSED
+    circuit.record_failure()
+    assert circuit.state == OPEN
+    assert states == [OPEN]
+
+    clock.advance(9)
+    assert not circuit.allow_request()
+    assert circuit.stats()['rejected'] == 1
+    assert circuit.stats()['retry_in_seconds'] == pytest.approx(1)
+
+    clock.advance(1)
+    assert circuit.state == HALF_OPEN
+
+def test_success_resets_the_failure_count(clock):
+    circuit = CircuitBreaker(failure_threshold=3)
+    circuit.record_failure()
+    circuit.record_failure()
+    circuit.record_success()
+    circuit.record_failure()
+    circuit.record_failure()
+    assert circuit.state == CLOSED
+
+def test_half_open_lets_a_single_probe_through(clock):
+    circuit = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    _open(circuit)
+    clock.advance(10)
+
+    assert circuit.allow_request()
+    assert not circuit.allow_request()
+    # A probe that never reached the database frees the slot for the next caller
+    circuit.cancel()
+    assert circuit.allow_request()
+
+def test_failed_probe_doubles_the_timeout_up_to_the_maximum(clock):
+    circuit = CircuitBreaker(failure_threshold=1, reset_timeout=10, max_reset_timeout=30)
+    _open(circuit)
+
+    for expected in (20, 30, 30):
+        clock.advance(circuit.stats()['reset_timeout_seconds'])
+        assert circuit.allow_request()
+        circuit.record_failure()
+        assert circuit.state == OPEN
+        assert circuit.stats()['reset_timeout_seconds'] == expected
+
+    clock.advance(29)
+    assert not circuit.allow_request()
+    assert circuit.stats()['times_opened'] == 4
+
+def test_successful_probe_closes_and_restores_the_timeout(clock):
+    circuit = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    states = []
+    circuit.add_listener(states.append)
+    _open(circuit)
+    clock.advance(10)
+    assert circuit.allow_request()
+    circuit.record_failure()
+
+    clock.advance(20)
+    assert circuit.allow_request()
+    circuit.record_success()
+    assert circuit.state == CLOSED
+    assert circuit.stats()['reset_timeout_seconds'] == 10
+    assert states == [OPEN, OPEN, CLOSED]
+    assert circuit.allow_request() and circuit.allow_request()
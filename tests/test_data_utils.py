@@ -0,0 +1,64 @@
+"""
+Tests for the file storage paths of utils.data_utils
+"""
+
+import pandas as pd
+import pytest
+import utils.data_utils as data_utils
+from utils.export_utils import check_download_size
+
+@pytest.fixture
+def json_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_utils, 'DATABASE_AVAILABLE', False)
+    monkeypatch.setattr(data_utils, 'DATABASE_BACKEND', None)
+    monkeypatch.setattr(data_utils, 'get_data_directory', lambda: str(tmp_path))
+    return tmp_path
+
+def test_bulk_save_of_dataframe_rows_writes_json(json_storage):
+    frame = pd.DataFrame({'math_score': [71, 48], 'attendance': [92, 60]})
+    # Rows of an all-numeric upload hold NumPy scalars, as the batch page builds them
+    records = [
+        {'timestamp': '2025-03-01T10:00:00', 'student_name': f"Student {index + 1}",
+         'prediction': row['math_score'] < 50, **{column: row[column] for column in frame.columns}}
+        for index, row in frame.iterrows()
+    ]
+
+    assert data_utils.save_predictions_bulk(records) == 2
+    saved = data_utils.load_student_data()
+    assert sorted(record['student_name'] for record in saved) == ['Student 1', 'Student 2']
+    assert {record['math_score'] for record in saved} == {71, 48}
+
+def test_observation_pages_follow_the_cursor_newest_first(json_storage):
+    for day in range(1, 6):
+        for child_name in ('Amina', 'Hassan'):
+            data_utils.save_parent_observation({
+                'child_name': child_name,
+                'date': f"2025-0{day}-01",
+                'timestamp': f"2025-0{day}-01T18:00:00",
+            })
+
+    pages = []
+    cursor = None
+    while True:
+        records, cursor = data_utils.load_parent_observations_page(2, cursor, 'Amina')
+        pages.append([record['date'] for record in records])
+        if cursor is None:
+            break
+
+    assert pages == [['2025-05-01', '2025-04-01'], ['2025-03-01', '2025-02-01'], ['2025-01-01']]
+
+def test_export_over_the_download_limit_is_refused(json_storage, monkeypatch):
+    data_utils.save_predictions_bulk([
+        {'timestamp': f"2025-03-0{day}T10:00:00", 'student_name': f"Student {day}", 'prediction': False}
+        for day in range(1, 4)
+    ])
+    export_dir = json_storage / 'exports'
+
+    file_path, filename = data_utils.export_data('predictions', output_dir=str(export_dir))
+    assert file_path and filename.endswith('.csv')
+
+    monkeypatch.setattr(data_utils, 'check_download_size', lambda path: check_download_size(path, max_mb=0))
+    file_path, message = data_utils.export_data('predictions', output_dir=str(export_dir))
+    assert file_path is None
+    assert 'download limit' in message
+    assert len(list(export_dir.iterdir())) == 1
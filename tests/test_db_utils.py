@@ -0,0 +1,191 @@
+"""
+Tests for utils.db_utils against a real PostgreSQL database
+
+Run with TEST_DATABASE_URL pointing at a disposable database; its tables are emptied.
+Tests that take no postgres_db fixture run without a server.
+"""
+
+import json
+import os
+from datetime import date, datetime, timedelta
+import pytest
+
+def _prediction(name, days_ago, risk_level):
+    return {
+        'student_name': name,
+        'grade_level': 'Grade 3',
+        'math_score': 60,
+        'risk_level': risk_level,
+        'timestamp': (datetime(2025, 6, 30, 9) - timedelta(days=days_ago)).isoformat(),
+    }
+
+def _execute(db_utils, statement):
+    with db_utils.db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(statement)
+        conn.commit()
+
+def _explain_loader_indexes(db_utils):
+    """Get the indexes the planner picks for each history loader query
+
+    Plans the loaders' own SQL with typical filters: a month of history, one
+    student or child, a page cursor. Returns {loader name: [index names]};
+    an empty list means a sequential scan.
+    """
+    month_ago = date.today() - timedelta(days=30)
+    latest = (datetime.now(), 0)
+    queries = {
+        'student_predictions': db_utils._prediction_history_query(student_name='sample'),
+        'recent_predictions': db_utils._prediction_history_query(start_date=month_ago),
+        'predictions_page': db_utils._page_query(db_utils.PREDICTION_SELECT, 'p', 50, latest),
+        'child_observations': db_utils._observation_history_query(start_date=month_ago, child_name='sample'),
+        'recent_observations': db_utils._observation_history_query(start_date=month_ago),
+        'child_observations_page': db_utils._page_query(
+            db_utils.OBSERVATION_SELECT, 'po', 20, latest, 'po.child_name', 'sample'
+        ),
+        'daily_risk_counts': db_utils._daily_risk_counts_query(start_date=month_ago),
+    }
+
+    def collect(plan, found):
+        if 'Index Name' in plan:
+            found.append(plan['Index Name'])
+        for child in plan.get('Plans', []):
+            collect(child, found)
+        return found
+
+    results = {}
+    with db_utils.db_connection() as conn:
+        with conn.cursor() as cur:
+            for name, (query, params) in queries.items():
+                cur.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+                plan = cur.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                results[name] = collect(plan[0]['Plan'], [])
+    return results
+
+def test_stats_counters_follow_inserts_and_deletes(postgres_db):
+    postgres_db.save_predictions_bulk_to_db([
+        _prediction(f"Student {index % 3}", index, 'High Risk' if index % 2 else 'Low Risk')
+        for index in range(6)
+    ])
+    postgres_db.save_parent_observation_to_db({'child_name': 'Student 1', 'date': '2025-06-30'})
+
+    stats = postgres_db.get_database_stats()
+    assert stats['total_students'] == 3
+    assert stats['total_predictions'] == 6
+    assert stats['total_observations'] == 1
+    assert stats['last_prediction_date'] == '2025-06-30T09:00:00'
+    assert stats['risk_level_counts'] == {'Low Risk': 3, 'High Risk': 3}
+
+    # Deleting the newest prediction moves the latest timestamp back
+    _execute(postgres_db, "DELETE FROM predictions WHERE timestamp = '2025-06-30 09:00'")
+    stats = postgres_db.get_database_stats()
+    assert stats['total_predictions'] == 5
+    assert stats['last_prediction_date'] == '2025-06-29T09:00:00'
+    assert stats['risk_level_counts'] == {'Low Risk': 2, 'High Risk': 3}
+
+    # Cascaded deletes are counted too
+    _execute(postgres_db, "DELETE FROM students WHERE name = 'Student 1'")
+    stats = postgres_db.get_database_stats()
+    assert stats['total_students'] == 2
+    assert stats['total_predictions'] == 3
+    assert stats['total_observations'] == 0
+    assert stats['last_observation_date'] is None
+
+    _execute(postgres_db, "TRUNCATE students CASCADE")
+    stats = postgres_db.get_database_stats()
+    assert stats['total_predictions'] == 0
+    assert stats['risk_level_counts'] == {}
+
+def test_concurrent_inserts_do_not_wait_on_counters(postgres_db):
+    import psycopg2
+
+    postgres_db.save_predictions_bulk_to_db([_prediction('Student 0', 1, 'Low Risk')])
+    # Two connections whose inserts land in different counter shards
+    connections = []
+    by_shard = {}
+    while len(by_shard) < 2:
+        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        connections.append(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT counter_shard()")
+            by_shard.setdefault(cur.fetchone()[0], conn)
+    first, second = by_shard.values()
+    try:
+        insert = """
+            INSERT INTO predictions (student_id, risk_level, timestamp)
+            SELECT id, 'High Risk', '2025-07-01 09:00' FROM students
+        """
+        with first.cursor() as cur:
+            cur.execute(insert)
+        # The first transaction is still open; the second must not queue behind it
+        with second.cursor() as cur:
+            cur.execute("SET lock_timeout = '2s'")
+            cur.execute(insert)
+        first.commit()
+        second.commit()
+    finally:
+        for conn in connections:
+            conn.close()
+
+    stats = postgres_db.get_database_stats()
+    assert stats['total_predictions'] == 3
+    assert stats['last_prediction_date'] == '2025-07-01T09:00:00'
+    assert stats['risk_level_counts'] == {'Low Risk': 1, 'High Risk': 2}
+
+def test_history_loaders_use_indexes(postgres_db):
+    # Enough history that the planner prefers indexes to sequential scans
+    _execute(postgres_db, """
+        INSERT INTO students (name, grade_level)
+        SELECT 'Student ' || g, 'Grade 3' FROM generate_series(1, 500) g
+    """)
+    _execute(postgres_db, """
+        INSERT INTO predictions (student_id, risk_level, timestamp)
+        SELECT 1 + g % 500, 'Low Risk', NOW() - g * INTERVAL '10 minutes' FROM generate_series(1, 20000) g
+    """)
+    _execute(postgres_db, """
+        INSERT INTO parent_observations (student_id, child_name, date, timestamp)
+        SELECT 1 + g % 500, 'Student ' || (1 + g % 500), (NOW() - g * INTERVAL '10 minutes')::date,
+               NOW() - g * INTERVAL '10 minutes'
+        FROM generate_series(1, 20000) g
+    """)
+    _execute(postgres_db, "ANALYZE")
+
+    plans = _explain_loader_indexes(postgres_db)
+    assert plans['student_predictions'][:2] == ['students_name_key', 'predictions_student_timestamp_idx']
+    assert plans['child_observations'] == ['parent_observations_child_timestamp_idx']
+    assert 'parent_observations_child_timestamp_idx' in plans['child_observations_page']
+    for loader in ('recent_predictions', 'predictions_page', 'daily_risk_counts'):
+        assert 'predictions_timestamp_id_idx' in plans[loader], loader
+    assert 'parent_observations_timestamp_id_idx' in plans['recent_observations']
+
+def test_profiler_counts_rows_fetched_by_server_side_cursors(postgres_db):
+    from utils.profiler_utils import query_profiler
+
+    postgres_db.save_predictions_bulk_to_db([_prediction('Student 1', days_ago, 'Low Risk') for days_ago in range(25)])
+    query_profiler.reset()
+    assert len(list(postgres_db.iter_student_predictions(itersize=10))) == 25
+
+    [stream] = [query for query in query_profiler.snapshot() if query['query'].startswith('SELECT p.id')]
+    assert stream['calls'] == 1
+    assert stream['rows'] == 25
+
+def test_pool_timeout_falls_back_without_tripping_the_circuit(monkeypatch):
+    pytest.importorskip('psycopg2')
+    from utils import db_utils
+    from utils.circuit_utils import CLOSED, CircuitBreaker
+
+    class BusyPool:
+        def getconn(self):
+            raise db_utils.PoolTimeoutError("No database connection available after 5s")
+
+    circuit = CircuitBreaker(failure_threshold=1)
+    monkeypatch.setattr(db_utils, 'database_circuit', circuit)
+    monkeypatch.setattr(db_utils, 'get_connection_pool', BusyPool)
+
+    # Callers such as data_utils.save_prediction fall back to JSON on this error
+    with pytest.raises(db_utils.DatabaseUnavailableError):
+        db_utils.save_prediction_to_db(_prediction('Student 1', 0, 'Low Risk'))
+    assert circuit.stats()['failures'] == 0
+    assert circuit.state == CLOSED
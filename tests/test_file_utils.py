@@ -0,0 +1,76 @@
+"""
+Concurrency tests for the locked JSON storage in utils.file_utils
+"""
+
+import multiprocessing
+import os
+import threading
+from utils.file_utils import locked_file, read_json, update_json
+from utils.partition_utils import append_record, load_records
+
+PROCESSES = 4
+THREADS = 4
+WRITES = 25
+
+def _increment(counter):
+    counter = dict(counter or {'count': 0})
+    counter['count'] += 1
+    return counter
+
+def _run_threads(target, *args):
+    threads = [threading.Thread(target=target, args=args + (index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def _update_counter(file_path, thread_index):
+    for _ in range(WRITES):
+        update_json(file_path, _increment, {'count': 0})
+
+def _append_records(data_dir, process_index, thread_index):
+    for write in range(WRITES):
+        append_record(data_dir, 'predictions', {
+            'timestamp': f"2025-0{1 + write % 3}-15T10:00:00",
+            'writer': f"{process_index}-{thread_index}",
+            'sequence': write,
+        })
+
+def _counter_worker(file_path):
+    _run_threads(_update_counter, file_path)
+
+def _append_worker(data_dir, process_index):
+    _run_threads(_append_records, data_dir, process_index)
+
+def _run_processes(target, *args, with_index=False):
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=target, args=args + ((index,) if with_index else ()))
+        for index in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+def test_update_json_loses_no_increments_across_processes_and_threads(tmp_path):
+    file_path = str(tmp_path / 'counter.json')
+    _run_processes(_counter_worker, file_path)
+    assert read_json(file_path) == {'count': PROCESSES * THREADS * WRITES}
+
+def test_append_record_loses_no_records_across_processes_and_threads(tmp_path):
+    data_dir = str(tmp_path)
+    _run_processes(_append_worker, data_dir, with_index=True)
+
+    records = load_records(data_dir, 'predictions')
+    assert len(records) == PROCESSES * THREADS * WRITES
+    writers = {(record['writer'], record['sequence']) for record in records}
+    assert len(writers) == PROCESSES * THREADS * WRITES
+
+def test_locked_file_is_reentrant_within_a_thread(tmp_path):
+    file_path = str(tmp_path / 'nested.json')
+    with locked_file(file_path):
+        update_json(file_path, _increment, {'count': 0})
+    assert read_json(file_path) == {'count': 1}
+    assert not any(name.startswith('.tmp_') for name in os.listdir(tmp_path))
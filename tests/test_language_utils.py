@@ -0,0 +1,31 @@
+"""
+Tests for the app settings file in utils.language_utils
+"""
+
+import threading
+import pytest
+
+pytest.importorskip('streamlit')
+from utils.language_utils import load_app_settings, save_app_settings
+
+def test_concurrent_setting_changes_are_merged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+
+    def change(key, values):
+        for value in values:
+            assert save_app_settings({key: value})
+
+    threads = [
+        threading.Thread(target=change, args=('language', ['Somali', 'English'] * 10 + ['Somali'])),
+        threading.Thread(target=change, args=('offline_mode', [False, True] * 10 + [True])),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    settings = load_app_settings()
+    assert settings['language'] == 'Somali'
+    assert settings['offline_mode'] is True
+    assert settings['theme'] == 'Modern'
@@ -0,0 +1,60 @@
+"""
+Tests for the image asset manifest in utils.manifest_utils
+"""
+
+import os
+import utils.manifest_utils as manifest_utils
+from utils.file_utils import write_json_atomic
+
+def _touch(root, relative_path):
+    path = os.path.join(root, *relative_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'image')
+
+def test_load_drops_listed_files_that_are_gone(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    manifest_path = os.path.join(root, 'data', 'asset_manifest.json')
+    monkeypatch.setattr(manifest_utils, 'PROJECT_ROOT', root)
+    monkeypatch.setattr(manifest_utils, 'MANIFEST_PATH', manifest_path)
+    monkeypatch.setattr(manifest_utils, 'MANIFEST_ENABLED', True)
+    monkeypatch.setattr(manifest_utils, '_manifest', None)
+
+    _touch(root, 'attached_assets/kept.jpg')
+    _touch(root, 'static/assets/kept.1234.jpg')
+    _touch(root, 'static/assets/derived/kept.1234.h150.webp')
+    _touch(root, 'attached_assets/redeployed.jpg')
+    entry = {
+        'hash': '1234', 'mime_type': 'image/jpeg', 'size': 5, 'width': 10, 'height': 10,
+        'static': 'static/assets/kept.1234.jpg',
+        'derivatives': {
+            'h150.webp': 'static/assets/derived/kept.1234.h150.webp',
+            'h150.jpg': 'static/assets/derived/kept.1234.h150.jpg',
+        },
+        'placeholder': 'static/assets/derived/kept.1234.placeholder.jpeg',
+    }
+    # static/ was not kept across a redeploy, data/ was
+    gone = dict(entry, static='static/assets/redeployed.5678.jpg', derivatives={
+        'h150.webp': 'static/assets/derived/redeployed.5678.h150.webp'
+    }, placeholder=None)
+    write_json_atomic(manifest_path, {
+        'version': manifest_utils.MANIFEST_VERSION,
+        'assets': {
+            'attached_assets/kept.jpg': entry,
+            'attached_assets/redeployed.jpg': gone,
+            'attached_assets/deleted.jpg': dict(entry),
+        },
+        'missing': [],
+        'failed': [],
+    })
+
+    manifest = manifest_utils.load_manifest()
+    assert sorted(manifest['assets']) == ['attached_assets/kept.jpg', 'attached_assets/redeployed.jpg']
+    kept = manifest['assets']['attached_assets/kept.jpg']
+    assert kept['static'] == 'static/assets/kept.1234.jpg'
+    assert kept['derivatives'] == {'h150.webp': 'static/assets/derived/kept.1234.h150.webp'}
+    assert kept['placeholder'] is None
+    redeployed = manifest['assets']['attached_assets/redeployed.jpg']
+    assert redeployed['static'] is None
+    assert redeployed['derivatives'] == {}
+    assert redeployed['hash'] == '1234'
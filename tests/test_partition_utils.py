@@ -0,0 +1,56 @@
+"""
+Tests for the month-partitioned JSON store in utils.partition_utils
+"""
+
+import json
+import os
+import pytest
+import utils.partition_utils as partition_utils
+from utils.partition_utils import (
+    MIGRATION_MARKER_SUFFIX, UNDATED_PARTITION, append_records, drop_partitions_before,
+    list_partitions, load_records, migrate_legacy_file
+)
+
+def _record(month, index):
+    return {'student_name': f"Student {index}", 'timestamp': f"2025-{month:02d}-15T09:00:00"}
+
+def test_retention_drops_only_whole_months_before_the_cutoff(tmp_path):
+    data_dir = str(tmp_path)
+    append_records(data_dir, 'predictions', [_record(month, month) for month in (1, 2, 3, 4)] + [{'student_name': 'Undated'}])
+
+    assert drop_partitions_before(data_dir, 'predictions', '2025-03-10') == ['2025-01', '2025-02']
+    assert list_partitions(data_dir, 'predictions') == ['2025-03', '2025-04', UNDATED_PARTITION]
+    assert [record['student_name'] for record in load_records(data_dir, 'predictions')] == [
+        'Student 3', 'Student 4', 'Undated'
+    ]
+    # Lock sidecars of dropped months stay behind
+    partition_dir = os.path.join(data_dir, 'predictions')
+    assert sorted(name for name in os.listdir(partition_dir) if name.startswith('2025-01')) == ['2025-01.json.lock']
+
+    assert drop_partitions_before(data_dir, 'predictions', '2025-03-10') == []
+
+def test_legacy_migration_resumes_without_duplicates(tmp_path, monkeypatch):
+    data_dir = str(tmp_path)
+    legacy_path = os.path.join(data_dir, 'student_data.json')
+    records = [_record(1, 0), _record(1, 0), _record(2, 1)]
+    with open(legacy_path, 'w') as f:
+        json.dump(records, f)
+
+    # Crash after the partitions were written but before the legacy file was emptied
+    write_json_atomic = partition_utils.write_json_atomic
+
+    def crash_on_legacy(path, data):
+        if path == legacy_path:
+            raise OSError("simulated crash")
+        write_json_atomic(path, data)
+
+    monkeypatch.setattr(partition_utils, 'write_json_atomic', crash_on_legacy)
+    with pytest.raises(OSError):
+        migrate_legacy_file(data_dir, 'predictions', legacy_path)
+    assert os.path.exists(legacy_path + MIGRATION_MARKER_SUFFIX)
+
+    monkeypatch.setattr(partition_utils, 'write_json_atomic', write_json_atomic)
+    assert migrate_legacy_file(data_dir, 'predictions', legacy_path) == 3
+    assert load_records(data_dir, 'predictions') == records
+    assert not os.path.exists(legacy_path + MIGRATION_MARKER_SUFFIX)
+    assert migrate_legacy_file(data_dir, 'predictions', legacy_path) == 0
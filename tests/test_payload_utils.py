@@ -0,0 +1,20 @@
+"""
+Page payload budget checks: every page, in full and lite mode, must emit
+no more HTML per rerun than its budget
+"""
+
+import os
+import pytest
+
+pytest.importorskip('streamlit')
+from utils.payload_utils import PAGE_SCRIPTS, assert_within_budget, measure_page
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize('lite', [False, True], ids=['full', 'lite'])
+@pytest.mark.parametrize('page', list(PAGE_SCRIPTS))
+def test_page_is_within_payload_budget(page, lite, monkeypatch):
+    # PAGE_SCRIPTS paths and the pages' asset paths are relative to the project root
+    monkeypatch.chdir(PROJECT_ROOT)
+    script, state = PAGE_SCRIPTS[page]
+    assert_within_budget(measure_page(script, state, lite))
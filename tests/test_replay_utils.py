@@ -0,0 +1,74 @@
+"""
+Tests for replaying queued fallback writes in utils.replay_utils
+
+A JSON backend in a second directory stands in for the database.
+"""
+
+import pytest
+import utils.replay_utils as replay_utils
+from utils.replay_utils import enqueue_writes, pending_replay_count, replay_writes, start_replay
+from utils.storage_utils import JsonBackend
+
+def _prediction(index):
+    return {'student_name': f"Student {index}", 'risk_level': 'Low Risk', 'timestamp': f"2025-06-{index + 1:02d}T09:00:00"}
+
+@pytest.fixture
+def database(tmp_path):
+    return JsonBackend(str(tmp_path / 'database'))
+
+def test_replays_queued_writes_in_order(tmp_path, database):
+    data_dir = str(tmp_path)
+    enqueue_writes(data_dir, 'prediction', [_prediction(0), _prediction(1)])
+    enqueue_writes(data_dir, 'observation', [{'child_name': 'Amina', 'timestamp': '2025-06-03T18:00:00'}])
+    enqueue_writes(data_dir, 'prediction', [_prediction(3)])
+    assert pending_replay_count(data_dir) == 4
+
+    order = []
+
+    def save_predictions(records):
+        order.extend(records)
+        return database.save_predictions(records)
+
+    def save_observations(records):
+        order.extend(records)
+        return all(database.save_observation(record) for record in records)
+
+    thread = start_replay(data_dir, {'prediction': save_predictions, 'observation': save_observations})
+    thread.join(timeout=10)
+
+    assert [record.get('student_name', record.get('child_name')) for record in order] == [
+        'Student 0', 'Student 1', 'Amina', 'Student 3'
+    ]
+    assert [record['student_name'] for record in database.load_predictions()] == ['Student 0', 'Student 1', 'Student 3']
+    assert len(database.load_observations()) == 1
+    assert pending_replay_count(data_dir) == 0
+
+def test_stops_at_the_first_error_and_resumes_there(tmp_path, database):
+    data_dir = str(tmp_path)
+    enqueue_writes(data_dir, 'prediction', [_prediction(index) for index in range(3)])
+
+    def flaky(records):
+        if records[0]['student_name'] == 'Student 1':
+            raise ConnectionError("database went away")
+        return database.save_predictions(records)
+
+    assert replay_writes(data_dir, {'prediction': flaky}) == 1
+    assert pending_replay_count(data_dir) == 2
+
+    assert replay_writes(data_dir, {'prediction': database.save_predictions}) == 2
+    assert [record['student_name'] for record in database.load_predictions()] == ['Student 0', 'Student 1', 'Student 2']
+    assert pending_replay_count(data_dir) == 0
+
+def test_drops_a_write_the_database_keeps_refusing(tmp_path, database, monkeypatch):
+    monkeypatch.setattr(replay_utils, 'MAX_REPLAY_ATTEMPTS', 2)
+    data_dir = str(tmp_path)
+    enqueue_writes(data_dir, 'prediction', [_prediction(0), _prediction(1)])
+
+    def refuse_first(records):
+        return records[0]['student_name'] != 'Student 0' and database.save_predictions(records)
+
+    assert replay_writes(data_dir, {'prediction': refuse_first}) == 1
+    assert pending_replay_count(data_dir) == 1
+    assert replay_writes(data_dir, {'prediction': refuse_first}) == 0
+    assert pending_replay_count(data_dir) == 0
+    assert [record['student_name'] for record in database.load_predictions()] == ['Student 1']
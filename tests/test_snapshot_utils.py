@@ -0,0 +1,54 @@
+"""
+Tests for the chunked prediction snapshot in utils.snapshot_utils
+"""
+
+import os
+import utils.snapshot_utils as snapshot_utils
+from utils.snapshot_utils import (
+    append_to_snapshot, compact_snapshot, get_snapshot_path, read_snapshot_frame, write_snapshot
+)
+
+def _record(month, index, risk_level='Low Risk'):
+    return {
+        'student_name': f"Student {index}",
+        'grade_level': 'Grade 3',
+        'math_score': 50 + index,
+        'timestamp': f"2025-{month:02d}-10T09:00:00",
+        'risk_level': risk_level,
+    }
+
+def test_appends_write_deltas_and_reads_merge_them(tmp_path):
+    data_dir = str(tmp_path)
+    assert append_to_snapshot(data_dir, [_record(1, 0)]) is False
+
+    write_snapshot(data_dir, [_record(1, 0), _record(2, 1)])
+    chunk_mtimes = {
+        name: os.stat(os.path.join(get_snapshot_path(data_dir), name)).st_mtime_ns
+        for name in os.listdir(get_snapshot_path(data_dir)) if name.endswith('.npz')
+    }
+    assert sorted(chunk_mtimes) == ['2025-01.npz', '2025-02.npz']
+
+    assert append_to_snapshot(data_dir, [_record(2, 2, 'High Risk'), {'student_name': 'No date'}])
+    for name, mtime in chunk_mtimes.items():
+        assert os.stat(os.path.join(get_snapshot_path(data_dir), name)).st_mtime_ns == mtime
+
+    frame = read_snapshot_frame(data_dir)
+    assert len(frame) == 4
+    assert set(frame['risk_level'].cat.categories) == {'Low Risk', 'High Risk'}
+    assert frame['risk_level'].isna().sum() == 1
+
+def test_compaction_merges_deltas_into_month_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_utils, 'COMPACT_AFTER_DELTAS', 3)
+    data_dir = str(tmp_path)
+    write_snapshot(data_dir, [])
+    for index in range(5):
+        append_to_snapshot(data_dir, [_record(3 + index % 2, index)])
+
+    names = os.listdir(get_snapshot_path(data_dir))
+    assert len([name for name in names if name.startswith('delta-')]) == 2
+    assert compact_snapshot(data_dir) == 2
+    assert sorted(name for name in os.listdir(get_snapshot_path(data_dir)) if name.endswith('.npz')) == [
+        '2025-03.npz', '2025-04.npz'
+    ]
+    frame = read_snapshot_frame(data_dir)
+    assert sorted(frame['student_name']) == [f"Student {index}" for index in range(5)]
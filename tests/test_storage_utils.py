@@ -0,0 +1,130 @@
+"""
+Conformance tests for the storage backends in utils.storage_utils
+
+Every file-based backend runs the same checks; PostgresBackend delegates to
+utils.db_utils, which tests/test_db_utils.py covers against a real server.
+"""
+
+from datetime import date, datetime
+import pytest
+from utils.aggregate_utils import (
+    daily_risk_counts_from_frame, grade_averages_from_frame, score_correlation_from_frame,
+    student_names_from_frame, student_trend_from_frame
+)
+from utils.benchmark_utils import make_prediction_records
+from utils.snapshot_utils import records_to_frame
+from utils.storage_utils import DatabaseBackend, StorageBackend, create_backend
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request, tmp_path):
+    backend = create_backend(request.param, str(tmp_path))
+    yield backend
+    if hasattr(backend, 'close'):
+        backend.close()
+
+@pytest.fixture
+def records():
+    # Records 0-9 fall on 2024-01-31, the rest on 2024-02-01
+    return make_prediction_records(30, students=3, start=datetime(2024, 1, 31, 23, 50))
+
+def _observation(day, child_name='Amina'):
+    return {
+        'child_name': child_name, 'date': f"2024-02-{day:02d}", 'homework_completion': 80,
+        'reading_time': 30, 'focus_level': 4, 'subjects_struggled': ['Math'],
+        'behavior_rating': 4, 'mood_rating': 5, 'sleep_hours': 9, 'energy_level': 4,
+        'medication_taken': False, 'timestamp': f"2024-02-{day:02d}T18:00:00"
+    }
+
+def test_backend_implements_the_protocol(backend):
+    assert isinstance(backend, StorageBackend)
+    # Aggregates and summaries are only offered by backends with a query engine
+    assert isinstance(backend, DatabaseBackend) == (backend.name != 'json')
+
+def test_predictions_round_trip(backend, records):
+    assert backend.save_prediction(records[0]) is True
+    assert backend.save_predictions(records[1:]) == len(records) - 1
+
+    loaded = backend.load_predictions()
+    assert len(loaded) == len(records)
+    first = min(loaded, key=lambda record: record['timestamp'])
+    for key in ('student_name', 'grade_level', 'math_score', 'risk_level', 'prediction'):
+        assert first.get(key) == records[0][key], key
+    assert str(first['timestamp'])[:19] == records[0]['timestamp'][:19]
+
+def test_prediction_filters(backend, records):
+    backend.save_predictions(records)
+
+    assert len(backend.load_predictions(date(2024, 1, 31), date(2024, 1, 31))) == 10
+
+    student = backend.load_predictions(student_name='Student 00001')
+    assert len(student) == 10
+    assert {record['student_name'] for record in student} == {'Student 00001'}
+
+    since = datetime.fromisoformat(records[9]['timestamp'])
+    until = datetime.fromisoformat(records[19]['timestamp'])
+    window = sorted(record['timestamp'] for record in backend.iter_predictions(since, until))
+    assert [str(timestamp)[:19] for timestamp in window] == [record['timestamp'] for record in records[10:20]]
+
+def test_observations_round_trip(backend):
+    assert backend.save_observation(_observation(1)) is True
+    backend.save_observation(_observation(1, 'Hassan'))
+
+    observations = backend.load_observations(child_name='Amina')
+    assert len(observations) == 1
+    assert observations[0]['subjects_struggled'] == ['Math']
+    assert list(backend.iter_observations(since=datetime(2024, 2, 2))) == []
+
+def test_observation_pages_run_newest_first(backend):
+    for day in range(1, 6):
+        backend.save_observation(_observation(day))
+
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = backend.load_observations_page(2, cursor, 'Amina')
+        pages.append([record['date'] for record in page])
+        if cursor is None:
+            break
+    assert pages == [['2024-02-05', '2024-02-04'], ['2024-02-03', '2024-02-02'], ['2024-02-01']]
+
+def _flatten(matrix):
+    return [value for row in matrix for value in row]
+
+def test_sqlite_aggregates_match_the_snapshot_path(tmp_path):
+    # Databases keep one grade per student, so give each student a single grade as in real data
+    records = make_prediction_records(30, students=8)
+    backend = create_backend('sqlite', str(tmp_path))
+    backend.save_predictions(records)
+    frame = records_to_frame(records)
+    try:
+        assert backend.daily_risk_counts() == daily_risk_counts_from_frame(frame)
+        assert backend.student_names() == student_names_from_frame(frame)
+
+        # The snapshot frame stores scores and probabilities as float32
+        averages = grade_averages_from_frame(frame)
+        assert [(row['grade_level'], row['count']) for row in backend.grade_averages()] == [
+            (row['grade_level'], row['count']) for row in averages
+        ]
+        assert [row['math_score'] for row in backend.grade_averages()] == pytest.approx(
+            [row['math_score'] for row in averages]
+        )
+
+        trend = student_trend_from_frame(frame, 'Student 00002')
+        assert [(row['timestamp'], row['risk_level']) for row in backend.student_trend('Student 00002')] == [
+            (row['timestamp'], row['risk_level']) for row in trend
+        ]
+        assert [row['probability'] for row in backend.student_trend('Student 00002')] == pytest.approx(
+            [row['probability'] for row in trend]
+        )
+
+        correlation = score_correlation_from_frame(frame)
+        assert backend.score_correlation()['columns'] == correlation['columns']
+        assert _flatten(backend.score_correlation()['matrix']) == pytest.approx(_flatten(correlation['matrix']))
+    finally:
+        backend.close()
+
+def test_student_trend_keeps_missing_risk_levels_missing():
+    records = make_prediction_records(2, students=1)
+    records[0]['risk_level'] = None
+    trend = student_trend_from_frame(records_to_frame(records), 'Student 00000')
+    assert [row['risk_level'] for row in trend] == [None, records[1]['risk_level']]
@@ -0,0 +1,112 @@
+"""
+Analytics aggregates for EduScan Somalia
+Shared SQL for database backends and equivalent DataFrame versions for the
+file store, so dashboards fetch small summaries instead of raw rows
+"""
+
+import math
+from datetime import datetime, timedelta
+
+# Columns summarised by grade averages and the correlation matrix
+SCORE_COLUMNS = [
+    'math_score', 'reading_score', 'writing_score',
+    'attendance', 'behavior', 'literacy', 'probability'
+]
+
+def _as_float(column):
+    # Sum REAL columns in double precision; SQLite maps this type name to REAL too
+    return f"CAST({column} AS DOUBLE PRECISION)"
+
+def correlation_sums_sql(columns, alias):
+    """SELECT expressions for pairwise-complete sums, six per column pair (i <= j)"""
+    expressions = []
+    for i, first in enumerate(columns):
+        for second in columns[i:]:
+            x = _as_float(f"{alias}.{first}")
+            y = _as_float(f"{alias}.{second}")
+            both = f"{alias}.{first} IS NOT NULL AND {alias}.{second} IS NOT NULL"
+            expressions.extend([
+                f"SUM(CASE WHEN {both} THEN 1 ELSE 0 END)",
+                f"SUM(CASE WHEN {both} THEN {x} END)",
+                f"SUM(CASE WHEN {both} THEN {y} END)",
+                f"SUM(CASE WHEN {both} THEN {x} * {x} END)",
+                f"SUM(CASE WHEN {both} THEN {y} * {y} END)",
+                f"SUM(CASE WHEN {both} THEN {x} * {y} END)",
+            ])
+    return expressions
+
+def correlation_from_sums(columns, row):
+    """Turn the sums selected by correlation_sums_sql into a Pearson correlation matrix
+
+    Returns {'columns': [...], 'matrix': [[...]]}, with None where a pair has
+    fewer than two observations or no variance, like DataFrame.corr().
+    """
+    size = len(columns)
+    matrix = [[None] * size for _ in range(size)]
+    values = iter(row)
+    for i in range(size):
+        for j in range(i, size):
+            n, sx, sy, sxx, syy, sxy = (next(values) for _ in range(6))
+            correlation = None
+            if n and n >= 2:
+                covariance = sxy - sx * sy / n
+                variance_x = sxx - sx * sx / n
+                variance_y = syy - sy * sy / n
+                if variance_x > 1e-12 and variance_y > 1e-12:
+                    correlation = max(-1.0, min(1.0, covariance / math.sqrt(variance_x * variance_y)))
+            matrix[i][j] = matrix[j][i] = correlation
+    return {'columns': list(columns), 'matrix': matrix}
+
+def _frame_in_range(frame, start_date, end_date):
+    if start_date is not None:
+        frame = frame[frame['timestamp'] >= datetime.combine(start_date, datetime.min.time())]
+    if end_date is not None:
+        frame = frame[frame['timestamp'] < datetime.combine(end_date + timedelta(days=1), datetime.min.time())]
+    return frame
+
+def daily_risk_counts_from_frame(frame, start_date=None, end_date=None):
+    """Daily prediction counts per risk level from a typed prediction frame"""
+    frame = _frame_in_range(frame.dropna(subset=['timestamp']), start_date, end_date)
+    counts = frame.groupby([frame['timestamp'].dt.date, 'risk_level'], observed=True).size()
+    return [
+        {'date': day.isoformat(), 'risk_level': str(level), 'count': int(count)}
+        for (day, level), count in counts.items() if count
+    ]
+
+def grade_averages_from_frame(frame, columns=SCORE_COLUMNS):
+    """Prediction count and mean scores per grade level from a typed prediction frame"""
+    grouped = frame.groupby('grade_level', observed=True)
+    counts = grouped.size()
+    means = grouped[columns].mean()
+    results = []
+    for grade_level, count in counts.items():
+        row = {'grade_level': grade_level, 'count': int(count)}
+        for column in columns:
+            value = means.at[grade_level, column]
+            row[column] = None if value != value else float(value)
+        results.append(row)
+    return sorted(results, key=lambda row: str(row['grade_level']))
+
+def score_correlation_from_frame(frame, columns=SCORE_COLUMNS):
+    """Pearson correlation matrix of score columns in the same shape as correlation_from_sums"""
+    corr = frame[columns].astype('float64').corr()
+    return {
+        'columns': list(columns),
+        'matrix': [[None if value != value else float(value) for value in row] for row in corr.values.tolist()]
+    }
+
+def student_trend_from_frame(frame, student_name):
+    """One student's prediction timestamps, probabilities and risk levels, oldest first"""
+    rows = frame[frame['student_name'] == student_name].sort_values('timestamp')
+    return [
+        {
+            'timestamp': timestamp.isoformat() if timestamp == timestamp else None,
+            'probability': None if probability != probability else float(probability),
+            'risk_level': None if risk_level != risk_level else str(risk_level)
+        }
+        for timestamp, probability, risk_level in zip(rows['timestamp'], rows['probability'], rows['risk_level'])
+    ]
+
+def student_names_from_frame(frame):
+    """Distinct non-empty student names, sorted"""
+    return sorted(name for name in frame['student_name'].dropna().unique() if name)
@@ -0,0 +1,275 @@
+"""
+Encoded asset registry for EduScan Somalia
+Encodes image files once per process and shares them across sessions,
+re-reading a file only when its modification time or size changes, and
+publishes them under Streamlit static serving with content-hashed names
+"""
+
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Streamlit serves <app dir>/static at app/static when server.enableStaticServing is on
+STATIC_DIR = os.path.join(PROJECT_ROOT, 'static')
+STATIC_ASSET_DIR = os.path.join(STATIC_DIR, 'assets')
+STATIC_URL_PREFIX = 'app/static/assets'
+
+# Set STATIC_ASSETS=0 to fall back to inline data: URIs
+STATIC_SERVING_ENABLED = os.environ.get('STATIC_ASSETS', '1') != '0'
+
+_UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9_-]+')
+
+def guess_mime_type(file_path):
+    """MIME type for an image path, defaulting to JPEG like the original gallery code"""
+    mime_type, _ = mimetypes.guess_type(file_path)
+    return mime_type or 'image/jpeg'
+
+def _file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def file_content_hash(file_path, length=12):
+    """Short SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+def hashed_asset_name(file_path, content_hash):
+    """URL-safe, content-addressed file name such as Daily_Tracking.3f2a9c1b7d04.png"""
+    stem, extension = os.path.splitext(os.path.basename(file_path))
+    stem = _UNSAFE_NAME_CHARS.sub('_', stem).strip('_') or 'asset'
+    return f"{stem}.{content_hash}{extension.lower()}"
+
+def _publish_file(source_path, target_path):
+    """Copy a file into the static directory through a temp file so readers never see a partial image"""
+    with open(source_path, 'rb') as source:
+        _write_file_atomic(target_path, source)
+
+def _write_file_atomic(target_path, content):
+    """Write bytes or a binary file object to a temp file and rename it into place"""
+    directory = os.path.dirname(target_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            if isinstance(content, bytes):
+                target.write(content)
+            else:
+                shutil.copyfileobj(content, target)
+        os.replace(tmp_path, target_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def publish_bytes(name, data):
+    """Publish generated content under a content-hashed static name; returns its URL or None"""
+    content_hash = hashlib.sha256(data).hexdigest()[:12]
+    target_path = os.path.join(STATIC_ASSET_DIR, hashed_asset_name(name, content_hash))
+    if not os.path.exists(target_path):
+        try:
+            _write_file_atomic(target_path, data)
+        except OSError as e:
+            print(f"Error publishing static asset {name}: {e}")
+            return None
+    return static_url(target_path, content_hash)
+
+def static_url(file_path, version):
+    """app/static URL of a file under the static directory, versioned for long-lived caching"""
+    relative = os.path.relpath(file_path, STATIC_ASSET_DIR).replace(os.sep, '/')
+    return f"{STATIC_URL_PREFIX}/{relative}?v={version}"
+
+def _cache_signature(file_path):
+    """Cache validity key of a file: its hash from the asset manifest, else its mtime and size
+
+    Files listed in the manifest are not probed at all; None means missing.
+    """
+    from utils.manifest_utils import is_known_missing, manifest_entry
+    entry = manifest_entry(file_path)
+    if entry is not None:
+        return ('manifest', entry['hash'])
+    if is_known_missing(file_path):
+        return None
+    return _file_signature(file_path)
+
+class AssetRegistry:
+    """Thread-safe cache of encoded and published files, invalidated by mtime and size
+
+    Files listed in the asset manifest are keyed by their recorded hash instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._published = {}
+        self._hashes = {}
+        self._encodes = 0
+        self._hits = 0
+
+    def get_base64(self, file_path):
+        """Base64 text of a file, or None if it cannot be read"""
+        signature = _cache_signature(file_path)
+        if signature is None:
+            with self._lock:
+                self._entries.pop(file_path, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[0] == signature:
+                self._hits += 1
+                return entry[1]
+
+        # Encode outside the lock so one large file does not block other lookups
+        try:
+            with open(file_path, 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('utf-8')
+        except OSError:
+            return None
+
+        with self._lock:
+            self._entries[file_path] = (signature, encoded)
+            self._encodes += 1
+        return encoded
+
+    def get_data_uri(self, file_path, mime_type=None):
+        """data: URI for a file, or '' if it cannot be read"""
+        encoded = self.get_base64(file_path)
+        if not encoded:
+            return ''
+        return f"data:{mime_type or guess_mime_type(file_path)};base64,{encoded}"
+
+    def get_content_hash(self, file_path):
+        """Short content hash of a file, recomputed only when the file changes; None if unreadable"""
+        signature = _cache_signature(file_path)
+        if signature is None:
+            return None
+        if signature[0] == 'manifest':
+            return signature[1]
+        with self._lock:
+            entry = self._hashes.get(file_path)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+        try:
+            content_hash = file_content_hash(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            self._hashes[file_path] = (signature, content_hash)
+        return content_hash
+
+    def get_static_url(self, file_path):
+        """Cacheable URL of a file published under the static directory, or None if it cannot be read
+
+        The content hash in the name changes whenever the file does, and the
+        ?v= argument makes Streamlit's static handler send long-lived cache
+        headers, so browsers fetch each version once.
+        """
+        signature = _cache_signature(file_path)
+        if signature is None:
+            with self._lock:
+                self._published.pop(file_path, None)
+            return None
+
+        with self._lock:
+            entry = self._published.get(file_path)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+
+        from utils.manifest_utils import manifest_entry, project_path
+        listed = manifest_entry(file_path)
+        if listed is not None and listed['static']:
+            url = static_url(project_path(listed['static']), listed['hash'])
+            with self._lock:
+                self._published[file_path] = (signature, url)
+            return url
+
+        content_hash = self.get_content_hash(file_path)
+        if content_hash is None:
+            return None
+        try:
+            name = hashed_asset_name(file_path, content_hash)
+            target_path = os.path.join(STATIC_ASSET_DIR, name)
+            if not os.path.exists(target_path):
+                _publish_file(file_path, target_path)
+        except OSError as e:
+            print(f"Error publishing static asset {file_path}: {e}")
+            return None
+
+        url = static_url(target_path, content_hash)
+        with self._lock:
+            self._published[file_path] = (signature, url)
+        return url
+
+    def get_url(self, file_path, mime_type=None):
+        """Static URL for a file, falling back to a data: URI when static serving is off or fails"""
+        if STATIC_SERVING_ENABLED:
+            url = self.get_static_url(file_path)
+            if url:
+                return url
+        return self.get_data_uri(file_path, mime_type)
+
+    def invalidate(self, file_path=None):
+        """Drop one cached file, or every cached file when no path is given"""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._published.clear()
+                self._hashes.clear()
+            else:
+                self._entries.pop(file_path, None)
+                self._published.pop(file_path, None)
+                self._hashes.pop(file_path, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'encoded_bytes': sum(len(entry[1]) for entry in self._entries.values()),
+                'published': len(self._published),
+                'encodes': self._encodes,
+                'hits': self._hits,
+            }
+
+class LazyAssetMap(Mapping):
+    """Read-only key -> data URI mapping that encodes each asset on first access"""
+
+    def __init__(self, paths, registry=None, mime_types=None):
+        self._paths = dict(paths)
+        self._registry = registry or asset_registry
+        self._mime_types = mime_types or {}
+
+    def __getitem__(self, key):
+        path = self._paths[key]
+        return self._registry.get_data_uri(path, self._mime_types.get(key))
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def path(self, key):
+        return self._paths[key]
+
+# Process-wide registry shared by every Streamlit session
+asset_registry = AssetRegistry()
+
+def asset_url(file_path):
+    """Image source for a file: a cacheable static URL, or a data: URI fallback ('' if missing)"""
+    return asset_registry.get_url(file_path)
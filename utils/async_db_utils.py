@@ -0,0 +1,499 @@
+"""
+Asynchronous PostgreSQL access for EduScan Somalia
+asyncio counterparts of the utils.db_utils functions, built on asyncpg, so
+batch scoring, exports and dashboard aggregation can overlap their queries
+"""
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+    _CONNECTION_ERRORS = (
+        OSError, asyncpg.exceptions.PostgresConnectionError, asyncpg.exceptions.InterfaceError
+    )
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+    _CONNECTION_ERRORS = (OSError,)
+
+from utils.aggregate_utils import SCORE_COLUMNS
+from utils.db_utils import (
+    CONNECT_TIMEOUT_SECONDS, CURSOR_ITERSIZE, OBSERVATION_SELECT, POOL_MAX_SIZE, POOL_MIN_SIZE,
+    POOL_TIMEOUT_SECONDS, PREDICTION_COPY_COLUMNS, PREDICTION_SELECT, RISK_COUNTS_QUERY,
+    STUDENT_IDENTITY_INDEX_QUERY, TABLE_STATS_QUERY, DatabaseUnavailableError,
+    _daily_risk_counts_query, _grade_average_row_to_dict, _grade_averages_query, _observation_history_query,
+    _observation_row_to_dict, _page_from_rows, _page_query, _prediction_history_query, _prediction_row_to_dict,
+    _records_from_input, _stats_from_counters, _student_ids, database_circuit
+)
+
+logger = logging.getLogger(__name__)
+
+# One pool per event loop; asyncpg connections cannot be shared across loops
+_pools = {}
+
+def _positional(query):
+    """Convert the %s placeholders used by db_utils into asyncpg's $1, $2, ..."""
+    parts = query.split('%s')
+    return parts[0] + ''.join(f"${index}{part}" for index, part in enumerate(parts[1:], start=1))
+
+def _number(value):
+    """Coerce numeric input (including NumPy scalars) for asyncpg's strict codecs"""
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+def _integer(value):
+    number = _number(value)
+    return None if number is None else int(number)
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value) if value else datetime.now()
+
+async def get_async_pool():
+    """Get the asyncpg pool for the running event loop, creating it on first use"""
+    if not ASYNCPG_AVAILABLE:
+        raise RuntimeError("Async database access requires the asyncpg package")
+
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = await asyncpg.create_pool(
+            os.environ['DATABASE_URL'],
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            timeout=CONNECT_TIMEOUT_SECONDS
+        )
+        _pools[loop] = pool
+    return pool
+
+async def close_async_pool():
+    """Close the pool for the running event loop"""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
+@asynccontextmanager
+async def async_connection():
+    """Acquire a pooled connection, sharing the synchronous path's circuit breaker"""
+    if not database_circuit.allow_request():
+        raise DatabaseUnavailableError("Database circuit is open")
+    try:
+        pool = await get_async_pool()
+        conn = await pool.acquire(timeout=POOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError as e:
+        database_circuit.cancel()
+        raise DatabaseUnavailableError("No database connection available in time") from e
+    except _CONNECTION_ERRORS as e:
+        database_circuit.record_failure()
+        raise DatabaseUnavailableError(f"Could not connect to database: {e}") from e
+    except BaseException:
+        # Neither success nor an outage (missing DATABASE_URL, cancellation):
+        # release a half-open probe so the circuit is not stuck waiting for it
+        database_circuit.cancel()
+        raise
+
+    connection_lost = False
+    try:
+        yield conn
+    except _CONNECTION_ERRORS as e:
+        connection_lost = True
+        raise DatabaseUnavailableError(f"Database connection lost: {e}") from e
+    finally:
+        await pool.release(conn)
+        if connection_lost:
+            database_circuit.record_failure()
+        else:
+            database_circuit.record_success()
+
+def run_async(coroutine_fn, *args, **kwargs):
+    """Run an async storage function from synchronous code such as a Streamlit page
+
+    The pool lives only as long as the call, so use this for whole jobs
+    (a batch, an export, a dashboard load) rather than per row.
+    """
+    async def main():
+        try:
+            return await coroutine_fn(*args, **kwargs)
+        finally:
+            await close_async_pool()
+
+    return asyncio.run(main())
+
+# Whether students.name has the unique index ON CONFLICT (name) relies on; checked once per process
+_student_identity_index_ready = None
+
+# Resolves a batch of names in one statement: inserted ids come back from
+# RETURNING, existing ones from the statement's snapshot. {insert_guard} is
+# ON CONFLICT (name) DO NOTHING, or a NOT EXISTS filter without the unique index.
+STUDENT_UPSERT = """
+    WITH input AS (
+        SELECT DISTINCT ON (name) name, grade_level
+        FROM unnest($1::varchar[], $2::varchar[]) AS v (name, grade_level)
+    ), inserted AS (
+        INSERT INTO students (name, grade_level)
+        SELECT name, grade_level FROM input
+        {insert_guard}
+        RETURNING name, id
+    )
+    SELECT name, id FROM inserted
+    UNION ALL
+    SELECT s.name, MIN(s.id) FROM students s JOIN input ON s.name = input.name GROUP BY s.name
+"""
+
+async def _has_student_identity_index(conn):
+    global _student_identity_index_ready
+    if _student_identity_index_ready is None:
+        _student_identity_index_ready = await conn.fetchval(STUDENT_IDENTITY_INDEX_QUERY)
+    return _student_identity_index_ready
+
+async def _get_or_create_student_ids(conn, students):
+    """Resolve {name: grade_level} to {name: id} from the identity cache and one upsert statement
+
+    Returns (student_ids, resolved), where resolved holds the ids that did
+    not come from the cache; cache them only after the transaction commits.
+    """
+    student_ids = {}
+    for name in students:
+        student_id = _student_ids.get(name)
+        if student_id is not None:
+            student_ids[name] = student_id
+    missing = {name: grade_level for name, grade_level in students.items() if name not in student_ids}
+    if not missing:
+        return student_ids, {}
+
+    if await _has_student_identity_index(conn):
+        insert_guard = "ON CONFLICT (name) DO NOTHING"
+    else:
+        insert_guard = "WHERE NOT EXISTS (SELECT 1 FROM students s WHERE s.name = input.name)"
+    names = list(missing)
+    rows = await conn.fetch(STUDENT_UPSERT.format(insert_guard=insert_guard), names, list(missing.values()))
+    resolved = {row['name']: row['id'] for row in rows}
+
+    unresolved = [name for name in names if name not in resolved]
+    if unresolved:
+        # Concurrent inserts committed after the statement's snapshot
+        rows = await conn.fetch(
+            "SELECT name, MIN(id) AS id FROM students WHERE name = ANY($1::varchar[]) GROUP BY name", unresolved
+        )
+        resolved.update((row['name'], row['id']) for row in rows)
+
+    student_ids.update(resolved)
+    return student_ids, resolved
+
+def _prediction_row(record, student_id):
+    """Build a predictions row in PREDICTION_COPY_COLUMNS order"""
+    return (
+        student_id,
+        _number(record.get('math_score')),
+        _number(record.get('reading_score')),
+        _number(record.get('writing_score')),
+        _number(record.get('attendance')),
+        _number(record.get('behavior')),
+        _number(record.get('literacy')),
+        _integer(record.get('prediction')),
+        _number(record.get('probability')),
+        record.get('risk_level'),
+        record.get('notes', ''),
+        _timestamp(record.get('timestamp'))
+    )
+
+async def save_prediction(prediction_data):
+    """Save one prediction; async counterpart of save_prediction_to_db"""
+    try:
+        async with async_connection() as conn:
+            student_name = prediction_data.get('student_name', 'Unknown Student')
+            grade_level = prediction_data.get('grade_level', 'Unknown')
+            async with conn.transaction():
+                student_ids, resolved = await _get_or_create_student_ids(conn, {student_name: grade_level})
+                student_id = student_ids[student_name]
+                await conn.execute(
+                    f"INSERT INTO predictions ({', '.join(PREDICTION_COPY_COLUMNS)}) "
+                    f"VALUES ({', '.join(f'${i}' for i in range(1, len(PREDICTION_COPY_COLUMNS) + 1))})",
+                    *_prediction_row(prediction_data, student_id)
+                )
+            for name, resolved_id in resolved.items():
+                _student_ids.put(name, resolved_id)
+            return True
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error saving prediction: {e}")
+        return False
+
+async def save_predictions_bulk(predictions):
+    """Save many predictions in one transaction with binary COPY; returns the count saved"""
+    records = _records_from_input(predictions)
+    if not records:
+        return 0
+
+    try:
+        async with async_connection() as conn:
+            students = {}
+            for record in records:
+                students.setdefault(record.get('student_name') or 'Unknown Student',
+                                    record.get('grade_level') or 'Unknown')
+
+            async with conn.transaction():
+                student_ids, resolved = await _get_or_create_student_ids(conn, students)
+
+                await conn.copy_records_to_table(
+                    'predictions',
+                    records=[
+                        _prediction_row(record, student_ids[record.get('student_name') or 'Unknown Student'])
+                        for record in records
+                    ],
+                    columns=PREDICTION_COPY_COLUMNS
+                )
+
+            for name, student_id in resolved.items():
+                _student_ids.put(name, student_id)
+            return len(records)
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk saving predictions: {e}")
+        return 0
+
+async def save_parent_observation(observation_data):
+    """Save one parent observation; async counterpart of save_parent_observation_to_db"""
+    try:
+        async with async_connection() as conn:
+            child_name = observation_data.get('child_name', 'Unknown Child')
+            subjects_struggled = observation_data.get('subjects_struggled', [])
+            if isinstance(subjects_struggled, list):
+                subjects_struggled = json.dumps(subjects_struggled)
+
+            async with conn.transaction():
+                student_ids, resolved = await _get_or_create_student_ids(conn, {child_name: 'Unknown'})
+                student_id = student_ids[child_name]
+                await conn.execute("""
+                    INSERT INTO parent_observations (
+                        student_id, child_name, date, homework_completion, reading_time,
+                        focus_level, subjects_struggled, behavior_rating, mood_rating,
+                        sleep_hours, energy_level, social_interactions, learning_wins,
+                        challenges_faced, strategies_used, screen_time, physical_activity,
+                        medication_taken, special_events, timestamp
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20)
+                """,
+                    student_id,
+                    child_name,
+                    date.fromisoformat(str(observation_data.get('date', date.today().isoformat()))[:10]),
+                    _number(observation_data.get('homework_completion')),
+                    _number(observation_data.get('reading_time')),
+                    _number(observation_data.get('focus_level')),
+                    subjects_struggled,
+                    _number(observation_data.get('behavior_rating')),
+                    _number(observation_data.get('mood_rating')),
+                    _number(observation_data.get('sleep_hours')),
+                    _number(observation_data.get('energy_level')),
+                    observation_data.get('social_interactions', ''),
+                    observation_data.get('learning_wins', ''),
+                    observation_data.get('challenges_faced', ''),
+                    observation_data.get('strategies_used', ''),
+                    _number(observation_data.get('screen_time')),
+                    _number(observation_data.get('physical_activity')),
+                    bool(observation_data.get('medication_taken', False)),
+                    observation_data.get('special_events', ''),
+                    _timestamp(observation_data.get('timestamp'))
+                )
+            for name, resolved_id in resolved.items():
+                _student_ids.put(name, resolved_id)
+            return True
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error saving parent observation: {e}")
+        return False
+
+async def iter_student_predictions(start_date=None, end_date=None, since=None, until=None,
+                                   student_name=None, prefetch=CURSOR_ITERSIZE):
+    """Stream prediction dicts, newest first, through a server-side cursor"""
+    query, params = _prediction_history_query(start_date, end_date, since, until, student_name)
+    query = _positional(query)
+    async with async_connection() as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(query, *params, prefetch=prefetch):
+                yield _prediction_row_to_dict(row)
+
+async def iter_parent_observations(start_date=None, end_date=None, since=None, until=None,
+                                   child_name=None, prefetch=CURSOR_ITERSIZE):
+    """Stream parent observation dicts, newest first, through a server-side cursor"""
+    query, params = _observation_history_query(start_date, end_date, since, until, child_name)
+    query = _positional(query)
+    async with async_connection() as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(query, *params, prefetch=prefetch):
+                yield _observation_row_to_dict(row)
+
+async def load_student_predictions(start_date=None, end_date=None, since=None, until=None, student_name=None):
+    """Load prediction dicts, optionally filtered"""
+    query, params = _prediction_history_query(start_date, end_date, since, until, student_name)
+    try:
+        async with async_connection() as conn:
+            rows = await conn.fetch(_positional(query), *params)
+            return [_prediction_row_to_dict(row) for row in rows]
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading predictions: {e}")
+        return []
+
+async def load_parent_observations(start_date=None, end_date=None, since=None, until=None, child_name=None):
+    """Load parent observation dicts, optionally filtered"""
+    query, params = _observation_history_query(start_date, end_date, since, until, child_name)
+    try:
+        async with async_connection() as conn:
+            rows = await conn.fetch(_positional(query), *params)
+            return [_observation_row_to_dict(row) for row in rows]
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading observations: {e}")
+        return []
+
+async def authenticate_user(username, password):
+    """Authenticate user against database"""
+    try:
+        async with async_connection() as conn:
+            row = await conn.fetchrow(
+                "SELECT id, username, user_type, full_name, email, created_date FROM users WHERE username = $1 AND password = $2",
+                username, password
+            )
+            if row:
+                return {
+                    'id': row[0],
+                    'username': row[1],
+                    'user_type': row[2],
+                    'full_name': row[3],
+                    'email': row[4],
+                    'created_date': row[5].isoformat()
+                }
+            return None
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error authenticating user: {e}")
+        return None
+
+async def get_database_stats():
+    """Get database statistics by summing the trigger-maintained counter shards"""
+    try:
+        async with async_connection() as conn:
+            rows = await conn.fetch(TABLE_STATS_QUERY)
+            risk_rows = await conn.fetch(RISK_COUNTS_QUERY)
+            return _stats_from_counters(
+                {row['table_name']: (row['row_count'], row['last_timestamp']) for row in rows},
+                {row['risk_level']: row['row_count'] for row in risk_rows}
+            )
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting database stats: {e}")
+        return _stats_from_counters({}, {})
+
+async def _load_page(select, alias, row_to_dict, limit, after, name_column=None, name=None):
+    query, params = _page_query(select, alias, limit, after, name_column, name)
+    async with async_connection() as conn:
+        rows = await conn.fetch(_positional(query), *params)
+    return _page_from_rows(rows, row_to_dict, limit)
+
+async def load_student_predictions_page(limit=50, after=None, student_name=None):
+    """Load one page of predictions, newest first; returns (records, next_cursor)"""
+    try:
+        return await _load_page(PREDICTION_SELECT, 'p', _prediction_row_to_dict, limit, after, 's.name', student_name)
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading predictions page: {e}")
+        return [], None
+
+async def load_parent_observations_page(limit=50, after=None, child_name=None):
+    """Load one page of parent observations, newest first; returns (records, next_cursor)"""
+    try:
+        return await _load_page(OBSERVATION_SELECT, 'po', _observation_row_to_dict, limit, after,
+                                'po.child_name', child_name)
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading observations page: {e}")
+        return [], None
+
+async def get_daily_risk_counts(start_date=None, end_date=None):
+    """Count predictions per day and risk level with a GROUP BY in the database"""
+    query, params = _daily_risk_counts_query(start_date, end_date)
+    try:
+        async with async_connection() as conn:
+            rows = await conn.fetch(_positional(query), *params)
+            return [
+                {'date': day.isoformat(), 'risk_level': risk_level, 'count': count}
+                for day, risk_level, count in rows
+            ]
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating daily risk counts: {e}")
+        return []
+
+async def get_grade_averages(columns=SCORE_COLUMNS):
+    """Average scores per grade level with a GROUP BY in the database"""
+    try:
+        async with async_connection() as conn:
+            rows = await conn.fetch(_grade_averages_query(columns))
+            return [_grade_average_row_to_dict(row, columns) for row in rows]
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating grade averages: {e}")
+        return []
+
+async def load_dashboard_data(page_size=50, start_date=None, end_date=None):
+    """Load a dashboard's stats, aggregates and first history pages with concurrent queries
+
+    Only the newest page_size predictions and observations are fetched; pass
+    the returned cursors to the page loaders for more.
+    """
+    stats, daily_risk_counts, grade_averages, predictions_page, observations_page = await asyncio.gather(
+        get_database_stats(),
+        get_daily_risk_counts(start_date, end_date),
+        get_grade_averages(),
+        load_student_predictions_page(page_size),
+        load_parent_observations_page(page_size)
+    )
+    predictions, predictions_cursor = predictions_page
+    observations, observations_cursor = observations_page
+    return {
+        'stats': stats,
+        'daily_risk_counts': daily_risk_counts,
+        'grade_averages': grade_averages,
+        'predictions': predictions,
+        'predictions_cursor': predictions_cursor,
+        'observations': observations,
+        'observations_cursor': observations_cursor,
+    }
+
+async def save_prediction_batches(batches):
+    """Save several prediction batches concurrently, one pooled connection each
+
+    Returns the number saved per batch, in order.
+    """
+    return await asyncio.gather(*(save_predictions_bulk(batch) for batch in batches))
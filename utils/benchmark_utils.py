@@ -0,0 +1,99 @@
+"""
+Storage backend benchmarks for EduScan Somalia
+Run with: python -m utils.benchmark_utils --backends json sqlite --sizes 1000 100000
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from utils.storage_utils import create_backend
+
+RISK_LEVELS = ['Low Risk', 'Medium Risk', 'High Risk']
+
+def make_prediction_records(count, students=500, start=datetime(2024, 1, 1), seed=0):
+    """Generate synthetic predictions spread one minute apart from start"""
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        records.append({
+            'student_name': f"Student {index % students:05d}",
+            'grade_level': f"Grade {index % 8 + 1}",
+            'math_score': round(rng.uniform(20, 100), 1),
+            'reading_score': round(rng.uniform(20, 100), 1),
+            'writing_score': round(rng.uniform(20, 100), 1),
+            'attendance': round(rng.uniform(50, 100), 1),
+            'behavior': rng.randint(1, 5),
+            'literacy': rng.randint(1, 5),
+            'prediction': rng.randint(0, 1),
+            'probability': round(rng.random(), 4),
+            'risk_level': rng.choice(RISK_LEVELS),
+            'notes': '',
+            'timestamp': (start + timedelta(minutes=index)).isoformat(),
+        })
+    return records
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+def benchmark_backend(backend, size, point_reads=50, batch_size=10000):
+    """Measure write, point-read (one student's history) and range-read (one day) throughput"""
+    records = make_prediction_records(size)
+
+    def write():
+        for offset in range(0, size, batch_size):
+            backend.save_predictions(records[offset:offset + batch_size])
+
+    write_seconds, _ = _timed(write)
+
+    rng = random.Random(1)
+    names = [f"Student {rng.randrange(500):05d}" for _ in range(point_reads)]
+    point_seconds, _ = _timed(lambda: [backend.load_predictions(student_name=name) for name in names])
+
+    last_day = datetime.fromisoformat(records[-1]['timestamp']).date()
+    range_seconds, day = _timed(lambda: backend.load_predictions(last_day, last_day))
+
+    return {
+        'backend': backend.name,
+        'records': size,
+        'writes_per_second': round(size / write_seconds, 1),
+        'point_read_ms': round(point_seconds / point_reads * 1000, 2),
+        'range_read_rows': len(day),
+        'range_read_rows_per_second': round(len(day) / range_seconds, 1) if range_seconds else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EduScan storage backends")
+    parser.add_argument('--backends', nargs='+', default=['json', 'sqlite'],
+                        choices=['json', 'sqlite', 'postgres'],
+                        help="postgres writes to DATABASE_URL, so only use it against a scratch database")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 100000, 1000000])
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.backends:
+        for size in args.sizes:
+            work_dir = tempfile.mkdtemp(prefix=f"eduscan_{name}_")
+            try:
+                backend = create_backend(name, work_dir)
+                result = benchmark_backend(backend, size)
+                results.append(result)
+                print(json.dumps(result))
+                if hasattr(backend, 'close'):
+                    backend.close()
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
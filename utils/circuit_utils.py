@@ -0,0 +1,120 @@
+"""
+Circuit breaker for EduScan Somalia's database path
+Stops calling a failing dependency for a while, then probes it with backoff
+"""
+
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker
+
+    Closed: calls go through and consecutive failures are counted. After
+    failure_threshold failures the circuit opens and calls are rejected until
+    the reset timeout passes. Then a single half-open probe is let through:
+    success closes the circuit, failure reopens it with the timeout doubled
+    (up to max_reset_timeout).
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0, max_reset_timeout=300.0):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(max_reset_timeout, reset_timeout)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._current_timeout = reset_timeout
+        self._probe_in_flight = False
+        self._listeners = []
+
+        self._metrics = {
+            'failures': 0,
+            'rejected': 0,
+            'times_opened': 0,
+        }
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._current_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def add_listener(self, listener):
+        """Call listener(new_state) after the circuit opens or closes"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, state):
+        for listener in list(self._listeners):
+            try:
+                listener(state)
+            except Exception:
+                pass
+
+    def allow_request(self):
+        """Whether a call may go through now; in half-open state only one probe at a time"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self._current_timeout:
+                    self._metrics['rejected'] += 1
+                    return False
+                self._state = HALF_OPEN
+            if self._probe_in_flight:
+                self._metrics['rejected'] += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            was_closed = self._state == CLOSED
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._current_timeout = self.reset_timeout
+        if not was_closed:
+            self._notify(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._metrics['failures'] += 1
+            if self._state == HALF_OPEN:
+                self._current_timeout = min(self._current_timeout * 2, self.max_reset_timeout)
+            elif self._state == OPEN or self._failures < self.failure_threshold:
+                return
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+            self._metrics['times_opened'] += 1
+        self._notify(OPEN)
+
+    def cancel(self):
+        """Give up a half-open probe that ended without reaching the dependency"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self):
+        """Get the current state, failure counts and time until the next probe"""
+        state = self.state
+        with self._lock:
+            metrics = dict(self._metrics)
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(self._current_timeout - (time.monotonic() - self._opened_at), 0.0)
+            metrics.update({
+                'state': state,
+                'consecutive_failures': self._failures,
+                'reset_timeout_seconds': self._current_timeout,
+                'retry_in_seconds': retry_in,
+            })
+        return metrics
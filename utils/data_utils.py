@@ -1,19 +1,33 @@
-import json
 import os
 import sys
+import io
 from datetime import datetime
 import pandas as pd
-
-# Import database functions
-try:
-    from utils.db_utils import (
-        save_prediction_to_db, save_parent_observation_to_db,
-        load_student_predictions, load_parent_observations, authenticate_user_db,
-        get_database_stats
-    )
-    DATABASE_AVAILABLE = True
-except ImportError:
-    DATABASE_AVAILABLE = False
+from utils.export_utils import (
+    EXPORT_FORMATS, check_download_size, clean_export_files, remove_published_exports, write_csv, write_export
+)
+from utils.file_utils import read_json, write_json_atomic, update_json, locked_file
+from utils.aggregate_utils import (
+    SCORE_COLUMNS, daily_risk_counts_from_frame, grade_averages_from_frame,
+    score_correlation_from_frame, student_names_from_frame, student_trend_from_frame
+)
+from utils.circuit_utils import CLOSED
+from utils.profiler_utils import query_profiler
+from utils.replay_utils import enqueue_writes, pending_replay_count, start_replay
+from utils.partition_utils import (
+    drop_partitions_before, migrate_legacy_file, start_retention_scheduler
+)
+from utils.stats_utils import (
+    get_stats_path, read_stats, rebuild_stats, record_partitions_dropped, record_saved,
+    record_user_added, records_saved, stats_lock, summarize_dataset
+)
+from utils.snapshot_utils import (
+    append_to_snapshot, invalidate_snapshot, read_snapshot_frame, write_snapshot
+)
+from utils.storage_utils import (
+    OBSERVATIONS_DATASET, PREDICTIONS_DATASET, JsonBackend, create_backend,
+    get_configured_backend_name
+)
 
 def get_data_directory():
     """Get the correct path for the data directory"""
@@ -28,35 +42,64 @@ def get_data_directory():
     os.makedirs(data_dir, exist_ok=True)
     return data_dir
 
+# Database backend (PostgreSQL or SQLite) chosen by STORAGE_BACKEND;
+# JSON files are the fallback whenever it is unavailable
+try:
+    _backend_name = get_configured_backend_name()
+    DATABASE_BACKEND = None if _backend_name == 'json' else create_backend(_backend_name, get_data_directory())
+except Exception as e:
+    print(f"Database backend unavailable, using JSON storage: {e}")
+    DATABASE_BACKEND = None
+DATABASE_AVAILABLE = DATABASE_BACKEND is not None
+
+# Month-partitioned datasets and the single-file stores they replaced
+LEGACY_DATA_FILES = {
+    PREDICTIONS_DATASET: 'student_data.json',
+    OBSERVATIONS_DATASET: 'parent_observations.json'
+}
+
+_migrated_datasets = set()
+
+def get_partitioned_data_directory(dataset):
+    """Get the data directory, moving any legacy single-file records into partitions first"""
+    data_dir = get_data_directory()
+    if dataset not in _migrated_datasets:
+        legacy_path = os.path.join(data_dir, LEGACY_DATA_FILES[dataset])
+        migrate_legacy_file(data_dir, dataset, legacy_path)
+        _migrated_datasets.add(dataset)
+    return data_dir
+
+def _file_backend():
+    """Get the JSON file backend, migrating legacy single-file stores on first use"""
+    get_partitioned_data_directory(PREDICTIONS_DATASET)
+    return JsonBackend(get_partitioned_data_directory(OBSERVATIONS_DATASET))
+
+def _plain_record(record):
+    """Copy of a record with NumPy scalars, as DataFrame rows hold them, turned into Python values"""
+    return {key: value.item() if hasattr(value, 'item') else value for key, value in record.items()}
+
 def save_prediction_data(prediction_record):
-    """Save prediction data to database or JSON file as fallback"""
+    """Save prediction data to database or JSON file as fallback; returns whether it was saved"""
+    prediction_record = _plain_record(prediction_record)
     # Try database first if available
     if DATABASE_AVAILABLE:
         try:
-            return save_prediction_to_db(prediction_record)
+            saved = DATABASE_BACKEND.save_prediction(prediction_record)
+            if saved:
+                _refresh_prediction_snapshot(prediction_record)
+                _update_stats(PREDICTIONS_DATASET, prediction_record)
+            return saved
         except Exception as e:
             print(f"Database error, falling back to JSON: {e}")
     
     # Fallback to JSON file storage
     try:
-        data_dir = get_data_directory()
-        file_path = os.path.join(data_dir, 'student_data.json')
-        
-        # Load existing data
-        existing_data = []
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    existing_data = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                existing_data = []
-        
-        # Add new record
-        existing_data.append(prediction_record)
-        
-        # Save updated data
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
+        # Append to the month's partition under an exclusive lock
+        with stats_lock(get_data_directory()):
+            _file_backend().save_prediction(prediction_record)
+            _update_stats(PREDICTIONS_DATASET, prediction_record)
+        _refresh_prediction_snapshot(prediction_record)
+        _queue_for_replay('prediction', [prediction_record])
         
         return True
     
@@ -64,26 +107,176 @@ def save_prediction_data(prediction_record):
         print(f"Error saving prediction data: {e}")
         return False
 
-def load_student_data():
-    """Load student prediction data from database or JSON file as fallback"""
+def save_predictions_bulk(predictions):
+    """Save a list or DataFrame of predictions in one batch
+
+    The database path resolves students and loads predictions in a single
+    transaction; the file fallback writes each monthly partition once.
+    Returns the number of predictions saved, 0 if the batch could not be
+    saved anywhere.
+    """
+    records = predictions.to_dict('records') if hasattr(predictions, 'to_dict') else list(predictions)
+    records = [_plain_record(record) for record in records]
+    if not records:
+        return 0
+    
     # Try database first if available
     if DATABASE_AVAILABLE:
         try:
-            return load_student_predictions()
+            saved = DATABASE_BACKEND.save_predictions(records)
+            if saved:
+                _refresh_prediction_snapshot(records)
+                _update_stats(PREDICTIONS_DATASET, records)
+            return saved
         except Exception as e:
             print(f"Database error, falling back to JSON: {e}")
     
     # Fallback to JSON file storage
     try:
-        data_dir = get_data_directory()
-        file_path = os.path.join(data_dir, 'student_data.json')
-        
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            return data
+        with stats_lock(get_data_directory()):
+            _file_backend().save_predictions(records)
+            _update_stats(PREDICTIONS_DATASET, records)
+        _refresh_prediction_snapshot(records)
+        _queue_for_replay('prediction', records)
+        return len(records)
+    
+    except Exception as e:
+        print(f"Error bulk saving prediction data: {e}")
+        return 0
+
+def _refresh_prediction_snapshot(prediction_records):
+    """Append saved predictions (one record or a list) to the analytics snapshot"""
+    if isinstance(prediction_records, dict):
+        prediction_records = [prediction_records]
+    data_dir = get_data_directory()
+    try:
+        # A missing snapshot is rebuilt from the full history on next read
+        append_to_snapshot(data_dir, prediction_records)
+    except Exception as e:
+        print(f"Error updating prediction snapshot, will rebuild: {e}")
+        try:
+            invalidate_snapshot(data_dir)
+        except Exception:
+            pass
+
+def _update_stats(dataset, records):
+    """Count saved records (one record or a list) in the stats manifest"""
+    data_dir = get_data_directory()
+    try:
+        if isinstance(records, dict):
+            record_saved(data_dir, dataset, records)
         else:
-            return []
+            records_saved(data_dir, dataset, records)
+    except Exception as e:
+        print(f"Error updating stats manifest, will rebuild: {e}")
+        try:
+            os.remove(get_stats_path(data_dir))
+        except OSError:
+            pass
+
+def _queue_for_replay(kind, records):
+    """Queue a local fallback write for the database, if there is one to recover"""
+    if not DATABASE_AVAILABLE:
+        return
+    try:
+        enqueue_writes(get_data_directory(), kind, records)
+    except Exception as e:
+        print(f"Error queueing write for database replay: {e}")
+
+def _replay_observations(records):
+    return all(DATABASE_BACKEND.save_observation(record) for record in records)
+
+def replay_queued_writes():
+    """Replay local fallback writes to the database in the background
+
+    Runs automatically when the database circuit closes again; returns the
+    replay thread, or None when nothing is queued.
+    """
+    if not DATABASE_AVAILABLE:
+        return None
+    data_dir = get_data_directory()
+    if not pending_replay_count(data_dir):
+        return None
+    return start_replay(data_dir, {
+        'prediction': DATABASE_BACKEND.save_predictions,
+        'observation': _replay_observations,
+    })
+
+# Backends behind a circuit breaker replay queued writes when it closes again
+if getattr(DATABASE_BACKEND, 'circuit', None) is not None:
+    DATABASE_BACKEND.circuit.add_listener(lambda state: state == CLOSED and replay_queued_writes())
+
+def load_prediction_snapshot():
+    """Load prediction history as a typed columnar DataFrame for analytics
+
+    Risk level is categorical, scores are float32 and timestamps are datetime64.
+    The frame is shared across reruns, so callers must not modify it in place.
+    """
+    try:
+        data_dir = get_data_directory()
+        frame = read_snapshot_frame(data_dir)
+        if frame is None:
+            write_snapshot(data_dir, load_student_data())
+            frame = read_snapshot_frame(data_dir)
+        return frame
+    except Exception as e:
+        print(f"Error loading prediction snapshot: {e}")
+        return pd.DataFrame()
+
+def _aggregate(method_name, frame_aggregate, default, *args):
+    """Run an aggregate as a database query, or over the cached snapshot frame for files"""
+    if DATABASE_AVAILABLE:
+        try:
+            return getattr(DATABASE_BACKEND, method_name)(*args)
+        except Exception as e:
+            print(f"Database error, falling back to JSON: {e}")
+    
+    try:
+        frame = load_prediction_snapshot()
+        if frame.empty:
+            return default
+        return frame_aggregate(frame, *args)
+    except Exception as e:
+        print(f"Error aggregating {method_name}: {e}")
+        return default
+
+def get_daily_risk_counts(start_date=None, end_date=None):
+    """Daily prediction counts per risk level as [{'date', 'risk_level', 'count'}]"""
+    return _aggregate('daily_risk_counts', daily_risk_counts_from_frame, [], start_date, end_date)
+
+def get_grade_averages():
+    """Prediction count and average scores per grade level"""
+    return _aggregate('grade_averages', grade_averages_from_frame, [])
+
+def get_score_correlation():
+    """Correlation matrix of the score columns as {'columns', 'matrix'}"""
+    return _aggregate('score_correlation', score_correlation_from_frame,
+                      {'columns': list(SCORE_COLUMNS), 'matrix': []})
+
+def get_student_trend(student_name):
+    """One student's prediction probabilities over time, oldest first"""
+    return _aggregate('student_trend', student_trend_from_frame, [], student_name)
+
+def get_student_names():
+    """Names of students with at least one prediction, sorted"""
+    return _aggregate('student_names', student_names_from_frame, [])
+
+def load_student_data(start_date=None, end_date=None):
+    """Load student prediction data from database or JSON file as fallback
+
+    start_date and end_date optionally limit results to an inclusive date range;
+    the file store then reads only the monthly partitions in that range.
+    """
+    # Try database first if available
+    if DATABASE_AVAILABLE:
+        try:
+            return DATABASE_BACKEND.load_predictions(start_date, end_date)
+        except Exception as e:
+            print(f"Database error, falling back to JSON: {e}")
+    
+    # Fallback to JSON file storage
+    try:
+        return _file_backend().load_predictions(start_date, end_date)
     
     except Exception as e:
         print(f"Error loading student data: {e}")
@@ -94,30 +287,20 @@ def save_parent_observation(observation_data):
     # Try database first if available
     if DATABASE_AVAILABLE:
         try:
-            return save_parent_observation_to_db(observation_data)
+            saved = DATABASE_BACKEND.save_observation(observation_data)
+            if saved:
+                _update_stats(OBSERVATIONS_DATASET, observation_data)
+            return saved
         except Exception as e:
             print(f"Database error, falling back to JSON: {e}")
     
     # Fallback to JSON file storage
     try:
-        data_dir = get_data_directory()
-        file_path = os.path.join(data_dir, 'parent_observations.json')
-        
-        # Load existing data
-        existing_data = []
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    existing_data = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                existing_data = []
-        
-        # Add new observation
-        existing_data.append(observation_data)
-        
-        # Save updated data
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
+        # Append to the month's partition under an exclusive lock
+        with stats_lock(get_data_directory()):
+            _file_backend().save_observation(observation_data)
+            _update_stats(OBSERVATIONS_DATASET, observation_data)
+        _queue_for_replay('observation', [observation_data])
         
         return True
     
@@ -125,83 +308,86 @@ def save_parent_observation(observation_data):
         print(f"Error saving parent observation: {e}")
         return False
 
-def load_parent_observations():
-    """Load parent observation data from database or JSON file as fallback"""
+def load_parent_observations(start_date=None, end_date=None):
+    """Load parent observation data from database or JSON file as fallback
+
+    start_date and end_date optionally limit results to an inclusive date range;
+    the file store then reads only the monthly partitions in that range.
+    """
     # Try database first if available
     if DATABASE_AVAILABLE:
         try:
-            from utils.db_utils import load_parent_observations as db_load_observations
-            return db_load_observations()
+            return DATABASE_BACKEND.load_observations(start_date, end_date)
         except Exception as e:
             print(f"Database error, falling back to JSON: {e}")
     
     # Fallback to JSON file storage
     try:
-        data_dir = get_data_directory()
-        file_path = os.path.join(data_dir, 'parent_observations.json')
-        
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if content:
-                    data = json.loads(content)
-                    # Ensure data is a list
-                    if isinstance(data, list):
-                        return data
-                    else:
-                        return []
-                else:
-                    return []
-        else:
-            # Create empty file if it doesn't exist
-            with open(file_path, 'w') as f:
-                json.dump([], f)
-            return []
+        return _file_backend().load_observations(start_date, end_date)
     
-    except (json.JSONDecodeError, UnicodeDecodeError, TypeError) as e:
-        print(f"JSON parsing error, creating new file: {e}")
-        # Create fresh file if corrupted
-        try:
-            data_dir = get_data_directory()
-            file_path = os.path.join(data_dir, 'parent_observations.json')
-            with open(file_path, 'w') as f:
-                json.dump([], f)
-        except:
-            pass
-        return []
     except Exception as e:
         print(f"Error loading parent observations: {e}")
         return []
 
+def load_parent_observations_page(limit=20, after=None, child_name=None):
+    """Load one page of parent observations, newest first
+
+    Returns (records, cursor); pass the cursor back as after for the next
+    page, it is None on the last one. A cursor from another backend, say
+    after falling back to JSON mid-way, starts over from the newest page.
+    """
+    # Try database first if available
+    if DATABASE_AVAILABLE:
+        try:
+            records, cursor = DATABASE_BACKEND.load_observations_page(
+                limit, _page_cursor(after, DATABASE_BACKEND.name), child_name
+            )
+            return records, (DATABASE_BACKEND.name, cursor) if cursor is not None else None
+        except Exception as e:
+            print(f"Database error, falling back to JSON: {e}")
+    
+    # Fallback to JSON file storage
+    try:
+        backend = _file_backend()
+        records, cursor = backend.load_observations_page(limit, _page_cursor(after, backend.name), child_name)
+        return records, (backend.name, cursor) if cursor is not None else None
+    
+    except Exception as e:
+        print(f"Error loading parent observations page: {e}")
+        return [], None
+
+def _page_cursor(after, backend_name):
+    """The backend's own cursor from a (backend name, cursor) pair, or None if it belongs to another backend"""
+    if after is None or after[0] != backend_name:
+        return None
+    return after[1]
+
 def save_user_data(user_data):
     """Save user authentication data"""
     try:
         data_dir = get_data_directory()
         file_path = os.path.join(data_dir, 'users.json')
         
-        # Load existing users
-        existing_users = []
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    existing_users = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                existing_users = []
-        
-        # Check if user already exists
-        user_exists = False
-        for i, user in enumerate(existing_users):
-            if user['username'] == user_data['username']:
-                existing_users[i] = user_data
-                user_exists = True
-                break
+        created = []
         
-        if not user_exists:
+        def upsert_user(existing_users):
+            if not isinstance(existing_users, list):
+                existing_users = []
+            
+            # Check if user already exists
+            for i, user in enumerate(existing_users):
+                if user['username'] == user_data['username']:
+                    existing_users[i] = user_data
+                    return existing_users
+            
             existing_users.append(user_data)
+            created.append(user_data['username'])
+            return existing_users
         
-        # Save updated users
-        with open(file_path, 'w') as f:
-            json.dump(existing_users, f, indent=2)
+        # Read-modify-write under an exclusive lock
+        update_json(file_path, upsert_user, [])
+        if created:
+            record_user_added(data_dir)
         
         return True
     
@@ -216,9 +402,7 @@ def load_user_data():
         file_path = os.path.join(data_dir, 'users.json')
         
         if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            return data
+            return read_json(file_path, [])
         else:
             # Create default admin user
             default_users = [
@@ -248,9 +432,12 @@ def load_user_data():
                 }
             ]
             
-            # Save default users
-            with open(file_path, 'w') as f:
-                json.dump(default_users, f, indent=2)
+            # Save default users unless another session created the file first
+            with locked_file(file_path):
+                if os.path.exists(file_path):
+                    return read_json(file_path, [])
+                write_json_atomic(file_path, default_users)
+            record_user_added(data_dir, len(default_users))
             
             return default_users
     
@@ -261,9 +448,9 @@ def load_user_data():
 def authenticate_user(username, password):
     """Authenticate user credentials using database or JSON fallback"""
     # Try database first if available
-    if DATABASE_AVAILABLE:
+    if DATABASE_AVAILABLE and DATABASE_BACKEND.stores_users:
         try:
-            return authenticate_user_db(username, password)
+            return DATABASE_BACKEND.authenticate_user(username, password)
         except Exception as e:
             print(f"Database error, falling back to JSON: {e}")
     
@@ -276,55 +463,225 @@ def authenticate_user(username, password):
     
     return None
 
+def _record_timestamp(record):
+    try:
+        return datetime.fromisoformat(record.get('timestamp', ''))
+    except (TypeError, ValueError):
+        return None
+
+def _iter_dataset(dataset, since=None, until=None):
+    """Yield records of a dataset one at a time, optionally only those with since < timestamp <= until
+
+    The database filters and streams rows itself; the file store is read one
+    monthly partition at a time, starting at since's month.
+    """
+    if DATABASE_AVAILABLE:
+        yielded = False
+        try:
+            if dataset == PREDICTIONS_DATASET:
+                records = DATABASE_BACKEND.iter_predictions(since, until)
+            else:
+                records = DATABASE_BACKEND.iter_observations(since, until)
+            for record in records:
+                yielded = True
+                yield record
+            return
+        except Exception as e:
+            if yielded:
+                raise
+            print(f"Database error, falling back to JSON: {e}")
+    
+    file_backend = _file_backend()
+    if dataset == PREDICTIONS_DATASET:
+        yield from file_backend.iter_predictions(since, until)
+    else:
+        yield from file_backend.iter_observations(since, until)
+
+def iter_student_data(since=None):
+    """Yield prediction records one at a time without loading the full history"""
+    return _iter_dataset(PREDICTIONS_DATASET, since)
+
+def iter_parent_observations(since=None):
+    """Yield parent observation records one at a time without loading the full history"""
+    return _iter_dataset(OBSERVATIONS_DATASET, since)
+
+def _scan_dataset(dataset, since=None):
+    """First export pass: collect column names in order and the newest timestamp"""
+    fieldnames = []
+    seen = set()
+    latest = None
+    for record in _iter_dataset(dataset, since):
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                fieldnames.append(key)
+        timestamp = _record_timestamp(record)
+        if timestamp is not None and (latest is None or timestamp > latest):
+            latest = timestamp
+    return fieldnames, latest
+
+def _get_export_cursor_path():
+    return os.path.join(get_data_directory(), 'export_cursors.json')
+
+def get_export_cursor(data_type):
+    """Get the timestamp of the newest record included in the last confirmed delta export"""
+    cursors = read_json(_get_export_cursor_path(), {})
+    value = cursors.get(data_type) if isinstance(cursors, dict) else None
+    return datetime.fromisoformat(value) if value else None
+
+def _record_pending_export(filename, data_type, until, keep):
+    """Remember where a delta export ends until it is confirmed; forget pending exports not in keep"""
+    def update(cursors):
+        if not isinstance(cursors, dict):
+            cursors = {}
+        pending = {name: entry for name, entry in cursors.get('pending', {}).items() if name in keep}
+        pending[filename] = {'data_type': data_type, 'until': until.isoformat()}
+        cursors['pending'] = pending
+        return cursors
+    update_json(_get_export_cursor_path(), update, {})
+
+def confirm_export(filename):
+    """Advance the delta cursor past a downloaded delta export; returns True if it moved
+
+    Until this is called the export is not recorded, so the next delta export
+    includes the same rows again.
+    """
+    moved = []
+
+    def update(cursors):
+        if not isinstance(cursors, dict):
+            return cursors
+        entry = cursors.get('pending', {}).pop(filename, None)
+        if entry is None:
+            return cursors
+        current = cursors.get(entry['data_type'])
+        if current is None or datetime.fromisoformat(entry['until']) > datetime.fromisoformat(current):
+            cursors[entry['data_type']] = entry['until']
+            moved.append(True)
+        return cursors
+
+    update_json(_get_export_cursor_path(), update, {})
+    return bool(moved)
+
+def export_data(data_type='predictions', export_format='csv', since_last_export=False, output_dir=None, since=None):
+    """Stream stored records to an export file in CSV, gzip CSV or Parquet format
+
+    since exports only records newer than that timestamp; since_last_export
+    uses the confirmed delta cursor instead. A delta export does not move the
+    cursor: call confirm_export(filename) once it has been downloaded, so an
+    abandoned download is simply exported again. Expired export files are
+    cleaned up first, and a file over the download size limit is refused.
+    Returns (file_path, filename) on success or (None, message) otherwise.
+    """
+    try:
+        datasets = {'predictions': PREDICTIONS_DATASET, 'observations': OBSERVATIONS_DATASET}
+        if data_type not in datasets:
+            return None, "Invalid data type"
+        if export_format not in EXPORT_FORMATS:
+            return None, "Invalid export format"
+        dataset = datasets[data_type]
+        
+        output_dir = output_dir or os.path.join(get_data_directory(), 'exports')
+        clean_export_files(output_dir)
+        remove_published_exports()
+        
+        if since_last_export and since is None:
+            since = get_export_cursor(data_type)
+        fieldnames, latest = _scan_dataset(dataset, since)
+        if not fieldnames:
+            return None, "No new data to export" if since is not None or since_last_export else "No data to export"
+        
+        # Delta exports stop at the newest record seen in the scan, so rows
+        # saved while writing are picked up by the next export
+        until = latest if since_last_export else None
+        rows = _iter_dataset(dataset, since, until)
+        
+        extension = EXPORT_FORMATS[export_format][0]
+        suffix = '_delta' if since_last_export or since is not None else ''
+        filename = f"{data_type}_export{suffix}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{extension}"
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir, filename)
+        
+        write_export(rows, fieldnames, file_path, export_format)
+        size_error = check_download_size(file_path)
+        if size_error:
+            os.remove(file_path)
+            return None, size_error
+        
+        if since_last_export and latest is not None:
+            _record_pending_export(filename, data_type, latest, set(os.listdir(output_dir)))
+        
+        return file_path, filename
+    
+    except Exception as e:
+        return None, f"Error exporting data: {e}"
+
 def export_data_to_csv(data_type='predictions'):
     """Export data to CSV format"""
     try:
         if data_type == 'predictions':
-            data = load_student_data()
-            df = pd.DataFrame(data)
+            dataset = PREDICTIONS_DATASET
             filename = f"predictions_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
         elif data_type == 'observations':
-            data = load_parent_observations()
-            df = pd.DataFrame(data)
+            dataset = OBSERVATIONS_DATASET
             filename = f"observations_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
         else:
             return None, "Invalid data type"
         
-        if df.empty:
+        fieldnames, _ = _scan_dataset(dataset)
+        if not fieldnames:
             return None, "No data to export"
         
-        csv_data = df.to_csv(index=False)
-        return csv_data, filename
+        # Rows go straight from storage to CSV text, without a DataFrame copy
+        buffer = io.StringIO()
+        write_csv(_iter_dataset(dataset), fieldnames, buffer)
+        return buffer.getvalue(), filename
     
     except Exception as e:
         return None, f"Error exporting data: {e}"
 
 def get_data_summary():
-    """Get summary statistics of stored data"""
+    """Get summary statistics of stored data
+
+    A database backend answers from its own counters, which every app
+    instance shares. File storage reads the incrementally maintained stats
+    manifest; the full history is only scanned once, to build the manifest
+    if it does not exist yet.
+    """
+    if DATABASE_AVAILABLE:
+        try:
+            summary = DATABASE_BACKEND.summary()
+            if summary is not None:
+                return summary
+        except Exception as e:
+            print(f"Database error, falling back to the stats manifest: {e}")
+    
     try:
-        predictions = load_student_data()
-        observations = load_parent_observations()
-        users = load_user_data()
-        
-        summary = {
-            'total_predictions': len(predictions),
-            'total_observations': len(observations),
-            'total_users': len(users),
-            'last_prediction_date': None,
-            'last_observation_date': None
-        }
-        
-        if predictions:
-            latest_prediction = max(predictions, key=lambda x: x.get('timestamp', ''))
-            summary['last_prediction_date'] = latest_prediction.get('timestamp')
+        data_dir = get_data_directory()
+        stats = read_stats(data_dir)
+        if stats is None:
+            stats = rebuild_stats(
+                data_dir,
+                {
+                    PREDICTIONS_DATASET: iter_student_data(),
+                    OBSERVATIONS_DATASET: iter_parent_observations()
+                },
+                len(load_user_data())
+            )
         
-        if observations:
-            latest_observation = max(observations, key=lambda x: x.get('timestamp', ''))
-            summary['last_observation_date'] = latest_observation.get('timestamp')
+        total_predictions, last_prediction, risk_level_counts = summarize_dataset(stats, PREDICTIONS_DATASET)
+        total_observations, last_observation, _ = summarize_dataset(stats, OBSERVATIONS_DATASET)
         
-        return summary
+        return {
+            'total_predictions': total_predictions,
+            'total_observations': total_observations,
+            'total_users': stats.get('total_users', 0),
+            'last_prediction_date': last_prediction,
+            'last_observation_date': last_observation,
+            'risk_level_counts': risk_level_counts
+        }
     
     except Exception as e:
         print(f"Error getting data summary: {e}")
@@ -333,60 +690,85 @@ def get_data_summary():
             'total_observations': 0,
             'total_users': 0,
             'last_prediction_date': None,
-            'last_observation_date': None
+            'last_observation_date': None,
+            'risk_level_counts': {}
         }
 
+_startup_replay_done = False
+
 def clean_old_data(days_old=90):
-    """Clean data older than specified days"""
+    """Drop stored data older than specified days
+
+    Retention works on whole monthly partitions: a month is deleted once it
+    ends before the cutoff, without reading or parsing its records.
+    """
     try:
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         cutoff_date = datetime.now() - timedelta(days=days_old)
         
-        # Clean predictions
-        predictions = load_student_data()
-        filtered_predictions = []
-        
-        for pred in predictions:
-            try:
-                pred_date = datetime.fromisoformat(pred.get('timestamp', ''))
-                if pred_date > cutoff_date:
-                    filtered_predictions.append(pred)
-            except ValueError:
-                # Keep records without valid timestamps
-                filtered_predictions.append(pred)
-        
-        # Clean observations
-        observations = load_parent_observations()
-        filtered_observations = []
-        
-        for obs in observations:
-            try:
-                obs_date = datetime.fromisoformat(obs.get('timestamp', ''))
-                if obs_date > cutoff_date:
-                    filtered_observations.append(obs)
-            except ValueError:
-                # Keep records without valid timestamps
-                filtered_observations.append(obs)
-        
-        # Save cleaned data
-        data_dir = get_data_directory()
+        data_dir = get_partitioned_data_directory(PREDICTIONS_DATASET)
+        get_partitioned_data_directory(OBSERVATIONS_DATASET)
         
-        with open(os.path.join(data_dir, 'student_data.json'), 'w') as f:
-            json.dump(filtered_predictions, f, indent=2)
+        removed_predictions = drop_partitions_before(data_dir, PREDICTIONS_DATASET, cutoff_date)
+        removed_observations = drop_partitions_before(data_dir, OBSERVATIONS_DATASET, cutoff_date)
         
-        with open(os.path.join(data_dir, 'parent_observations.json'), 'w') as f:
-            json.dump(filtered_observations, f, indent=2)
+        # Retention rewrites history, so the analytics snapshot starts over
+        if removed_predictions:
+            invalidate_snapshot(data_dir)
         
-        removed_predictions = len(predictions) - len(filtered_predictions)
-        removed_observations = len(observations) - len(filtered_observations)
+        # Dropped months come straight off the stats manifest's per-month tallies
+        if not DATABASE_AVAILABLE:
+            record_partitions_dropped(data_dir, PREDICTIONS_DATASET, removed_predictions)
+            record_partitions_dropped(data_dir, OBSERVATIONS_DATASET, removed_observations)
         
         return {
-            'removed_predictions': removed_predictions,
-            'removed_observations': removed_observations,
-            'remaining_predictions': len(filtered_predictions),
-            'remaining_observations': len(filtered_observations)
+            'removed_prediction_partitions': removed_predictions,
+            'removed_observation_partitions': removed_observations
         }
     
     except Exception as e:
         print(f"Error cleaning old data: {e}")
         return None
+
+def start_data_retention(days_old=90, interval_hours=24):
+    """Start the background thread that enforces data retention for this process
+
+    The first call also replays writes queued while the database was down in an
+    earlier run.
+    """
+    global _startup_replay_done
+    if not _startup_replay_done:
+        _startup_replay_done = True
+        try:
+            replay_queued_writes()
+        except Exception as e:
+            print(f"Error starting database replay: {e}")
+    return start_retention_scheduler(lambda: clean_old_data(days_old), interval_hours)
+
+def get_storage_health():
+    """Storage backend, circuit breaker, connection pool and query profile details for the admin view"""
+    health = {
+        'backend': DATABASE_BACKEND.name if DATABASE_AVAILABLE else 'json',
+        'pending_replay': 0,
+        'circuit': None,
+        'pool': None,
+        'queries': query_profiler.snapshot()
+    }
+    try:
+        health['pending_replay'] = pending_replay_count(get_data_directory())
+    except Exception as e:
+        print(f"Error reading replay queue: {e}")
+    
+    if getattr(DATABASE_BACKEND, 'circuit', None) is not None:
+        from utils.db_utils import get_circuit_stats, get_pool_stats
+        health['circuit'] = get_circuit_stats()
+        health['pool'] = get_pool_stats()
+    return health
+
+def get_query_profile_json():
+    """Query profile as JSON text, for download and regression tracking"""
+    return query_profiler.to_json()
+
+def reset_query_profile():
+    """Clear the recorded query profile"""
+    query_profiler.reset()
@@ -5,341 +5,1086 @@ Direct database operations without SQLAlchemy complexity
 
 import os
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+import psycopg2.extras
+import io
 import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, date
 import logging
+from utils.aggregate_utils import SCORE_COLUMNS, correlation_from_sums, correlation_sums_sql
+from utils.circuit_utils import CircuitBreaker
+from utils.migration_utils import apply_migrations
+from utils.profiler_utils import query_label, query_profiler
 
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
-    """Get PostgreSQL database connection"""
-    try:
-        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+# Pool sizing and checkout behaviour, configurable through the environment
+POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+POOL_TIMEOUT_SECONDS = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+# Connections idle longer than this are pinged with SELECT 1 before reuse
+POOL_HEALTHCHECK_IDLE_SECONDS = float(os.environ.get('DB_POOL_HEALTHCHECK_IDLE', '30'))
+# Student name -> id entries kept in the in-process identity cache
+STUDENT_ID_CACHE_SIZE = int(os.environ.get('STUDENT_ID_CACHE_SIZE', '4096'))
+
+# Seconds to wait for a new server connection before treating the database as down
+CONNECT_TIMEOUT_SECONDS = int(os.environ.get('DB_CONNECT_TIMEOUT', '5'))
+
+# Circuit breaker: consecutive failures before opening, and probe backoff in seconds
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('DB_CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_RESET_SECONDS = float(os.environ.get('DB_CIRCUIT_RESET', '15'))
+CIRCUIT_MAX_RESET_SECONDS = float(os.environ.get('DB_CIRCUIT_MAX_RESET', '300'))
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the timeout"""
+
+class DatabaseUnavailableError(Exception):
+    """Raised when the database cannot be reached or its circuit is open"""
+
+class ProfilingCursor(psycopg2.extensions.cursor):
+    """Cursor that records each statement's wall time and row count in the query profiler
+
+    Named (server-side) cursors do their work when rows are fetched, so for
+    them the time spent in execute and in every fetch, and the rows fetched,
+    are recorded as one call when the cursor is closed.
+    """
+
+    # [label, seconds, rows] of a named cursor's statement until it is closed
+    _stream = None
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - started
+            if self.name is None:
+                query_profiler.record(query_label(query), elapsed, self.rowcount)
+            else:
+                self._stream = [query_label(query), elapsed, 0]
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            query_profiler.record(query_label(sql), time.perf_counter() - started, self.rowcount)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._stream is not None:
+            self._stream[1] += time.perf_counter() - started
+            self._stream[2] += len(result) if isinstance(result, list) else int(result is not None)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, *(() if size is None else (size,)))
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def __iter__(self):
+        if self.name is None:
+            return super().__iter__()
+        return self._iter_batches()
+
+    def _iter_batches(self):
+        """Iterate a named cursor itersize rows per fetch, like psycopg2 does, but timed"""
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        try:
+            return super().close()
+        finally:
+            stream, self._stream = self._stream, None
+            if stream is not None:
+                query_profiler.record(*stream)
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection with profiled cursors that remembers which statements it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = ProfilingCursor
+        self.prepared_statements = set()
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with blocking checkout and metrics"""
+
+    def __init__(self, dsn, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 timeout=POOL_TIMEOUT_SECONDS, healthcheck_idle=POOL_HEALTHCHECK_IDLE_SECONDS):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._in_use = 0
+
+        self._metrics = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'connections_opened': 0,
+            'connections_discarded': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
+
+        for _ in range(self.min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def _open(self):
+        conn = psycopg2.connect(
+            self.dsn, connect_timeout=CONNECT_TIMEOUT_SECONDS, connection_factory=PooledConnection
+        )
+        with self._lock:
+            self._metrics['connections_opened'] += 1
         return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._metrics['connections_discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, last_used):
+        """Cheap checks always; a SELECT 1 round trip only after a long idle period"""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.healthcheck_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to the pool timeout for a free slot"""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._metrics['timeouts'] += 1
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+
+        waited = time.monotonic() - started
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    candidate = self._idle.pop() if self._idle else None
+                if candidate is None:
+                    conn = self._open()
+                elif self._is_healthy(*candidate):
+                    conn = candidate[0]
+                else:
+                    self._discard(candidate[0])
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._metrics['checkouts'] += 1
+            self._metrics['total_wait_seconds'] += waited
+            self._metrics['max_wait_seconds'] = max(self._metrics['max_wait_seconds'], waited)
+        return conn
+
+    def putconn(self, conn, broken=False):
+        """Return a connection to the pool, resetting any open transaction"""
+        try:
+            if not broken and not conn.closed:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            else:
+                broken = True
+        except Exception:
+            broken = True
+
+        if broken:
+            self._discard(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def closeall(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Snapshot of pool size, utilization and checkout wait metrics"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            in_use = self._in_use
+            idle = len(self._idle)
+        checkouts = metrics['checkouts']
+        metrics.update({
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'in_use': in_use,
+            'idle': idle,
+            'utilization': in_use / self.max_size,
+            'avg_wait_ms': (metrics['total_wait_seconds'] / checkouts * 1000) if checkouts else 0.0,
+            'max_wait_ms': metrics['max_wait_seconds'] * 1000,
+        })
+        return metrics
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """Get the process-wide connection pool, creating it and migrating the schema on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(os.environ['DATABASE_URL'])
+                _migrate_schema(pool)
+                _pool = pool
+    return _pool
+
+def _migrate_schema(pool):
+    """Bring the schema up to date; failures are logged and retried by the next process"""
+    conn = pool.getconn()
+    try:
+        applied = apply_migrations(conn)
+        if applied:
+            logger.info(f"Database schema migrated to version {applied[-1]}")
     except Exception as e:
-        logger.error(f"Database connection error: {e}")
-        return None
+        logger.error(f"Error migrating database schema: {e}")
+    finally:
+        pool.putconn(conn)
 
-def save_prediction_to_db(prediction_data):
-    """Save prediction data to PostgreSQL database"""
-    conn = get_db_connection()
-    if not conn:
-        return False
+database_circuit = CircuitBreaker(
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, CIRCUIT_MAX_RESET_SECONDS
+)
+
+def _is_connection_error(conn, error):
+    """Whether an error means the server is unreachable rather than a bad query"""
+    if conn.closed or isinstance(error, psycopg2.InterfaceError):
+        return True
+    return (isinstance(error, psycopg2.OperationalError)
+            and not isinstance(error, psycopg2.extensions.QueryCanceledError))
+
+@contextmanager
+def db_connection():
+    """Check out a pooled connection for the duration of the block
+
+    Any transaction left open by an exception is rolled back before the
+    connection goes back to the pool. Connection failures feed the circuit
+    breaker and surface as DatabaseUnavailableError; while the circuit is
+    open, or no pooled connection frees up in time, the block is not
+    entered at all.
+    """
+    if not database_circuit.allow_request():
+        raise DatabaseUnavailableError("Database circuit is open")
+    try:
+        pool = get_connection_pool()
+        conn = pool.getconn()
+    except PoolTimeoutError as e:
+        # A busy pool is not an outage: fall back without counting a failure
+        database_circuit.cancel()
+        raise DatabaseUnavailableError(str(e)) from e
+    except Exception as e:
+        database_circuit.record_failure()
+        raise DatabaseUnavailableError(f"Could not connect to database: {e}") from e
     
+    broken = False
+    connection_lost = False
     try:
-        cur = conn.cursor()
-        
-        # Get or create student
-        student_name = prediction_data.get('student_name', 'Unknown Student')
-        grade_level = prediction_data.get('grade_level', 'Unknown')
-        
-        cur.execute(
-            "SELECT id FROM students WHERE name = %s",
-            (student_name,)
-        )
-        student_record = cur.fetchone()
-        
-        if student_record:
-            student_id = student_record[0]
+        yield conn
+    except Exception as e:
+        connection_lost = _is_connection_error(conn, e)
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+        if connection_lost:
+            raise DatabaseUnavailableError(f"Database connection lost: {e}") from e
+        raise
+    finally:
+        pool.putconn(conn, broken=broken or connection_lost or conn.closed)
+        if connection_lost:
+            database_circuit.record_failure()
         else:
-            cur.execute(
-                "INSERT INTO students (name, grade_level) VALUES (%s, %s) RETURNING id",
-                (student_name, grade_level)
-            )
-            student_id = cur.fetchone()[0]
-        
-        # Insert prediction
-        cur.execute("""
-            INSERT INTO predictions (
-                student_id, math_score, reading_score, writing_score, 
-                attendance, behavior, literacy, prediction, probability, 
-                risk_level, notes, timestamp
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            student_id,
-            prediction_data.get('math_score'),
-            prediction_data.get('reading_score'),
-            prediction_data.get('writing_score'),
-            prediction_data.get('attendance'),
-            prediction_data.get('behavior'),
-            prediction_data.get('literacy'),
-            prediction_data.get('prediction'),
-            prediction_data.get('probability'),
-            prediction_data.get('risk_level'),
-            prediction_data.get('notes', ''),
-            datetime.fromisoformat(prediction_data.get('timestamp', datetime.now().isoformat()))
-        ))
-        
-        conn.commit()
-        logger.info(f"Prediction saved for student: {student_name}")
-        return True
+            database_circuit.record_success()
+
+def get_circuit_stats():
+    """Get the database circuit breaker state and counters"""
+    return database_circuit.stats()
+
+def get_query_profile():
+    """Get per-query call counts, rows and latency percentiles, slowest total first"""
+    return query_profiler.snapshot()
+
+def dump_query_profile(file_path):
+    """Write the query profile to a JSON file for regression tracking"""
+    return query_profiler.dump_json(file_path)
+
+def get_pool_stats():
+    """Get connection pool metrics, or None before the pool is created"""
+    return _pool.stats() if _pool is not None else None
+
+class StudentIdCache:
+    """Thread-safe LRU cache from student name to students.id"""
+
+    def __init__(self, max_size=STUDENT_ID_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            student_id = self._entries.get(name)
+            if student_id is not None:
+                self._entries.move_to_end(name)
+            return student_id
+
+    def put(self, name, student_id):
+        with self._lock:
+            self._entries[name] = student_id
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_student_ids = StudentIdCache()
+
+# Hot statements, prepared once per pooled connection so the server parses and plans them once
+PREPARED_STATEMENTS = {
+    'eduscan_student_upsert': """
+        WITH inserted AS (
+            INSERT INTO students (name, grade_level) VALUES ($1, $2)
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id
+        )
+        SELECT id FROM inserted
+        UNION ALL
+        SELECT id FROM students WHERE name = $1
+        LIMIT 1
+    """,
+    'eduscan_student_lookup': "SELECT id FROM students WHERE name = $1",
+    'eduscan_student_insert': "INSERT INTO students (name, grade_level) VALUES ($1, $2) RETURNING id",
+    'eduscan_prediction_insert': """
+        INSERT INTO predictions (
+            student_id, math_score, reading_score, writing_score,
+            attendance, behavior, literacy, prediction, probability,
+            risk_level, notes, timestamp
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+    """,
+    'eduscan_observation_insert': """
+        INSERT INTO parent_observations (
+            student_id, child_name, date, homework_completion, reading_time,
+            focus_level, subjects_struggled, behavior_rating, mood_rating,
+            sleep_hours, energy_level, social_interactions, learning_wins,
+            challenges_faced, strategies_used, screen_time, physical_activity,
+            medication_taken, special_events, timestamp
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20)
+    """,
+    'eduscan_authenticate': """
+        SELECT id, username, user_type, full_name, email, created_date
+        FROM users WHERE username = $1 AND password = $2
+    """,
+}
+
+def _execute_prepared(cur, name, params):
+    """Execute one of PREPARED_STATEMENTS, preparing it on first use by this connection
+
+    Prepared statements are session state and survive rollbacks, so each
+    pooled connection prepares a statement at most once.
+    """
+    conn = cur.connection
+    prepared = getattr(conn, 'prepared_statements', None)
+    if prepared is None or name not in prepared:
+        cur.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+        if prepared is not None:
+            prepared.add(name)
+    placeholders = ', '.join(['%s'] * len(params))
+    try:
+        cur.execute(f"EXECUTE {name} ({placeholders})", params)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # The session lost its statements (e.g. DISCARD ALL); prepare again next time
+        if prepared is not None:
+            prepared.clear()
+        raise
+    rows = cur.fetchall() if cur.description else None
+    if prepared is None:
+        # Unpooled connection: nothing remembers the statement, so drop it
+        cur.execute(f"DEALLOCATE {name}")
+    return rows
+
+# Whether the unique index that ON CONFLICT (name) relies on is in place;
+# migration 2 creates it unless existing duplicate names prevent it
+_student_identity_index_ready = None
+
+STUDENT_IDENTITY_INDEX_QUERY = """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'students'::regclass AND i.indisunique AND i.indnatts = 1 AND a.attname = 'name'
+    )
+"""
+
+def _has_student_identity_index(cur):
+    """Check once per process whether students.name is unique
+
+    Without the index, saves use the SELECT-then-INSERT path.
+    """
+    global _student_identity_index_ready
+    if _student_identity_index_ready is None:
+        cur.execute(STUDENT_IDENTITY_INDEX_QUERY)
+        _student_identity_index_ready = cur.fetchone()[0]
+    return _student_identity_index_ready
+
+def _get_or_create_student_id(cur, name, grade_level):
+    """Resolve a student id from the cache, or with a single upsert statement
+
+    Returns (student_id, cached). Newly resolved ids must only be cached
+    after the surrounding transaction commits.
+    """
+    student_id = _student_ids.get(name)
+    if student_id is not None:
+        return student_id, True
+
+    if _has_student_identity_index(cur):
+        rows = _execute_prepared(cur, 'eduscan_student_upsert', (name, grade_level))
+        if not rows:
+            # A concurrent insert committed after this statement's snapshot
+            rows = _execute_prepared(cur, 'eduscan_student_lookup', (name,))
+        return rows[0][0], False
+
+    rows = _execute_prepared(cur, 'eduscan_student_lookup', (name,))
+    if rows:
+        return rows[0][0], False
+    rows = _execute_prepared(cur, 'eduscan_student_insert', (name, grade_level))
+    return rows[0][0], False
+
+def save_prediction_to_db(prediction_data):
+    """Save prediction data to PostgreSQL database"""
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Get or create student
+            student_name = prediction_data.get('student_name', 'Unknown Student')
+            grade_level = prediction_data.get('grade_level', 'Unknown')
+            student_id, cached = _get_or_create_student_id(cur, student_name, grade_level)
+            
+            # Insert prediction
+            _execute_prepared(cur, 'eduscan_prediction_insert', (
+                student_id,
+                prediction_data.get('math_score'),
+                prediction_data.get('reading_score'),
+                prediction_data.get('writing_score'),
+                prediction_data.get('attendance'),
+                prediction_data.get('behavior'),
+                prediction_data.get('literacy'),
+                prediction_data.get('prediction'),
+                prediction_data.get('probability'),
+                prediction_data.get('risk_level'),
+                prediction_data.get('notes', ''),
+                datetime.fromisoformat(prediction_data.get('timestamp', datetime.now().isoformat()))
+            ))
+            
+            conn.commit()
+            if not cached:
+                _student_ids.put(student_name, student_id)
+            logger.info(f"Prediction saved for student: {student_name}")
+            return True
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error saving prediction: {e}")
         return False
-    finally:
-        conn.close()
 
 def save_parent_observation_to_db(observation_data):
     """Save parent observation to PostgreSQL database"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
     try:
-        cur = conn.cursor()
-        
-        # Get or create student
-        child_name = observation_data.get('child_name', 'Unknown Child')
-        
-        cur.execute(
-            "SELECT id FROM students WHERE name = %s",
-            (child_name,)
-        )
-        student_record = cur.fetchone()
-        
-        if student_record:
-            student_id = student_record[0]
-        else:
-            cur.execute(
-                "INSERT INTO students (name, grade_level) VALUES (%s, %s) RETURNING id",
-                (child_name, 'Unknown')
-            )
-            student_id = cur.fetchone()[0]
-        
-        # Convert subjects_struggled list to JSON string
-        subjects_struggled = observation_data.get('subjects_struggled', [])
-        if isinstance(subjects_struggled, list):
-            subjects_struggled = json.dumps(subjects_struggled)
-        
-        # Insert observation
-        cur.execute("""
-            INSERT INTO parent_observations (
-                student_id, child_name, date, homework_completion, reading_time,
-                focus_level, subjects_struggled, behavior_rating, mood_rating,
-                sleep_hours, energy_level, social_interactions, learning_wins,
-                challenges_faced, strategies_used, screen_time, physical_activity,
-                medication_taken, special_events, timestamp
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            student_id,
-            child_name,
-            datetime.fromisoformat(observation_data.get('date', date.today().isoformat())),
-            observation_data.get('homework_completion'),
-            observation_data.get('reading_time'),
-            observation_data.get('focus_level'),
-            subjects_struggled,
-            observation_data.get('behavior_rating'),
-            observation_data.get('mood_rating'),
-            observation_data.get('sleep_hours'),
-            observation_data.get('energy_level'),
-            observation_data.get('social_interactions', ''),
-            observation_data.get('learning_wins', ''),
-            observation_data.get('challenges_faced', ''),
-            observation_data.get('strategies_used', ''),
-            observation_data.get('screen_time'),
-            observation_data.get('physical_activity'),
-            observation_data.get('medication_taken', False),
-            observation_data.get('special_events', ''),
-            datetime.fromisoformat(observation_data.get('timestamp', datetime.now().isoformat()))
-        ))
-        
-        conn.commit()
-        logger.info(f"Parent observation saved for: {child_name}")
-        return True
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Get or create student
+            child_name = observation_data.get('child_name', 'Unknown Child')
+            student_id, cached = _get_or_create_student_id(cur, child_name, 'Unknown')
+            
+            # Convert subjects_struggled list to JSON string
+            subjects_struggled = observation_data.get('subjects_struggled', [])
+            if isinstance(subjects_struggled, list):
+                subjects_struggled = json.dumps(subjects_struggled)
+            
+            # Insert observation
+            _execute_prepared(cur, 'eduscan_observation_insert', (
+                student_id,
+                child_name,
+                datetime.fromisoformat(observation_data.get('date', date.today().isoformat())),
+                observation_data.get('homework_completion'),
+                observation_data.get('reading_time'),
+                observation_data.get('focus_level'),
+                subjects_struggled,
+                observation_data.get('behavior_rating'),
+                observation_data.get('mood_rating'),
+                observation_data.get('sleep_hours'),
+                observation_data.get('energy_level'),
+                observation_data.get('social_interactions', ''),
+                observation_data.get('learning_wins', ''),
+                observation_data.get('challenges_faced', ''),
+                observation_data.get('strategies_used', ''),
+                observation_data.get('screen_time'),
+                observation_data.get('physical_activity'),
+                observation_data.get('medication_taken', False),
+                observation_data.get('special_events', ''),
+                datetime.fromisoformat(observation_data.get('timestamp', datetime.now().isoformat()))
+            ))
+            
+            conn.commit()
+            if not cached:
+                _student_ids.put(child_name, student_id)
+            logger.info(f"Parent observation saved for: {child_name}")
+            return True
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error saving parent observation: {e}")
         return False
-    finally:
-        conn.close()
 
-def load_student_predictions():
-    """Load all student prediction data from database"""
-    conn = get_db_connection()
-    if not conn:
-        return []
+# Prediction columns written by the bulk loader, in COPY order
+PREDICTION_COPY_COLUMNS = [
+    'student_id', 'math_score', 'reading_score', 'writing_score',
+    'attendance', 'behavior', 'literacy', 'prediction', 'probability',
+    'risk_level', 'notes', 'timestamp'
+]
+
+def _copy_value(value):
+    """Render a value for COPY text format: NULL for None/NaN, escaped text otherwise"""
+    if value is None or (isinstance(value, float) and value != value):
+        return '\\N'
+    text = value.isoformat() if isinstance(value, (datetime, date)) else str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+def _records_from_input(predictions):
+    """Accept a list of prediction dicts or a DataFrame"""
+    if hasattr(predictions, 'to_dict'):
+        return predictions.to_dict('records')
+    return list(predictions)
+
+def save_predictions_bulk_to_db(predictions):
+    """Save many predictions in one transaction
+
+    Students are resolved and created with set-based statements and the
+    predictions are streamed in with COPY FROM STDIN. Returns the number of
+    predictions saved, or 0 on failure.
+    """
+    records = _records_from_input(predictions)
+    if not records:
+        return 0
     
     try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Known students come from the identity cache; the rest are
+            # resolved or created with two set-based statements
+            students = {}
+            for record in records:
+                name = record.get('student_name') or 'Unknown Student'
+                students.setdefault(name, record.get('grade_level') or 'Unknown')
+            
+            student_ids = {}
+            for name in students:
+                student_id = _student_ids.get(name)
+                if student_id is not None:
+                    student_ids[name] = student_id
+            missing = {name: grade for name, grade in students.items() if name not in student_ids}
+            
+            resolved = {}
+            if missing:
+                if _has_student_identity_index(cur):
+                    insert_sql = """
+                        INSERT INTO students (name, grade_level) VALUES %s
+                        ON CONFLICT (name) DO NOTHING
+                    """
+                else:
+                    insert_sql = """
+                        INSERT INTO students (name, grade_level)
+                        SELECT v.name, v.grade_level
+                        FROM (VALUES %s) AS v(name, grade_level)
+                        WHERE NOT EXISTS (SELECT 1 FROM students s WHERE s.name = v.name)
+                    """
+                psycopg2.extras.execute_values(cur, insert_sql, list(missing.items()), page_size=1000)
+                
+                cur.execute(
+                    "SELECT name, MIN(id) FROM students WHERE name = ANY(%s) GROUP BY name",
+                    (list(missing.keys()),)
+                )
+                resolved = dict(cur.fetchall())
+                student_ids.update(resolved)
+            
+            # Stream the predictions in COPY text format
+            buffer = io.StringIO()
+            now = datetime.now().isoformat()
+            for record in records:
+                buffer.write('\t'.join(_copy_value(value) for value in [
+                    student_ids[record.get('student_name') or 'Unknown Student'],
+                    record.get('math_score'),
+                    record.get('reading_score'),
+                    record.get('writing_score'),
+                    record.get('attendance'),
+                    record.get('behavior'),
+                    record.get('literacy'),
+                    record.get('prediction'),
+                    record.get('probability'),
+                    record.get('risk_level'),
+                    record.get('notes', ''),
+                    record.get('timestamp') or now
+                ]) + '\n')
+            buffer.seek(0)
+            
+            cur.copy_expert(
+                f"COPY predictions ({', '.join(PREDICTION_COPY_COLUMNS)}) FROM STDIN",
+                buffer
+            )
+            
+            conn.commit()
+            for name, student_id in resolved.items():
+                _student_ids.put(name, student_id)
+            logger.info(f"Bulk saved {len(records)} predictions for {len(students)} students")
+            return len(records)
+    
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk saving predictions: {e}")
+        return 0
+
+# Rows fetched per network round trip by server-side cursors
+CURSOR_ITERSIZE = int(os.environ.get('DB_CURSOR_ITERSIZE', '2000'))
+
+PREDICTION_SELECT = """
+    SELECT p.id, p.math_score, p.reading_score, p.writing_score,
+           p.attendance, p.behavior, p.literacy, p.prediction, p.probability,
+           p.risk_level, p.notes, p.timestamp, s.name, s.grade_level
+    FROM predictions p
+    JOIN students s ON p.student_id = s.id
+"""
+
+OBSERVATION_SELECT = """
+    SELECT po.id, po.child_name, po.date, po.homework_completion, po.reading_time,
+           po.focus_level, po.subjects_struggled, po.behavior_rating, po.mood_rating,
+           po.sleep_hours, po.energy_level, po.social_interactions, po.learning_wins,
+           po.challenges_faced, po.strategies_used, po.screen_time, po.physical_activity,
+           po.medication_taken, po.special_events, po.timestamp
+    FROM parent_observations po
+    JOIN students s ON po.student_id = s.id
+"""
+
+def _prediction_row_to_dict(row):
+    return {
+        'id': row[0],
+        'math_score': row[1],
+        'reading_score': row[2],
+        'writing_score': row[3],
+        'attendance': row[4],
+        'behavior': row[5],
+        'literacy': row[6],
+        'prediction': row[7],
+        'probability': row[8],
+        'risk_level': row[9],
+        'notes': row[10],
+        'timestamp': row[11].isoformat(),
+        'student_name': row[12],
+        'grade_level': row[13]
+    }
+
+def _observation_row_to_dict(row):
+    # Parse subjects_struggled back to list
+    subjects_struggled = row[6] or '[]'
+    try:
+        subjects_struggled = json.loads(subjects_struggled)
+    except json.JSONDecodeError:
+        subjects_struggled = []
+
+    return {
+        'id': row[0],
+        'child_name': row[1],
+        'date': row[2].isoformat(),
+        'homework_completion': row[3],
+        'reading_time': row[4],
+        'focus_level': row[5],
+        'subjects_struggled': subjects_struggled,
+        'behavior_rating': row[7],
+        'mood_rating': row[8],
+        'sleep_hours': row[9],
+        'energy_level': row[10],
+        'social_interactions': row[11],
+        'learning_wins': row[12],
+        'challenges_faced': row[13],
+        'strategies_used': row[14],
+        'screen_time': row[15],
+        'physical_activity': row[16],
+        'medication_taken': row[17],
+        'special_events': row[18],
+        'timestamp': row[19].isoformat()
+    }
+
+def _build_filters(alias, name_column, start_date=None, end_date=None, since=None,
+                   until=None, name=None):
+    """Build a WHERE clause and parameters for the common history filters
+
+    start_date/end_date are inclusive dates, since is an exclusive timestamp
+    and until an inclusive one.
+    """
+    clauses = []
+    params = []
+    if start_date is not None:
+        clauses.append(f"{alias}.timestamp >= %s")
+        params.append(datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        clauses.append(f"{alias}.timestamp < %s::date + 1")
+        params.append(end_date)
+    if since is not None:
+        clauses.append(f"{alias}.timestamp > %s")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{alias}.timestamp <= %s")
+        params.append(until)
+    if name is not None:
+        clauses.append(f"{name_column} = %s")
+        params.append(name)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+def _stream_rows(query, params, itersize):
+    """Yield rows from a named (server-side) cursor, itersize rows per round trip"""
+    with db_connection() as conn:
+        with conn.cursor(name=f"eduscan_stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = itersize
+            cur.execute(query, params)
+            for row in cur:
+                yield row
+        conn.commit()
+
+def _prediction_history_query(start_date=None, end_date=None, since=None, until=None, student_name=None):
+    """(query, params) of the prediction history loaders, newest first"""
+    where, params = _build_filters('p', 's.name', start_date, end_date, since, until, student_name)
+    return f"{PREDICTION_SELECT} {where} ORDER BY p.timestamp DESC, p.id DESC", params
+
+def _observation_history_query(start_date=None, end_date=None, since=None, until=None, child_name=None):
+    """(query, params) of the parent observation history loaders, newest first"""
+    where, params = _build_filters('po', 'po.child_name', start_date, end_date, since, until, child_name)
+    return f"{OBSERVATION_SELECT} {where} ORDER BY po.timestamp DESC, po.id DESC", params
+
+def iter_student_predictions(start_date=None, end_date=None, since=None, until=None,
+                             student_name=None, itersize=CURSOR_ITERSIZE):
+    """Stream prediction dicts, newest first, through a server-side cursor
+
+    Only rows matching the filters leave the database, and at most itersize
+    rows are held in memory at a time.
+    """
+    query, params = _prediction_history_query(start_date, end_date, since, until, student_name)
+    for row in _stream_rows(query, params, itersize):
+        yield _prediction_row_to_dict(row)
+
+def iter_parent_observations(start_date=None, end_date=None, since=None, until=None,
+                             child_name=None, itersize=CURSOR_ITERSIZE):
+    """Stream parent observation dicts, newest first, through a server-side cursor"""
+    query, params = _observation_history_query(start_date, end_date, since, until, child_name)
+    for row in _stream_rows(query, params, itersize):
+        yield _observation_row_to_dict(row)
+
+def _page_query(select, alias, limit, after=None, name_column=None, name=None):
+    """(query, params) of one keyset page over (timestamp, id), newest first, plus one lookahead row"""
+    clauses = []
+    params = []
+    if after is not None:
+        clauses.append(f"({alias}.timestamp, {alias}.id) < (%s, %s)")
+        params.extend(after)
+    if name is not None:
+        clauses.append(f"{name_column} = %s")
+        params.append(name)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"{select} {where} ORDER BY {alias}.timestamp DESC, {alias}.id DESC LIMIT %s", params + [limit + 1]
+
+def _load_page(select, alias, row_to_dict, limit, after, name_column=None, name=None):
+    """Keyset pagination over (timestamp, id), newest first
+
+    after is the (timestamp, id) cursor returned with the previous page.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    with db_connection() as conn:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT p.*, s.name, s.grade_level 
-            FROM predictions p 
-            JOIN students s ON p.student_id = s.id 
-            ORDER BY p.timestamp DESC
-        """)
-        
-        predictions = []
-        for row in cur.fetchall():
-            prediction_dict = {
-                'id': row[0],
-                'math_score': row[2],
-                'reading_score': row[3],
-                'writing_score': row[4],
-                'attendance': row[5],
-                'behavior': row[6],
-                'literacy': row[7],
-                'prediction': row[8],
-                'probability': row[9],
-                'risk_level': row[10],
-                'notes': row[11],
-                'timestamp': row[12].isoformat(),
-                'student_name': row[13],
-                'grade_level': row[14]
-            }
-            predictions.append(prediction_dict)
-        
-        return predictions
-        
+        cur.execute(*_page_query(select, alias, limit, after, name_column, name))
+        rows = cur.fetchall()
+    return _page_from_rows(rows, row_to_dict, limit)
+
+def _page_from_rows(rows, row_to_dict, limit):
+    """Split _page_query's rows into (records, next_cursor)"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    records = [row_to_dict(row) for row in rows]
+    next_cursor = None
+    if has_more and records:
+        last = records[-1]
+        next_cursor = (datetime.fromisoformat(last['timestamp']), last['id'])
+    return records, next_cursor
+
+def load_parent_observations_page(limit=50, after=None, child_name=None):
+    """Load one page of parent observations for UI tables using keyset pagination"""
+    try:
+        return _load_page(OBSERVATION_SELECT, 'po', _observation_row_to_dict, limit, after, 'po.child_name', child_name)
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading observations page: {e}")
+        return [], None
+
+def load_student_predictions(start_date=None, end_date=None, since=None, until=None, student_name=None):
+    """Load student prediction data from database, optionally filtered"""
+    try:
+        return list(iter_student_predictions(start_date, end_date, since, until, student_name))
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Error loading predictions: {e}")
         return []
-    finally:
-        conn.close()
 
-def load_parent_observations():
-    """Load all parent observation data from database"""
-    conn = get_db_connection()
-    if not conn:
+def load_parent_observations(start_date=None, end_date=None, since=None, until=None, child_name=None):
+    """Load parent observation data from database, optionally filtered"""
+    try:
+        return list(iter_parent_observations(start_date, end_date, since, until, child_name))
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading observations: {e}")
         return []
+
+def _daily_risk_counts_query(start_date=None, end_date=None):
+    where, params = _build_filters('p', None, start_date, end_date)
+    where = f"{where} AND" if where else "WHERE"
+    return f"""
+        SELECT p.timestamp::date, p.risk_level, COUNT(*)
+        FROM predictions p
+        {where} p.risk_level IS NOT NULL AND p.risk_level <> ''
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """, params
+
+def get_daily_risk_counts_db(start_date=None, end_date=None):
+    """Count predictions per day and risk level with a GROUP BY in the database"""
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(*_daily_risk_counts_query(start_date, end_date))
+            return [
+                {'date': day.isoformat(), 'risk_level': risk_level, 'count': count}
+                for day, risk_level, count in cur.fetchall()
+            ]
     
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating daily risk counts: {e}")
+        return []
+
+def _grade_averages_query(columns=SCORE_COLUMNS):
+    return f"""
+        SELECT s.grade_level, COUNT(*), {', '.join(f'AVG(p.{column})' for column in columns)}
+        FROM predictions p
+        JOIN students s ON p.student_id = s.id
+        GROUP BY s.grade_level
+        ORDER BY s.grade_level
+    """
+
+def _grade_average_row_to_dict(row, columns=SCORE_COLUMNS):
+    record = {'grade_level': row[0], 'count': row[1]}
+    for column, value in zip(columns, row[2:]):
+        record[column] = None if value is None else float(value)
+    return record
+
+def get_grade_averages_db(columns=SCORE_COLUMNS):
+    """Average scores per grade level with a GROUP BY in the database"""
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT po.*, s.name 
-            FROM parent_observations po 
-            JOIN students s ON po.student_id = s.id 
-            ORDER BY po.timestamp DESC
-        """)
-        
-        observations = []
-        for row in cur.fetchall():
-            # Parse subjects_struggled back to list
-            subjects_struggled = row[8] or '[]'
-            try:
-                subjects_struggled = json.loads(subjects_struggled)
-            except json.JSONDecodeError:
-                subjects_struggled = []
-            
-            observation_dict = {
-                'id': row[0],
-                'child_name': row[2],
-                'date': row[3].isoformat(),
-                'homework_completion': row[4],
-                'reading_time': row[5],
-                'focus_level': row[6],
-                'subjects_struggled': subjects_struggled,
-                'behavior_rating': row[9],
-                'mood_rating': row[10],
-                'sleep_hours': row[11],
-                'energy_level': row[12],
-                'social_interactions': row[13],
-                'learning_wins': row[14],
-                'challenges_faced': row[15],
-                'strategies_used': row[16],
-                'screen_time': row[17],
-                'physical_activity': row[18],
-                'medication_taken': row[19],
-                'special_events': row[20],
-                'timestamp': row[21].isoformat()
-            }
-            observations.append(observation_dict)
-        
-        return observations
-        
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(_grade_averages_query(columns))
+            return [_grade_average_row_to_dict(row, columns) for row in cur.fetchall()]
+    
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Error loading observations: {e}")
+        logger.error(f"Error aggregating grade averages: {e}")
+        return []
+
+def get_score_correlation_db(columns=SCORE_COLUMNS):
+    """Pearson correlations between score columns from one pass of SQL sums"""
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT {', '.join(correlation_sums_sql(columns, 'p'))} FROM predictions p")
+            return correlation_from_sums(columns, cur.fetchone())
+    
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating score correlation: {e}")
+        return {'columns': list(columns), 'matrix': []}
+
+def get_student_trend_db(student_name):
+    """One student's prediction timestamps, probabilities and risk levels, oldest first"""
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT p.timestamp, p.probability, p.risk_level
+                FROM predictions p
+                JOIN students s ON p.student_id = s.id
+                WHERE s.name = %s
+                ORDER BY p.timestamp, p.id
+            """, (student_name,))
+            return [
+                {'timestamp': timestamp.isoformat(), 'probability': probability, 'risk_level': risk_level}
+                for timestamp, probability, risk_level in cur.fetchall()
+            ]
+    
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading student trend: {e}")
+        return []
+
+def get_student_names_db():
+    """Names of students that have at least one prediction, sorted"""
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT s.name
+                FROM students s
+                WHERE EXISTS (SELECT 1 FROM predictions p WHERE p.student_id = s.id)
+                ORDER BY s.name
+            """)
+            return [row[0] for row in cur.fetchall()]
+    
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading student names: {e}")
         return []
-    finally:
-        conn.close()
 
 def authenticate_user_db(username, password):
     """Authenticate user against database"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
     try:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, username, user_type, full_name, email, created_date FROM users WHERE username = %s AND password = %s",
-            (username, password)
-        )
-        user_record = cur.fetchone()
-        
-        if user_record:
-            return {
-                'id': user_record[0],
-                'username': user_record[1],
-                'user_type': user_record[2],
-                'full_name': user_record[3],
-                'email': user_record[4],
-                'created_date': user_record[5].isoformat()
-            }
-        return None
+        with db_connection() as conn:
+            cur = conn.cursor()
+            rows = _execute_prepared(cur, 'eduscan_authenticate', (username, password))
+            user_record = rows[0] if rows else None
+            
+            if user_record:
+                return {
+                    'id': user_record[0],
+                    'username': user_record[1],
+                    'user_type': user_record[2],
+                    'full_name': user_record[3],
+                    'email': user_record[4],
+                    'created_date': user_record[5].isoformat()
+                }
+            return None
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Error authenticating user: {e}")
         return None
-    finally:
-        conn.close()
+
+# Counters are sharded by backend (migration 7) so concurrent writers do not
+# queue on one row; a table's numbers are the sum over its shards
+TABLE_STATS_QUERY = """
+    SELECT table_name, CAST(SUM(row_count) AS BIGINT) AS row_count, MAX(last_timestamp) AS last_timestamp
+    FROM table_stats
+    GROUP BY table_name
+"""
+RISK_COUNTS_QUERY = """
+    SELECT risk_level, CAST(SUM(row_count) AS BIGINT) AS row_count
+    FROM prediction_risk_counts
+    GROUP BY risk_level
+    HAVING SUM(row_count) > 0
+"""
 
 def get_database_stats():
-    """Get database statistics"""
-    conn = get_db_connection()
-    if not conn:
-        return {
-            'total_students': 0,
-            'total_predictions': 0,
-            'total_observations': 0,
-            'total_users': 0,
-            'last_prediction_date': None,
-            'last_observation_date': None
-        }
-    
+    """Get database statistics
+
+    Reads the row counters that the migration 5 and 7 triggers maintain in
+    the same transaction as every insert and delete, so the cost does not
+    grow with the tables and every app instance sees the same numbers.
+    """
     try:
-        cur = conn.cursor()
-        
-        # Get counts
-        cur.execute("SELECT COUNT(*) FROM students")
-        total_students = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM predictions")
-        total_predictions = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM parent_observations")
-        total_observations = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM users")
-        total_users = cur.fetchone()[0]
-        
-        # Get latest dates
-        cur.execute("SELECT MAX(timestamp) FROM predictions")
-        latest_prediction = cur.fetchone()[0]
-        
-        cur.execute("SELECT MAX(timestamp) FROM parent_observations")
-        latest_observation = cur.fetchone()[0]
-        
-        return {
-            'total_students': total_students,
-            'total_predictions': total_predictions,
-            'total_observations': total_observations,
-            'total_users': total_users,
-            'last_prediction_date': latest_prediction.isoformat() if latest_prediction else None,
-            'last_observation_date': latest_observation.isoformat() if latest_observation else None
-        }
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            cur.execute(TABLE_STATS_QUERY)
+            tables = {name: (count, latest) for name, count, latest in cur.fetchall()}
+            cur.execute(RISK_COUNTS_QUERY)
+            risk_level_counts = dict(cur.fetchall())
+            
+            return _stats_from_counters(tables, risk_level_counts)
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Error getting database stats: {e}")
-        return {
-            'total_students': 0,
-            'total_predictions': 0,
-            'total_observations': 0,
-            'total_users': 0,
-            'last_prediction_date': None,
-            'last_observation_date': None
-        }
-    finally:
-        conn.close()
\ No newline at end of file
+        return _stats_from_counters({}, {})
+
+def _stats_from_counters(tables, risk_level_counts):
+    """Shape table_stats rows ({table: (count, latest)}) as get_database_stats' result"""
+    def count(table):
+        return tables.get(table, (0, None))[0]
+
+    def latest(table):
+        timestamp = tables.get(table, (0, None))[1]
+        return timestamp.isoformat() if timestamp else None
+
+    return {
+        'total_students': count('students'),
+        'total_predictions': count('predictions'),
+        'total_observations': count('parent_observations'),
+        'total_users': count('users'),
+        'last_prediction_date': latest('predictions'),
+        'last_observation_date': latest('parent_observations'),
+        'risk_level_counts': risk_level_counts
+    }
@@ -0,0 +1,330 @@
+"""
+Resized image derivatives for EduScan Somalia
+Generates WebP and JPEG variants at display sizes, cached on disk by source
+content hash and size, and serves them through the static asset pipeline,
+plus a tiny blurred placeholder per image that is inlined while it loads
+Pregenerate with: python -m utils.derivative_utils --heights 80 150 200
+"""
+
+import argparse
+import base64
+import io
+import os
+import re
+import threading
+from utils.asset_utils import (
+    STATIC_ASSET_DIR, STATIC_SERVING_ENABLED, asset_registry, asset_url,
+    hashed_asset_name, static_url
+)
+from utils.manifest_utils import manifest_entry, project_path
+
+try:
+    from PIL import Image, ImageFilter
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+DERIVATIVE_DIR = os.path.join(STATIC_ASSET_DIR, 'derived')
+
+# Rendered heights are rounded up to one of these, so a handful of files covers every layout
+DERIVATIVE_HEIGHTS = [80, 120, 160, 200, 300, 400]
+
+# Device pixels per CSS pixel to render for sharp images on high-density screens
+PIXEL_DENSITY = 2
+
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'mime_type': 'image/webp', 'options': {'quality': 80, 'method': 4}},
+    'jpeg': {'format': 'JPEG', 'mime_type': 'image/jpeg', 'options': {'quality': 82, 'optimize': True, 'progressive': True}},
+}
+
+# Width of the inlined placeholder; the browser stretches it over the image box
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_BLUR_RADIUS = 0.6
+PLACEHOLDER_FORMAT = {'format': 'WEBP', 'mime_type': 'image/webp', 'options': {'quality': 40}}
+
+_PIXELS = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*px\s*$')
+
+_lock = threading.Lock()
+_urls = {}
+_placeholders = {}
+_dimensions = {}
+
+def css_height_to_pixels(height):
+    """Pixel value of a CSS height such as '150px' or 150; None for relative heights like 'auto'"""
+    if isinstance(height, (int, float)):
+        return int(height)
+    match = _PIXELS.match(str(height))
+    return int(float(match.group(1))) if match else None
+
+def derivative_height(display_height):
+    """Smallest standard derivative height covering a display height at PIXEL_DENSITY"""
+    target = display_height * PIXEL_DENSITY
+    for height in DERIVATIVE_HEIGHTS:
+        if height >= target:
+            return height
+    return DERIVATIVE_HEIGHTS[-1]
+
+def derivative_path(source_path, content_hash, height, variant):
+    """Cache path of a derivative, keyed by source content hash and height"""
+    stem = os.path.splitext(hashed_asset_name(source_path, content_hash))[0]
+    return os.path.join(DERIVATIVE_DIR, f"{stem}.h{height}.{variant}")
+
+def _render_derivative(source_path, height, variant):
+    spec = DERIVATIVE_FORMATS[variant]
+    with Image.open(source_path) as image:
+        image.load()
+        if image.height > height:
+            width = max(1, round(image.width * height / image.height))
+            image = image.resize((width, height), Image.LANCZOS)
+        if variant == 'jpeg' and image.mode not in ('RGB', 'L'):
+            # JPEG has no alpha channel; flatten transparent PNGs onto white
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        elif variant == 'webp' and image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, spec['format'], **spec['options'])
+    return buffer.getvalue()
+
+def _write_derivative(target_path, data):
+    os.makedirs(DERIVATIVE_DIR, exist_ok=True)
+    tmp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, target_path)
+
+def ensure_derivative(source_path, height, variant='webp'):
+    """Path of a derivative on disk, generating it if needed; None if the source cannot be processed"""
+    entry = manifest_entry(source_path)
+    if entry is not None and f"h{height}.{variant}" in entry['derivatives']:
+        return project_path(entry['derivatives'][f"h{height}.{variant}"])
+    if not PIL_AVAILABLE or variant not in DERIVATIVE_FORMATS:
+        return None
+    content_hash = asset_registry.get_content_hash(source_path)
+    if content_hash is None:
+        return None
+
+    target_path = derivative_path(source_path, content_hash, height, variant)
+    if os.path.exists(target_path):
+        return target_path
+
+    try:
+        _write_derivative(target_path, _render_derivative(source_path, height, variant))
+    except Exception as e:
+        print(f"Error generating {variant} derivative of {source_path}: {e}")
+        return None
+    return target_path
+
+def derivative_url(source_path, display_height, variant='webp'):
+    """Static URL of the variant that fits a display height, or None if none can be served"""
+    if not STATIC_SERVING_ENABLED:
+        return None
+    pixels = css_height_to_pixels(display_height)
+    if pixels is None:
+        return None
+    height = derivative_height(pixels)
+    content_hash = asset_registry.get_content_hash(source_path)
+    if content_hash is None:
+        return None
+
+    key = (source_path, content_hash, height, variant)
+    with _lock:
+        url = _urls.get(key)
+    if url:
+        return url
+
+    path = ensure_derivative(source_path, height, variant)
+    if path is None:
+        return None
+    url = static_url(path, content_hash)
+    with _lock:
+        _urls[key] = url
+    return url
+
+def image_dimensions(source_path):
+    """(width, height) of a source image, read from its header once per content hash; None if unknown"""
+    entry = manifest_entry(source_path)
+    if entry is not None and entry['width']:
+        return entry['width'], entry['height']
+    if not PIL_AVAILABLE:
+        return None
+    content_hash = asset_registry.get_content_hash(source_path)
+    if content_hash is None:
+        return None
+    key = (source_path, content_hash)
+    with _lock:
+        if key in _dimensions:
+            return _dimensions[key]
+    try:
+        with Image.open(source_path) as image:
+            dimensions = image.size
+    except Exception as e:
+        print(f"Error reading dimensions of {source_path}: {e}")
+        dimensions = None
+    with _lock:
+        _dimensions[key] = dimensions
+    return dimensions
+
+def display_dimensions(source_path, display_height):
+    """(width, height) of the file served for a display height, for the img width/height attributes"""
+    dimensions = image_dimensions(source_path)
+    if dimensions is None:
+        return None
+    width, height = dimensions
+    pixels = css_height_to_pixels(display_height) if display_height is not None else None
+    if pixels is None or not STATIC_SERVING_ENABLED:
+        return width, height
+    served_height = min(height, derivative_height(pixels))
+    return max(1, round(width * served_height / height)), served_height
+
+def placeholder_path(source_path, content_hash):
+    stem = os.path.splitext(hashed_asset_name(source_path, content_hash))[0]
+    return os.path.join(DERIVATIVE_DIR, f"{stem}.placeholder.{PLACEHOLDER_FORMAT['format'].lower()}")
+
+def _render_placeholder(source_path):
+    with Image.open(source_path) as image:
+        if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+            # A placeholder behind a transparent image would show through it
+            return b''
+        image = image.convert('RGB')
+        image.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+        image = image.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR_RADIUS))
+        buffer = io.BytesIO()
+        image.save(buffer, PLACEHOLDER_FORMAT['format'], **PLACEHOLDER_FORMAT['options'])
+    return buffer.getvalue()
+
+def ensure_placeholder(source_path):
+    """Path of an image's placeholder on disk, generating it if needed; None if it cannot have one
+
+    Images with transparency get an empty file, recording that they have no placeholder.
+    """
+    entry = manifest_entry(source_path)
+    if entry is not None and entry['placeholder']:
+        return project_path(entry['placeholder'])
+    if not PIL_AVAILABLE:
+        return None
+    content_hash = asset_registry.get_content_hash(source_path)
+    if content_hash is None:
+        return None
+    target_path = placeholder_path(source_path, content_hash)
+    if not os.path.exists(target_path):
+        try:
+            _write_derivative(target_path, _render_placeholder(source_path))
+        except Exception as e:
+            print(f"Error generating placeholder of {source_path}: {e}")
+            return None
+    return target_path
+
+def placeholder_data_uri(source_path):
+    """data: URI of an image's blurred placeholder (a few hundred bytes), or None"""
+    content_hash = asset_registry.get_content_hash(source_path)
+    if content_hash is None:
+        return None
+    key = (source_path, content_hash)
+    with _lock:
+        if key in _placeholders:
+            return _placeholders[key]
+
+    uri = None
+    path = ensure_placeholder(source_path)
+    if path is not None:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Error reading placeholder of {source_path}: {e}")
+            return None
+        if data:
+            uri = f"data:{PLACEHOLDER_FORMAT['mime_type']};base64,{base64.b64encode(data).decode()}"
+    with _lock:
+        _placeholders[key] = uri
+    return uri
+
+def image_sources(source_path, display_height):
+    """(webp_url, fallback_url) for displaying an image at a CSS height
+
+    webp_url is None when no derivative is available; fallback_url is a JPEG
+    derivative, or the original asset URL when resizing is not possible.
+    """
+    webp = derivative_url(source_path, display_height, 'webp')
+    fallback = derivative_url(source_path, display_height, 'jpeg') or asset_url(source_path)
+    return webp, fallback
+
+def picture_html(source_path, alt_text, style, extra_attributes='', loading='lazy'):
+    """<picture> markup that lets the browser pick the WebP variant and fall back to JPEG
+
+    The image loads lazily (pass loading='eager' for images that must show
+    at once), has explicit dimensions so the layout does not shift, and shows
+    a blurred inline placeholder until it arrives.
+    """
+    height_match = re.search(r'(?:^|;)\s*height:\s*([^;]+)', style)
+    display_height = height_match.group(1).strip() if height_match else None
+    webp, fallback = image_sources(source_path, display_height)
+    if not fallback:
+        return ''
+    attributes = f' loading="{loading}" decoding="async"'
+    dimensions = display_dimensions(source_path, display_height)
+    if dimensions:
+        attributes += f' width="{dimensions[0]}" height="{dimensions[1]}"'
+    if extra_attributes:
+        attributes += f' {extra_attributes}'
+    placeholder = placeholder_data_uri(source_path)
+    if placeholder:
+        style = f"{style.rstrip().rstrip(';')}; background: #e5e7eb url('{placeholder}') center / cover no-repeat;"
+    img = f'<img src="{fallback}" alt="{alt_text}" style="{style}"{attributes}>'
+    if not webp:
+        return img
+    return f'<picture style="display:contents;"><source srcset="{webp}" type="image/webp">{img}</picture>'
+
+def known_image_paths():
+    """Every image path referenced by the image helpers"""
+    from utils.image_base64 import IMAGE_ASSETS
+    from utils.image_utils import get_student_images
+    return sorted(set(IMAGE_ASSETS.values()) | set(get_student_images().values()))
+
+def build_derivatives(paths=None, heights=DERIVATIVE_HEIGHTS, variants=tuple(DERIVATIVE_FORMATS)):
+    """Pregenerate derivatives and placeholders; returns counts of generated, cached and failed files"""
+    counts = {'generated': 0, 'cached': 0, 'failed': 0, 'missing': 0}
+    for source_path in paths or known_image_paths():
+        content_hash = asset_registry.get_content_hash(source_path)
+        if content_hash is None:
+            counts['missing'] += 1
+            continue
+        if os.path.exists(placeholder_path(source_path, content_hash)):
+            counts['cached'] += 1
+        elif ensure_placeholder(source_path):
+            counts['generated'] += 1
+        else:
+            counts['failed'] += 1
+        for height in heights:
+            for variant in variants:
+                existed = os.path.exists(derivative_path(source_path, content_hash, height, variant))
+                if existed:
+                    counts['cached'] += 1
+                elif ensure_derivative(source_path, height, variant):
+                    counts['generated'] += 1
+                else:
+                    counts['failed'] += 1
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pregenerate resized WebP/JPEG image derivatives and placeholders")
+    parser.add_argument('--heights', nargs='+', type=int,
+                        help="CSS display heights in pixels (default: every standard derivative height)")
+    parser.add_argument('--variants', nargs='+', default=list(DERIVATIVE_FORMATS),
+                        choices=list(DERIVATIVE_FORMATS))
+    parser.add_argument('paths', nargs='*', help="Source images (default: every known asset)")
+    args = parser.parse_args(argv)
+
+    if not PIL_AVAILABLE:
+        print("Pillow is not installed; cannot build derivatives")
+        return 1
+    heights = sorted({derivative_height(height) for height in args.heights}) if args.heights else DERIVATIVE_HEIGHTS
+    counts = build_derivatives(args.paths or None, heights, args.variants)
+    print(f"Derivatives: {counts['generated']} generated, {counts['cached']} cached, "
+          f"{counts['failed']} failed, {counts['missing']} missing sources")
+    return 1 if counts['failed'] else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -3,6 +3,9 @@ Educational image utility functions for EduScan Somalia
 Provides diverse educational SVG images and graphics
 """
 
+import functools
+from types import MappingProxyType
+
 def get_classroom_scene():
     """Classroom learning scene SVG"""
     return """
@@ -283,9 +286,10 @@ def get_brain_development():
     </svg>
     """
 
+@functools.lru_cache(maxsize=1)
 def get_diverse_educational_images():
-    """Returns a dictionary of diverse educational SVG images"""
-    return {
+    """Returns a read-only dictionary of diverse educational SVG images, built once per process"""
+    return MappingProxyType({
         'classroom_scene': get_classroom_scene(),
         'student_success': get_student_success(),
         'learning_progress': get_learning_progress(),
@@ -293,4 +297,4 @@ def get_diverse_educational_images():
         'parent_support': get_parent_support(),
         'assessment_tools': get_assessment_tools(),
         'brain_development': get_brain_development()
-    }
\ No newline at end of file
+    })
\ No newline at end of file
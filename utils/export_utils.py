@@ -0,0 +1,210 @@
+"""
+Streaming export writers for EduScan Somalia
+Write record iterators to CSV, gzip-compressed CSV or Parquet in fixed-size chunks
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import time
+from utils.asset_utils import STATIC_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Supported formats: file extension and download MIME type
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+    'parquet': ('.parquet', 'application/octet-stream'),
+}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Export files older than this, or beyond the newest MAX_EXPORT_FILES, are deleted
+EXPORT_RETENTION_HOURS = float(os.environ.get('EXPORT_RETENTION_HOURS', 24))
+MAX_EXPORT_FILES = int(os.environ.get('MAX_EXPORT_FILES', 20))
+
+# st.download_button reads the whole file into memory, so larger exports are refused
+MAX_DOWNLOAD_MB = float(os.environ.get('MAX_DOWNLOAD_MB', 200))
+
+# Exports used to be published here, where Streamlit serves them without a login
+LEGACY_EXPORT_STATIC_DIR = os.path.join(STATIC_DIR, 'exports')
+
+def _flatten_value(value):
+    """Render nested values (score dicts, subject lists) as JSON text"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_csv(rows, fieldnames, stream):
+    """Write rows to a text stream as CSV, one row at a time"""
+    writer = csv.DictWriter(stream, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow({key: _flatten_value(row.get(key)) for key in fieldnames})
+        count += 1
+    return count
+
+def _arrow_type(values):
+    """Pick an Arrow column type from the first chunk, widening ints to float"""
+    sample = [value for value in values if value is not None]
+    if sample and all(isinstance(value, bool) for value in sample):
+        return pa.bool_()
+    if sample and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in sample):
+        return pa.float64()
+    return pa.string()
+
+def _arrow_column(values, arrow_type):
+    if arrow_type == pa.string():
+        values = [None if value is None else str(_flatten_value(value)) for value in values]
+    elif arrow_type == pa.float64():
+        converted = []
+        for value in values:
+            try:
+                converted.append(None if value is None else float(value))
+            except (TypeError, ValueError):
+                converted.append(None)
+        values = converted
+    elif arrow_type == pa.bool_():
+        values = [value if isinstance(value, bool) else None for value in values]
+    return pa.array(values, type=arrow_type)
+
+def write_parquet(rows, fieldnames, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write rows to a Parquet file, one row group per chunk"""
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet export requires the pyarrow package")
+
+    writer = None
+    schema = None
+    count = 0
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            columns = {key: [row.get(key) for row in chunk] for key in fieldnames}
+            if schema is None:
+                schema = pa.schema([(key, _arrow_type(columns[key])) for key in fieldnames])
+                writer = pq.ParquetWriter(file_path, schema)
+            table = pa.Table.from_arrays(
+                [_arrow_column(columns[field.name], field.type) for field in schema],
+                schema=schema
+            )
+            writer.write_table(table)
+            count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # No rows: still produce a valid file with string columns
+        schema = pa.schema([(key, pa.string()) for key in fieldnames])
+        pq.write_table(schema.empty_table(), file_path)
+    return count
+
+def write_export(rows, fieldnames, file_path, export_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream rows to file_path in the given format and return the number of rows written
+
+    The file is written to a temporary name and renamed on success, so a
+    failed export never leaves a truncated file behind.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    tmp_path = f"{file_path}.tmp"
+    try:
+        if export_format == 'csv':
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                count = write_csv(rows, fieldnames, f)
+        elif export_format == 'csv.gz':
+            with gzip.open(tmp_path, 'wt', newline='', encoding='utf-8') as f:
+                count = write_csv(rows, fieldnames, f)
+        else:
+            count = write_parquet(rows, fieldnames, tmp_path, chunk_size)
+        os.replace(tmp_path, file_path)
+        return count
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def export_frame(df, export_format='csv'):
+    """Render an in-memory DataFrame (e.g. batch results) in an export format"""
+    if export_format == 'csv':
+        return df.to_csv(index=False)
+    if export_format == 'csv.gz':
+        buffer = io.BytesIO()
+        df.to_csv(buffer, index=False, compression='gzip')
+        return buffer.getvalue()
+    if export_format == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires the pyarrow package")
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+def clean_export_files(directory, retention_hours=EXPORT_RETENTION_HOURS, max_files=MAX_EXPORT_FILES):
+    """Delete export files past the retention age or beyond the newest max_files; returns the count deleted
+
+    Empty subdirectories are removed too.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                files.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+
+    files.sort(reverse=True)
+    cutoff = time.time() - retention_hours * 3600
+    deleted = 0
+    for index, (mtime, path) in enumerate(files):
+        if index >= max_files or mtime < cutoff:
+            try:
+                os.remove(path)
+                deleted += 1
+            except OSError:
+                pass
+
+    for root, dirs, _ in os.walk(directory, topdown=False):
+        for name in dirs:
+            try:
+                os.rmdir(os.path.join(root, name))
+            except OSError:
+                pass
+    return deleted
+
+def check_download_size(file_path, max_mb=MAX_DOWNLOAD_MB):
+    """Return an error message if an export file is too large to download, else None"""
+    size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    if size_mb > max_mb:
+        return (f"Export is {size_mb:.0f} MB, over the {max_mb:.0f} MB download limit. "
+                "Export only records since the last export, or use the gzip CSV or Parquet format.")
+    return None
+
+def remove_published_exports():
+    """Delete export files left under static serving by earlier versions"""
+    shutil.rmtree(LEGACY_EXPORT_STATIC_DIR, ignore_errors=True)
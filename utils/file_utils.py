@@ -0,0 +1,124 @@
+"""
+File storage helpers for EduScan Somalia
+Locked, atomic JSON reads and writes shared by the local storage fallback
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Per-path locks so threads in the same process also serialize
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+# Paths whose OS lock the current thread already holds, so nesting is re-entrant
+_held_locks = threading.local()
+
+def _get_thread_lock(file_path):
+    """Get the in-process lock for a file path"""
+    key = os.path.abspath(file_path)
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = threading.RLock()
+            _thread_locks[key] = lock
+        return lock
+
+@contextmanager
+def locked_file(file_path):
+    """Hold an exclusive OS-level lock on file_path for the duration of the block
+
+    The lock is taken on a ``.lock`` sidecar, so the data file itself can be
+    replaced by an atomic rename while the lock is held. Nested use from the
+    same thread is re-entrant.
+    """
+    lock_path = f"{file_path}.lock"
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    key = os.path.abspath(file_path)
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = set()
+    if key in held:
+        yield
+        return
+
+    with _get_thread_lock(file_path):
+        held.add(key)
+        try:
+            with open(lock_path, 'a+') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            held.discard(key)
+
+def read_json(file_path, default=None):
+    """Read a JSON file, returning default if it is missing, empty or corrupt"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if content:
+            return json.loads(content)
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+        pass
+    return default
+
+def json_default(value):
+    """Serialize NumPy scalars and dates, which records built from DataFrames carry"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def write_json_atomic(file_path, data):
+    """Write data as JSON to a temp file in the same directory and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def update_json(file_path, update_fn, default=None):
+    """Apply update_fn to the JSON document under an exclusive lock and save it atomically
+
+    update_fn receives the current document (or default) and returns the new one.
+    The new document is returned to the caller.
+    """
+    with locked_file(file_path):
+        current = read_json(file_path, default)
+        updated = update_fn(current)
+        write_json_atomic(file_path, updated)
+        return updated
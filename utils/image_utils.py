@@ -1,39 +1,40 @@
 import streamlit as st
-import base64
-import os
-from PIL import Image
-import io
+from utils.asset_utils import asset_registry
+from utils.derivative_utils import picture_html
+from utils.lite_utils import is_lite_mode
+from utils.payload_utils import emit_html, tracks_payload
 
 def load_image_as_base64(image_path):
     """Load an image file and convert it to base64 string"""
     try:
-        if os.path.exists(image_path):
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode()
-        return None
+        return asset_registry.get_base64(image_path)
     except Exception as e:
         st.error(f"Error loading image: {str(e)}")
         return None
 
-def get_image_html(image_path, alt_text="Student Image", width="100%", height="auto", border_radius="15px"):
-    """Generate HTML for displaying an image with styling"""
-    base64_image = load_image_as_base64(image_path)
-    if base64_image:
-        return f"""
-        <img src="data:image/jpeg;base64,{base64_image}" 
-             alt="{alt_text}"
-             style="width: {width}; 
-                    height: {height}; 
-                    border-radius: {border_radius};
-                    box-shadow: 0 8px 25px rgba(0,0,0,0.2);
-                    margin: 1rem 0;
-                    object-fit: cover;
-                    transition: transform 0.3s ease;"
-             onmouseover="this.style.transform='scale(1.02)'"
-             onmouseout="this.style.transform='scale(1)'">
+@tracks_payload('get_image_html')
+def get_image_html(image_path, alt_text="Student Image", width="100%", height="auto", border_radius="15px", loading="lazy"):
+    """Generate HTML for displaying an image with styling ('' in lite mode)
+    
+    Pass loading="eager" for images at the top of a page.
+    """
+    if is_lite_mode():
+        return ''
+    picture = picture_html(
+        image_path,
+        alt_text,
+        f"width: {width}; height: {height}; border-radius: {border_radius}; "
+        "box-shadow: 0 8px 25px rgba(0,0,0,0.2); margin: 1rem 0; object-fit: cover; "
+        "transition: transform 0.3s ease;",
+        'onmouseover="this.style.transform=\'scale(1.02)\'" onmouseout="this.style.transform=\'scale(1)\'"',
+        loading
+    )
+    if picture:
+        html = f"""
+        {picture}
         """
     else:
-        return f"""
+        html = f"""
         <div style="width: {width}; 
                     height: 200px; 
                     background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -47,32 +48,33 @@ def get_image_html(image_path, alt_text="Student Image", width="100%", height="a
             {alt_text}
         </div>
         """
+    return html
 
 def create_image_gallery(image_paths, alt_texts, columns=3):
-    """Create a gallery of images in columns"""
+    """Create a gallery of images in columns (skipped in lite mode)"""
+    if is_lite_mode():
+        return
     cols = st.columns(columns)
     
     for i, (image_path, alt_text) in enumerate(zip(image_paths, alt_texts)):
         with cols[i % columns]:
-            base64_image = load_image_as_base64(image_path)
-            if base64_image:
-                st.markdown(f"""
+            picture = picture_html(
+                image_path,
+                alt_text,
+                "width: 100%; height: 200px; border-radius: 15px; "
+                "box-shadow: 0 8px 25px rgba(0,0,0,0.2); object-fit: cover; "
+                "transition: transform 0.3s ease;",
+                'onmouseover="this.style.transform=\'scale(1.05)\'" onmouseout="this.style.transform=\'scale(1)\'"'
+            )
+            if picture:
+                emit_html(f"""
                 <div style="text-align: center; margin: 1rem 0;">
-                    <img src="data:image/jpeg;base64,{base64_image}" 
-                         alt="{alt_text}"
-                         style="width: 100%; 
-                                height: 200px; 
-                                border-radius: 15px;
-                                box-shadow: 0 8px 25px rgba(0,0,0,0.2);
-                                object-fit: cover;
-                                transition: transform 0.3s ease;"
-                         onmouseover="this.style.transform='scale(1.05)'"
-                         onmouseout="this.style.transform='scale(1)'">
+                    {picture}
                     <p style="margin-top: 0.5rem; font-weight: 500; color: #2c3e50;">{alt_text}</p>
                 </div>
-                """, unsafe_allow_html=True)
+                """, 'create_image_gallery')
             else:
-                st.markdown(f"""
+                emit_html(f"""
                 <div style="text-align: center; margin: 1rem 0;">
                     <div style="width: 100%; 
                                 height: 200px; 
@@ -86,7 +88,7 @@ def create_image_gallery(image_paths, alt_texts, columns=3):
                         {alt_text}
                     </div>
                 </div>
-                """, unsafe_allow_html=True)
+                """, 'create_image_gallery')
 
 def get_student_images():
     """Get paths to all student images including new authentic Somali student photos"""
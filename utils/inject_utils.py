@@ -0,0 +1,61 @@
+"""
+Once-per-session document injection for EduScan Somalia
+Streamlit clears markdown that a rerun does not re-emit, so shared markup
+(such as the theme stylesheet) is copied into the parent document instead,
+where it persists across reruns and page switches
+"""
+
+import json
+import streamlit as st
+import streamlit.components.v1 as components
+from utils.payload_utils import record_payload
+
+_SESSION_KEY = 'injected_assets'
+
+# Copies markup into the app document; an existing element with the same id
+# means this browser already has this version, and older versions are removed
+_INJECT_SCRIPT = """<script>
+(function() {{
+    var doc = window.parent.document;
+    if (doc.getElementById({element_id})) {{ return; }}
+    var element = doc.createElement({tag});
+    element.id = {element_id};
+    element.setAttribute('data-eduscan-asset', {asset});
+    element.{content_property} = {markup};
+    doc.querySelectorAll('[data-eduscan-asset=' + JSON.stringify({asset}) + ']').forEach(function(old) {{
+        old.parentNode.removeChild(old);
+    }});
+    {parent}.appendChild(element);
+}})();
+</script>"""
+
+def _js_string(value):
+    # json.dumps gives a valid JS string literal; escape "</" so markup cannot close the script tag
+    return json.dumps(value).replace('</', '<\\/')
+
+def injected_versions():
+    """{asset: version} of everything injected into this session's document"""
+    return st.session_state.setdefault(_SESSION_KEY, {})
+
+def inject_once(asset, version, markup, kind='html'):
+    """Copy markup into the page once per session and version
+
+    kind 'css' adds a <style> element to <head>; 'html' adds a <div> to
+    <body>. Returns True if this call sent the markup.
+    """
+    sent = injected_versions()
+    if sent.get(asset) == version:
+        return False
+
+    html = _INJECT_SCRIPT.format(
+        element_id=_js_string(f"eduscan-{asset}-{version}"),
+        asset=_js_string(asset),
+        tag=_js_string('style' if kind == 'css' else 'div'),
+        content_property='textContent' if kind == 'css' else 'innerHTML',
+        markup=_js_string(markup),
+        parent='doc.head' if kind == 'css' else 'doc.body',
+    )
+    record_payload(f"inject:{asset}", html, outside_markdown=True)
+    components.html(html, height=0)
+    sent[asset] = version
+    return True
@@ -1,26 +1,29 @@
 import streamlit as st
-import json
 import os
+from utils.file_utils import read_json, update_json
+
+DEFAULT_APP_SETTINGS = {'language': 'English', 'theme': 'Modern', 'offline_mode': False}
 
 def load_app_settings():
-    """Load application settings from file"""
+    """Load application settings from file, with defaults for unset keys"""
     settings_file = "data/app_settings.json"
     if os.path.exists(settings_file):
-        try:
-            with open(settings_file, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    return {'language': 'English', 'theme': 'Modern', 'offline_mode': False}
+        settings = read_json(settings_file)
+        if isinstance(settings, dict):
+            return {**DEFAULT_APP_SETTINGS, **settings}
+    return dict(DEFAULT_APP_SETTINGS)
 
 def save_app_settings(settings):
-    """Save application settings to file"""
+    """Save changed application settings to file
+
+    settings holds only the keys being changed; they are merged into the
+    stored settings under the file lock, so concurrent sessions changing
+    different settings do not overwrite each other.
+    """
     settings_file = "data/app_settings.json"
     try:
-        # Ensure data directory exists
-        os.makedirs(os.path.dirname(settings_file), exist_ok=True)
-        with open(settings_file, 'w') as f:
-            json.dump(settings, f, indent=2)
+        # Locked, atomic replace so concurrent sessions never see a half-written file
+        update_json(settings_file, lambda current: {**(current if isinstance(current, dict) else {}), **settings}, {})
         return True
     except Exception as e:
         print(f"Error saving settings: {e}")
@@ -0,0 +1,47 @@
+"""
+Low-bandwidth lite mode for EduScan Somalia
+Enabled by the offline_mode app setting: skips decorative images, uses
+system fonts and a minimal stylesheet, and keeps forms and results intact
+"""
+
+import os
+import streamlit as st
+from utils.language_utils import load_app_settings
+from utils.payload_utils import finish_page, render_payload_report
+
+# Minimal stylesheet covering the layout classes every page uses
+LITE_CSS = """
+<style>
+    .stApp { font-family: system-ui, -apple-system, "Segoe UI", Roboto, sans-serif !important; }
+    .stDeployButton, .stHeader, .stToolbar {display: none;}
+    #MainMenu {visibility: hidden;}
+    .page-header { background: #e0f2fe; color: #1f2937; padding: 1rem; border-radius: 8px; text-align: center; margin-bottom: 1rem; }
+    .metric-card, .input-section, .results-section, .form-container, .resource-card, .resource-section,
+    .strategy-card, .teacher-card, .family-card, .family-section, .tracker-section, .tracking-form,
+    .research-card, .content-section, .stat-highlight, .student-card {
+        background: #ffffff; padding: 1rem; border: 1px solid #e5e7eb; border-radius: 8px; margin-bottom: 1rem;
+    }
+    .highlight-text { color: #1e3a8a; }
+</style>
+"""
+
+def is_lite_mode_forced():
+    """True when LITE_MODE=1 turns lite mode on for every session, whatever the session chose"""
+    return os.environ.get('LITE_MODE') == '1'
+
+def is_lite_mode():
+    """True when the session renders the lite UI; LITE_MODE=1 forces it for every session"""
+    if is_lite_mode_forced():
+        return True
+    if 'lite_mode' not in st.session_state:
+        st.session_state['lite_mode'] = bool(load_app_settings().get('offline_mode', False))
+    return st.session_state['lite_mode']
+
+def set_lite_mode(enabled):
+    st.session_state['lite_mode'] = bool(enabled)
+
+def render_lite_payload_report():
+    """Record the finished rerun; show its payload in lite mode or the operator view (SHOW_ADMIN_VIEW=1)"""
+    finish_page()
+    if is_lite_mode() or os.environ.get('SHOW_ADMIN_VIEW') == '1':
+        render_payload_report()
@@ -0,0 +1,207 @@
+"""
+Image asset manifest for EduScan Somalia
+A build step scans the image directories and records each file's content
+hash, MIME type, dimensions, published copy and derivatives, and checks that
+every path the image helpers reference exists; at runtime asset lookups
+read the manifest instead of probing the filesystem
+Build with: python -m utils.manifest_utils --check
+"""
+
+import argparse
+import os
+import threading
+from datetime import datetime
+from utils.asset_utils import (
+    PROJECT_ROOT, STATIC_ASSET_DIR, file_content_hash, guess_mime_type, hashed_asset_name
+)
+from utils.file_utils import read_json, write_json_atomic
+
+MANIFEST_PATH = os.path.join(PROJECT_ROOT, 'data', 'asset_manifest.json')
+MANIFEST_VERSION = 1
+
+# Directories scanned for images, relative to the project root
+ASSET_SOURCE_DIRS = ['attached_assets', 'data']
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Set ASSET_MANIFEST=0 to ignore the manifest and probe files directly
+MANIFEST_ENABLED = os.environ.get('ASSET_MANIFEST', '1') != '0'
+
+_lock = threading.Lock()
+_manifest = None
+
+def asset_key(file_path):
+    """Manifest key of a path: relative to the project root, with forward slashes"""
+    return os.path.relpath(os.path.abspath(file_path), PROJECT_ROOT).replace(os.sep, '/')
+
+def project_path(relative_path):
+    return os.path.join(PROJECT_ROOT, *relative_path.split('/'))
+
+def _drop_missing_files(manifest):
+    """Remove listed paths that are not on disk and return how many were dropped
+
+    The manifest lives in data/ but published copies and derivatives live in
+    the gitignored static/assets/, which a redeploy may not keep. Dropped
+    paths fall back to publishing or deriving the image on first use.
+    """
+    dropped = 0
+    for relative_path in list(manifest['assets']):
+        entry = manifest['assets'][relative_path]
+        if not os.path.exists(project_path(relative_path)):
+            del manifest['assets'][relative_path]
+            dropped += 1
+            continue
+        if entry['static'] and not os.path.exists(project_path(entry['static'])):
+            entry['static'] = None
+            dropped += 1
+        for name, derivative in list(entry['derivatives'].items()):
+            if not os.path.exists(project_path(derivative)):
+                del entry['derivatives'][name]
+                dropped += 1
+        if entry['placeholder'] and not os.path.exists(project_path(entry['placeholder'])):
+            entry['placeholder'] = None
+            dropped += 1
+    return dropped
+
+def load_manifest():
+    """The manifest as built, read once per process; None if it has not been built
+
+    Listed files are checked once, on load; entries whose files are gone are dropped.
+    """
+    global _manifest
+    if not MANIFEST_ENABLED:
+        return None
+    with _lock:
+        if _manifest is None:
+            manifest = read_json(MANIFEST_PATH)
+            valid = isinstance(manifest, dict) and manifest.get('version') == MANIFEST_VERSION
+            _manifest = manifest if valid else {}
+            if valid and manifest['missing']:
+                print(f"Asset manifest: {len(manifest['missing'])} referenced images are missing: "
+                      f"{', '.join(manifest['missing'])}")
+            if valid:
+                dropped = _drop_missing_files(manifest)
+                if dropped:
+                    print(f"Asset manifest: {dropped} listed files are missing, rebuild with "
+                          f"python -m utils.manifest_utils")
+        return _manifest or None
+
+def reload_manifest():
+    """Forget the loaded manifest so the next lookup reads the file again"""
+    global _manifest
+    with _lock:
+        _manifest = None
+
+def manifest_entry(file_path):
+    """Manifest record of an image, or None if it is not listed"""
+    manifest = load_manifest()
+    if manifest is None:
+        return None
+    return manifest['assets'].get(asset_key(file_path))
+
+def is_known_missing(file_path):
+    """True if the manifest build found this referenced path missing"""
+    manifest = load_manifest()
+    return manifest is not None and asset_key(file_path) in manifest['missing']
+
+def scan_image_paths(source_dirs=ASSET_SOURCE_DIRS):
+    """Project-relative paths of the images under the source directories"""
+    paths = []
+    for source_dir in source_dirs:
+        for root, _, files in os.walk(project_path(source_dir)):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(asset_key(os.path.join(root, name)))
+    return sorted(paths)
+
+def _build_entry(relative_path, derivatives=True):
+    from utils.derivative_utils import (
+        DERIVATIVE_FORMATS, DERIVATIVE_HEIGHTS, PIL_AVAILABLE, derivative_path,
+        ensure_derivative, ensure_placeholder, image_dimensions
+    )
+    from utils.asset_utils import asset_registry
+
+    path = project_path(relative_path)
+    content_hash = file_content_hash(path)
+    entry = {
+        'hash': content_hash,
+        'mime_type': guess_mime_type(path),
+        'size': os.path.getsize(path),
+        'width': None,
+        'height': None,
+        'static': None,
+        'derivatives': {},
+        'placeholder': None,
+    }
+    dimensions = image_dimensions(path)
+    if dimensions:
+        entry['width'], entry['height'] = dimensions
+
+    if asset_registry.get_static_url(path):
+        entry['static'] = asset_key(os.path.join(STATIC_ASSET_DIR, hashed_asset_name(path, content_hash)))
+
+    if derivatives and PIL_AVAILABLE:
+        for height in DERIVATIVE_HEIGHTS:
+            for variant in DERIVATIVE_FORMATS:
+                if ensure_derivative(path, height, variant):
+                    target = derivative_path(path, content_hash, height, variant)
+                    entry['derivatives'][f"h{height}.{variant}"] = asset_key(target)
+        placeholder = ensure_placeholder(path)
+        if placeholder and os.path.getsize(placeholder):
+            entry['placeholder'] = asset_key(placeholder)
+    return entry
+
+def build_manifest(source_dirs=ASSET_SOURCE_DIRS, derivatives=True):
+    """Scan the image directories, publish and derive every image, and return the manifest"""
+    from utils.derivative_utils import known_image_paths
+    global _manifest
+    with _lock:
+        # Hash the files themselves, not what the previous manifest recorded
+        _manifest = {}
+
+    assets = {}
+    failed = []
+    for relative_path in scan_image_paths(source_dirs):
+        try:
+            assets[relative_path] = _build_entry(relative_path, derivatives)
+        except Exception as e:
+            print(f"Error adding {relative_path} to the asset manifest: {e}")
+            failed.append(relative_path)
+
+    missing = sorted(
+        key for key in map(asset_key, known_image_paths())
+        if key not in assets and key not in failed
+    )
+    return {
+        'version': MANIFEST_VERSION,
+        'built': datetime.now().isoformat(),
+        'source_dirs': list(source_dirs),
+        'assets': assets,
+        'missing': missing,
+        'failed': failed,
+    }
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    write_json_atomic(path, manifest)
+    reload_manifest()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the image asset manifest")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit non-zero if a referenced image is missing or an image could not be processed")
+    parser.add_argument('--no-derivatives', action='store_true',
+                        help="Record hashes and dimensions only, without generating derivatives")
+    args = parser.parse_args(argv)
+
+    manifest = build_manifest(derivatives=not args.no_derivatives)
+    write_manifest(manifest)
+    derivative_count = sum(len(entry['derivatives']) for entry in manifest['assets'].values())
+    print(f"Asset manifest: {len(manifest['assets'])} images, {derivative_count} derivatives "
+          f"written to {os.path.relpath(MANIFEST_PATH, PROJECT_ROOT)}")
+    for relative_path in manifest['missing']:
+        print(f"MISSING {relative_path}")
+    for relative_path in manifest['failed']:
+        print(f"FAILED {relative_path}")
+    return 1 if args.check and (manifest['missing'] or manifest['failed']) else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,407 @@
+"""
+Versioned PostgreSQL schema migrations for EduScan Somalia
+Creates and evolves the tables and indexes used by utils.db_utils
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Key for the advisory lock that serializes migrations across processes
+MIGRATION_LOCK_KEY = 0x6564757363616e  # "eduscan"
+
+# (version, description, statements), applied in order; never edit a released entry
+MIGRATIONS = [
+    (1, "Create base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS students (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            grade_level VARCHAR(50),
+            created_date TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS predictions (
+            id SERIAL PRIMARY KEY,
+            student_id INTEGER NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+            math_score REAL,
+            reading_score REAL,
+            writing_score REAL,
+            attendance REAL,
+            behavior REAL,
+            literacy REAL,
+            prediction INTEGER,
+            probability REAL,
+            risk_level VARCHAR(50),
+            notes TEXT,
+            timestamp TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS parent_observations (
+            id SERIAL PRIMARY KEY,
+            student_id INTEGER NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+            child_name VARCHAR(255) NOT NULL,
+            date DATE NOT NULL,
+            homework_completion REAL,
+            reading_time REAL,
+            focus_level REAL,
+            subjects_struggled TEXT,
+            behavior_rating REAL,
+            mood_rating REAL,
+            sleep_hours REAL,
+            energy_level REAL,
+            social_interactions TEXT,
+            learning_wins TEXT,
+            challenges_faced TEXT,
+            strategies_used TEXT,
+            screen_time REAL,
+            physical_activity REAL,
+            medication_taken BOOLEAN DEFAULT FALSE,
+            special_events TEXT,
+            timestamp TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(100) NOT NULL UNIQUE,
+            password VARCHAR(255) NOT NULL,
+            user_type VARCHAR(50),
+            full_name VARCHAR(255),
+            email VARCHAR(255),
+            created_date TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+    ]),
+    (2, "Index students by name", [
+        # Unique when the data allows it, so ON CONFLICT (name) upserts work;
+        # existing duplicate names get a plain lookup index instead
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM students GROUP BY name HAVING COUNT(*) > 1) THEN
+                CREATE UNIQUE INDEX IF NOT EXISTS students_name_key ON students (name);
+            ELSE
+                CREATE INDEX IF NOT EXISTS students_name_idx ON students (name);
+            END IF;
+        END
+        $$
+        """,
+    ]),
+    (3, "Index history by student and time", [
+        # Per-student history, newest first
+        "CREATE INDEX IF NOT EXISTS predictions_student_timestamp_idx ON predictions (student_id, timestamp DESC)",
+        # Per-child observation ranges
+        "CREATE INDEX IF NOT EXISTS parent_observations_child_date_idx ON parent_observations (child_name, date)",
+        "CREATE INDEX IF NOT EXISTS parent_observations_student_idx ON parent_observations (student_id)",
+        # Streaming loaders and keyset pagination order by (timestamp DESC, id DESC)
+        "CREATE INDEX IF NOT EXISTS parent_observations_timestamp_id_idx ON parent_observations (timestamp DESC, id DESC)",
+    ]),
+    (4, "Covering index for dashboard counts", [
+        # Counts, latest timestamp and risk level tallies as index-only scans;
+        # also serves the newest-first loaders and keyset pagination
+        "CREATE INDEX IF NOT EXISTS predictions_timestamp_id_idx ON predictions (timestamp DESC, id DESC) INCLUDE (risk_level)",
+    ]),
+    (5, "Maintain row counters for dashboard stats", [
+        # One row per tracked table, kept current by statement-level triggers in
+        # the writing transaction, so stats are a primary key read on every instance
+        """
+        CREATE TABLE IF NOT EXISTS table_stats (
+            table_name VARCHAR(63) PRIMARY KEY,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            last_timestamp TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS prediction_risk_counts (
+            risk_level VARCHAR(50) PRIMARY KEY,
+            row_count BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        # TG_ARGV[0] names the table's timestamp column
+        """
+        CREATE OR REPLACE FUNCTION table_stats_inserted() RETURNS trigger AS $$
+        DECLARE
+            added BIGINT;
+            latest TIMESTAMP;
+        BEGIN
+            EXECUTE format('SELECT COUNT(*), MAX(%I) FROM new_rows', TG_ARGV[0]) INTO added, latest;
+            UPDATE table_stats
+            SET row_count = row_count + added,
+                last_timestamp = GREATEST(last_timestamp, latest)
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION table_stats_deleted() RETURNS trigger AS $$
+        DECLARE
+            removed BIGINT;
+            latest TIMESTAMP;
+        BEGIN
+            EXECUTE format('SELECT COUNT(*), MAX(%I) FROM old_rows', TG_ARGV[0]) INTO removed, latest;
+            UPDATE table_stats SET row_count = row_count - removed WHERE table_name = TG_TABLE_NAME;
+            -- Deleting the newest row moves the latest timestamp back; the timestamp index finds it
+            IF latest IS NOT NULL AND latest >= (SELECT last_timestamp FROM table_stats WHERE table_name = TG_TABLE_NAME) THEN
+                EXECUTE format(
+                    'UPDATE table_stats SET last_timestamp = (SELECT MAX(%I) FROM %I) WHERE table_name = %L',
+                    TG_ARGV[0], TG_TABLE_NAME, TG_TABLE_NAME
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION table_stats_truncated() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_stats SET row_count = 0, last_timestamp = NULL WHERE table_name = TG_TABLE_NAME;
+            IF TG_TABLE_NAME = 'predictions' THEN
+                DELETE FROM prediction_risk_counts;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION prediction_risk_counts_inserted() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO prediction_risk_counts (risk_level, row_count)
+            SELECT risk_level, COUNT(*) FROM new_rows
+            WHERE risk_level IS NOT NULL AND risk_level <> ''
+            GROUP BY risk_level
+            ON CONFLICT (risk_level) DO UPDATE
+            SET row_count = prediction_risk_counts.row_count + EXCLUDED.row_count;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION prediction_risk_counts_deleted() RETURNS trigger AS $$
+        BEGIN
+            UPDATE prediction_risk_counts c
+            SET row_count = c.row_count - d.removed
+            FROM (SELECT risk_level, COUNT(*) AS removed FROM old_rows GROUP BY risk_level) d
+            WHERE c.risk_level = d.risk_level;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        # CREATE TRIGGER blocks writes to the table until this migration commits,
+        # so the seeded counts and the triggers start from the same rows
+        """
+        DO $$
+        DECLARE
+            tracked RECORD;
+        BEGIN
+            FOR tracked IN SELECT * FROM (VALUES
+                ('students', 'created_date'),
+                ('predictions', 'timestamp'),
+                ('parent_observations', 'timestamp'),
+                ('users', 'created_date')
+            ) AS t (table_name, column_name) LOOP
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_stats_insert', tracked.table_name);
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_stats_delete', tracked.table_name);
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_stats_truncate', tracked.table_name);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                    'FOR EACH STATEMENT EXECUTE PROCEDURE table_stats_inserted(%L)',
+                    tracked.table_name || '_stats_insert', tracked.table_name, tracked.column_name
+                );
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                    'FOR EACH STATEMENT EXECUTE PROCEDURE table_stats_deleted(%L)',
+                    tracked.table_name || '_stats_delete', tracked.table_name, tracked.column_name
+                );
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER TRUNCATE ON %I FOR EACH STATEMENT EXECUTE PROCEDURE table_stats_truncated()',
+                    tracked.table_name || '_stats_truncate', tracked.table_name
+                );
+                EXECUTE format(
+                    'INSERT INTO table_stats (table_name, row_count, last_timestamp) '
+                    'SELECT %L, COUNT(*), MAX(%I) FROM %I '
+                    'ON CONFLICT (table_name) DO UPDATE '
+                    'SET row_count = EXCLUDED.row_count, last_timestamp = EXCLUDED.last_timestamp',
+                    tracked.table_name, tracked.column_name, tracked.table_name
+                );
+            END LOOP;
+        END
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS predictions_risk_insert ON predictions",
+        "DROP TRIGGER IF EXISTS predictions_risk_delete ON predictions",
+        """
+        CREATE TRIGGER predictions_risk_insert AFTER INSERT ON predictions
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE prediction_risk_counts_inserted()
+        """,
+        """
+        CREATE TRIGGER predictions_risk_delete AFTER DELETE ON predictions
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE prediction_risk_counts_deleted()
+        """,
+        "DELETE FROM prediction_risk_counts",
+        """
+        INSERT INTO prediction_risk_counts (risk_level, row_count)
+        SELECT risk_level, COUNT(*) FROM predictions
+        WHERE risk_level IS NOT NULL AND risk_level <> ''
+        GROUP BY risk_level
+        """,
+    ]),
+    (6, "Index observations by child and time", [
+        # The per-child loaders filter on timestamp and order by (timestamp, id),
+        # newest first; nothing filters on the observation date
+        "CREATE INDEX IF NOT EXISTS parent_observations_child_timestamp_idx "
+        "ON parent_observations (child_name, timestamp DESC, id DESC)",
+        "DROP INDEX IF EXISTS parent_observations_child_date_idx",
+    ]),
+    (7, "Shard dashboard counters", [
+        # A single counter row per table made every concurrent insert wait on
+        # its row lock; each backend now adds its deltas to one of 16 shard
+        # rows, and readers sum the shards. Existing rows become shard 0.
+        "ALTER TABLE table_stats ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0",
+        "ALTER TABLE table_stats DROP CONSTRAINT IF EXISTS table_stats_pkey",
+        "ALTER TABLE table_stats ADD PRIMARY KEY (table_name, shard)",
+        "ALTER TABLE prediction_risk_counts ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0",
+        "ALTER TABLE prediction_risk_counts DROP CONSTRAINT IF EXISTS prediction_risk_counts_pkey",
+        "ALTER TABLE prediction_risk_counts ADD PRIMARY KEY (risk_level, shard)",
+        """
+        CREATE OR REPLACE FUNCTION counter_shard() RETURNS SMALLINT AS $$
+            SELECT (pg_backend_pid() % 16)::SMALLINT
+        $$ LANGUAGE sql STABLE
+        """,
+        """
+        CREATE OR REPLACE FUNCTION table_stats_inserted() RETURNS trigger AS $$
+        DECLARE
+            added BIGINT;
+            latest TIMESTAMP;
+        BEGIN
+            EXECUTE format('SELECT COUNT(*), MAX(%I) FROM new_rows', TG_ARGV[0]) INTO added, latest;
+            IF added > 0 THEN
+                INSERT INTO table_stats (table_name, shard, row_count, last_timestamp)
+                VALUES (TG_TABLE_NAME, counter_shard(), added, latest)
+                ON CONFLICT (table_name, shard) DO UPDATE
+                SET row_count = table_stats.row_count + EXCLUDED.row_count,
+                    last_timestamp = GREATEST(table_stats.last_timestamp, EXCLUDED.last_timestamp);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION table_stats_deleted() RETURNS trigger AS $$
+        DECLARE
+            removed BIGINT;
+            latest TIMESTAMP;
+            remaining TIMESTAMP;
+        BEGIN
+            EXECUTE format('SELECT COUNT(*), MAX(%I) FROM old_rows', TG_ARGV[0]) INTO removed, latest;
+            IF removed = 0 THEN
+                RETURN NULL;
+            END IF;
+            INSERT INTO table_stats (table_name, shard, row_count)
+            VALUES (TG_TABLE_NAME, counter_shard(), -removed)
+            ON CONFLICT (table_name, shard) DO UPDATE
+            SET row_count = table_stats.row_count + EXCLUDED.row_count;
+            -- Deleting the newest row moves the latest timestamp back; the timestamp index finds it
+            IF latest IS NOT NULL AND latest >= (
+                SELECT MAX(last_timestamp) FROM table_stats WHERE table_name = TG_TABLE_NAME
+            ) THEN
+                EXECUTE format('SELECT MAX(%I) FROM %I', TG_ARGV[0], TG_TABLE_NAME) INTO remaining;
+                UPDATE table_stats
+                SET last_timestamp = CASE WHEN remaining IS NULL THEN NULL ELSE LEAST(last_timestamp, remaining) END
+                WHERE table_name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION prediction_risk_counts_inserted() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO prediction_risk_counts (risk_level, shard, row_count)
+            SELECT risk_level, counter_shard(), COUNT(*) FROM new_rows
+            WHERE risk_level IS NOT NULL AND risk_level <> ''
+            GROUP BY risk_level
+            ON CONFLICT (risk_level, shard) DO UPDATE
+            SET row_count = prediction_risk_counts.row_count + EXCLUDED.row_count;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION prediction_risk_counts_deleted() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO prediction_risk_counts (risk_level, shard, row_count)
+            SELECT risk_level, counter_shard(), -COUNT(*) FROM old_rows
+            WHERE risk_level IS NOT NULL AND risk_level <> ''
+            GROUP BY risk_level
+            ON CONFLICT (risk_level, shard) DO UPDATE
+            SET row_count = prediction_risk_counts.row_count + EXCLUDED.row_count;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def _ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+
+def get_schema_version(conn):
+    """Get the highest applied migration version, or 0 for an unmanaged database"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations')")
+        if cur.fetchone()[0] is None:
+            conn.rollback()
+            return 0
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        version = cur.fetchone()[0]
+    conn.rollback()
+    return version
+
+def apply_migrations(conn, target_version=LATEST_VERSION):
+    """Apply pending migrations up to target_version and return the versions applied
+
+    Each migration runs in its own transaction under an advisory lock, so
+    concurrent app processes apply it exactly once. Statements are written to
+    be idempotent, so databases created before migrations existed adopt the
+    managed schema without changes to their data.
+    """
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version > target_version:
+            break
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+                _ensure_migrations_table(cur)
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cur.fetchone() is not None:
+                    conn.commit()
+                    continue
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Schema migration {version} ({description}) failed")
+            raise
+        logger.info(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+    return applied
@@ -0,0 +1,250 @@
+"""
+Month-partitioned JSON storage for EduScan Somalia
+Records are stored as data/<dataset>/YYYY-MM.json so retention and range
+queries only touch the months they need
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from utils.file_utils import locked_file, read_json, update_json, write_json_atomic
+
+# Partition for records without a usable timestamp; never dropped by retention
+UNDATED_PARTITION = 'undated'
+
+# Sits next to a legacy single-file store while its records are being moved into partitions
+MIGRATION_MARKER_SUFFIX = '.migrating'
+
+def get_partition_directory(data_dir, dataset):
+    """Get the directory holding a dataset's monthly partitions"""
+    partition_dir = os.path.join(data_dir, dataset)
+    os.makedirs(partition_dir, exist_ok=True)
+    return partition_dir
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+def partition_key(record):
+    """Get the YYYY-MM partition key for a record from its timestamp"""
+    timestamp = _parse_timestamp(record.get('timestamp'))
+    if timestamp is None:
+        return UNDATED_PARTITION
+    return timestamp.strftime('%Y-%m')
+
+def _month_key(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.strftime('%Y-%m')
+
+def list_partitions(data_dir, dataset):
+    """List partition keys for a dataset, oldest month first and undated last"""
+    partition_dir = get_partition_directory(data_dir, dataset)
+    keys = sorted(
+        name[:-len('.json')] for name in os.listdir(partition_dir)
+        if name.endswith('.json') and not name.startswith('.')
+    )
+    if UNDATED_PARTITION in keys:
+        keys.remove(UNDATED_PARTITION)
+        keys.append(UNDATED_PARTITION)
+    return keys
+
+def iter_recent_records(data_dir, dataset):
+    """Yield records newest first, reading one monthly partition at a time
+
+    Undated records come last; a caller that stops early never opens the
+    older months.
+    """
+    keys = list_partitions(data_dir, dataset)
+    dated = [key for key in keys if key != UNDATED_PARTITION]
+    for key in list(reversed(dated)) + [key for key in keys if key == UNDATED_PARTITION]:
+        partition = read_json(_partition_path(data_dir, dataset, key), [])
+        if not isinstance(partition, list):
+            continue
+        yield from sorted(partition, key=lambda record: str(record.get('timestamp') or ''), reverse=True)
+
+def _partition_path(data_dir, dataset, key):
+    return os.path.join(get_partition_directory(data_dir, dataset), f"{key}.json")
+
+def append_record(data_dir, dataset, record):
+    """Append a record to the partition for its month"""
+    file_path = _partition_path(data_dir, dataset, partition_key(record))
+
+    def append(existing):
+        if not isinstance(existing, list):
+            existing = []
+        existing.append(record)
+        return existing
+
+    update_json(file_path, append, [])
+
+def append_records(data_dir, dataset, records):
+    """Append many records, writing each affected monthly partition once"""
+    by_partition = {}
+    for record in records:
+        by_partition.setdefault(partition_key(record), []).append(record)
+
+    for key, partition_records in by_partition.items():
+        update_json(
+            _partition_path(data_dir, dataset, key),
+            lambda existing: (existing if isinstance(existing, list) else []) + partition_records,
+            []
+        )
+
+def _in_range(record, start, end):
+    timestamp = _parse_timestamp(record.get('timestamp'))
+    if timestamp is None:
+        return False
+    record_date = timestamp.date()
+    if start is not None and record_date < start:
+        return False
+    if end is not None and record_date > end:
+        return False
+    return True
+
+def _as_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+def iter_partitions(data_dir, dataset, start=None, end=None):
+    """Yield the records of each partition overlapping [start, end], one month at a time
+
+    start and end are inclusive dates. Without a range every partition is read,
+    including undated records.
+    """
+    start = _as_date(start)
+    end = _as_date(end)
+    ranged = start is not None or end is not None
+
+    for key in list_partitions(data_dir, dataset):
+        if key == UNDATED_PARTITION:
+            if ranged:
+                continue
+        else:
+            if start is not None and key < _month_key(start):
+                continue
+            if end is not None and key > _month_key(end):
+                continue
+
+        partition = read_json(_partition_path(data_dir, dataset, key), [])
+        if not isinstance(partition, list):
+            continue
+        if ranged:
+            partition = [record for record in partition if _in_range(record, start, end)]
+        yield partition
+
+def load_records(data_dir, dataset, start=None, end=None):
+    """Load records, reading only the partitions that overlap [start, end]"""
+    records = []
+    for partition in iter_partitions(data_dir, dataset, start, end):
+        records.extend(partition)
+    return records
+
+def drop_partitions_before(data_dir, dataset, cutoff):
+    """Delete every monthly partition that ends before the cutoff date
+
+    Only whole months are dropped, so records in the cutoff's month are kept
+    until that month has fully aged out. Returns the dropped partition keys.
+    """
+    cutoff_key = _month_key(_as_date(cutoff))
+    dropped = []
+    for key in list_partitions(data_dir, dataset):
+        if key == UNDATED_PARTITION or key >= cutoff_key:
+            continue
+        file_path = _partition_path(data_dir, dataset, key)
+        # The .lock sidecar stays: removing it would let a writer still
+        # holding the old inode and one creating a new file both "hold" the lock
+        with locked_file(file_path):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                continue
+        dropped.append(key)
+    return dropped
+
+def _record_key(record):
+    return json.dumps(record, sort_keys=True, default=str)
+
+def migrate_legacy_file(data_dir, dataset, legacy_path):
+    """Move records from a single-file JSON store into monthly partitions
+
+    The legacy file is left in place as an empty list. A marker file is
+    written before any partition changes and removed once the legacy file
+    is emptied; if a crash leaves it behind, the next run skips records the
+    partitions already hold instead of adding them twice.
+    """
+    if not os.path.exists(legacy_path):
+        return 0
+
+    marker_path = f"{legacy_path}{MIGRATION_MARKER_SUFFIX}"
+    with locked_file(legacy_path):
+        records = read_json(legacy_path, [])
+        if not isinstance(records, list) or not records:
+            if os.path.exists(marker_path):
+                os.remove(marker_path)
+            return 0
+
+        resuming = os.path.exists(marker_path)
+        if not resuming:
+            write_json_atomic(marker_path, {'dataset': dataset, 'started': datetime.now().isoformat()})
+
+        by_partition = {}
+        for record in records:
+            by_partition.setdefault(partition_key(record), []).append(record)
+
+        for key, partition_records in by_partition.items():
+            def append(existing, partition_records=partition_records):
+                existing = existing if isinstance(existing, list) else []
+                if not resuming:
+                    return existing + partition_records
+                # Each legacy record is matched against at most one partition copy
+                present = Counter(_record_key(record) for record in existing)
+                missing = []
+                for record in partition_records:
+                    record_key = _record_key(record)
+                    if present[record_key]:
+                        present[record_key] -= 1
+                    else:
+                        missing.append(record)
+                return existing + missing
+
+            update_json(_partition_path(data_dir, dataset, key), append, [])
+
+        write_json_atomic(legacy_path, [])
+        os.remove(marker_path)
+        return len(records)
+
+# Background retention, one thread per process
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+
+def start_retention_scheduler(retention_fn, interval_hours=24):
+    """Run retention_fn now and then every interval_hours on a daemon thread
+
+    Safe to call on every Streamlit rerun; only the first call starts a thread.
+    """
+    global _scheduler_thread
+
+    with _scheduler_lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return _scheduler_thread
+
+        def run():
+            while True:
+                try:
+                    retention_fn()
+                except Exception as e:
+                    print(f"Error running scheduled retention: {e}")
+                time.sleep(timedelta(hours=interval_hours).total_seconds())
+
+        _scheduler_thread = threading.Thread(target=run, name='eduscan-retention', daemon=True)
+        _scheduler_thread.start()
+        return _scheduler_thread
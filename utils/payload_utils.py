@@ -0,0 +1,258 @@
+"""
+Page payload accounting for EduScan Somalia
+Counts the bytes of HTML each rerun sends to the browser through st.markdown,
+per page and per emitting helper, and checks pages against payload budgets
+Checked by tests/test_payload_utils.py, or run: python -m utils.payload_utils --check
+"""
+
+import argparse
+import functools
+import json
+import os
+import threading
+import types
+from datetime import datetime
+import streamlit as st
+
+# Target size of the HTML a page emits per rerun
+PAYLOAD_BUDGET_BYTES = int(os.environ.get('PAGE_PAYLOAD_BUDGET', 100 * 1024))
+
+# Per-page overrides of PAYLOAD_BUDGET_BYTES, keyed by the name passed to begin_page
+PAGE_PAYLOAD_BUDGETS = {}
+
+# Set PAYLOAD_TRACKING=0 to stop counting st.markdown output
+PAYLOAD_TRACKING_ENABLED = os.environ.get('PAYLOAD_TRACKING', '1') != '0'
+
+# Scripts and session state that render each page, for the budget check
+PAGE_SCRIPTS = {
+    'app/dashboard': ('app.py', {'current_page': 'dashboard'}),
+    'app/prediction': ('app.py', {'current_page': 'prediction'}),
+    'app/resources': ('app.py', {'current_page': 'resources'}),
+    'app/tracker': ('app.py', {'current_page': 'tracker'}),
+    'app/content': ('app.py', {'current_page': 'content'}),
+    '01_Prediction': ('pages/01_Prediction.py', {}),
+    '02_Teacher_Resources': ('pages/02_Teacher_Resources.py', {}),
+    '03_Parent_Tracker': ('pages/03_Parent_Tracker.py', {}),
+    '04_Educational_Content': ('pages/04_Educational_Content.py', {}),
+}
+
+_SESSION_KEY = 'page_payload'
+
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+_log_lock = threading.Lock()
+_page_log = {}
+
+class PayloadBudgetError(AssertionError):
+    """A page emitted more HTML than its budget allows"""
+
+def get_page_budget(page):
+    return PAGE_PAYLOAD_BUDGETS.get(page, PAYLOAD_BUDGET_BYTES)
+
+def _count_markdown(body):
+    payload = st.session_state.get(_SESSION_KEY)
+    if payload is not None and isinstance(body, str):
+        payload['markdown'] += len(body.encode('utf-8'))
+
+def install_markdown_hook():
+    """Count every st.markdown body, including columns and the sidebar, toward the current page"""
+    global _hook_installed
+    if not PAYLOAD_TRACKING_ENABLED:
+        return
+    with _hook_lock:
+        if _hook_installed:
+            return
+        from streamlit.delta_generator import DeltaGenerator
+        original = DeltaGenerator.markdown
+
+        @functools.wraps(original)
+        def markdown(self, body, *args, **kwargs):
+            _count_markdown(body)
+            return original(self, body, *args, **kwargs)
+
+        DeltaGenerator.markdown = markdown
+        # st.markdown is bound to the main container when streamlit is imported
+        main = getattr(st.markdown, '__self__', None)
+        if main is not None:
+            st.markdown = types.MethodType(markdown, main)
+        _hook_installed = True
+
+def begin_page(page):
+    """Start counting a rerun of a page; call before the page emits any HTML"""
+    install_markdown_hook()
+    st.session_state[_SESSION_KEY] = {'page': page, 'components': {}, 'markdown': 0, 'direct': 0}
+
+def record_payload(component, html, outside_markdown=False):
+    """Attribute the UTF-8 size of an HTML fragment to a component of the current page
+
+    Set outside_markdown for HTML sent by other elements (such as
+    components.html), which the st.markdown hook does not see.
+    """
+    payload = st.session_state.get(_SESSION_KEY)
+    if payload is None or not html:
+        return
+    size = len(html.encode('utf-8'))
+    payload['components'][component] = payload['components'].get(component, 0) + size
+    if outside_markdown:
+        payload['direct'] = payload.get('direct', 0) + size
+
+def tracks_payload(component):
+    """Decorator for helpers that return HTML: attribute each result to a component"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            html = fn(*args, **kwargs)
+            if isinstance(html, str):
+                record_payload(component, html)
+            return html
+        return wrapper
+    return decorator
+
+def emit_html(html, component):
+    """Render an HTML fragment with st.markdown and attribute its size to a component"""
+    if not html:
+        return
+    record_payload(component, html)
+    st.markdown(html, unsafe_allow_html=True)
+
+def summarize_payload(payload):
+    """{'page', 'components', 'total', 'budget'} from a raw per-rerun record
+
+    total is everything sent through st.markdown when the hook is installed,
+    plus HTML recorded as sent outside it; HTML not emitted by a tracked
+    helper is reported as 'other'.
+    """
+    components = dict(payload['components'])
+    attributed = sum(components.values())
+    total = max(payload.get('markdown', 0) + payload.get('direct', 0), attributed)
+    if total > attributed:
+        components['other'] = total - attributed
+    return {
+        'page': payload['page'],
+        'components': components,
+        'total': total,
+        'budget': get_page_budget(payload['page']),
+    }
+
+def current_payload():
+    """Summary of the rerun being rendered, or None"""
+    payload = st.session_state.get(_SESSION_KEY)
+    if payload is None:
+        return None
+    return summarize_payload(payload)
+
+def finish_page():
+    """Add the current rerun to the process-wide report and return its summary"""
+    payload = current_payload()
+    if payload is None:
+        return None
+    with _log_lock:
+        entry = _page_log.setdefault(payload['page'], {'reruns': 0, 'max_bytes': 0})
+        entry['reruns'] += 1
+        entry['last_bytes'] = payload['total']
+        entry['max_bytes'] = max(entry['max_bytes'], payload['total'])
+        entry['components'] = payload['components']
+        entry['updated'] = datetime.now().isoformat()
+    return payload
+
+def get_payload_report():
+    """Per-page rerun count, last and largest payload, budget and last component breakdown"""
+    with _log_lock:
+        entries = {page: dict(entry, components=dict(entry['components'])) for page, entry in _page_log.items()}
+    report = []
+    for page, entry in sorted(entries.items()):
+        budget = get_page_budget(page)
+        report.append(dict(entry, page=page, budget=budget, over_budget=entry['max_bytes'] > budget))
+    return report
+
+def payload_report_json():
+    return json.dumps({
+        'dumped': datetime.now().isoformat(),
+        'default_budget': PAYLOAD_BUDGET_BYTES,
+        'pages': get_payload_report(),
+    }, indent=2)
+
+def reset_payload_report():
+    with _log_lock:
+        _page_log.clear()
+
+def format_bytes(size):
+    return f"{size / 1024:.1f} KB" if size >= 1024 else f"{size} B"
+
+def assert_within_budget(payload, budget=None):
+    """Raise PayloadBudgetError if a payload summary is over budget"""
+    budget = budget if budget is not None else payload['budget']
+    if payload['total'] > budget:
+        largest = sorted(payload['components'].items(), key=lambda item: item[1], reverse=True)[:3]
+        breakdown = ', '.join(f"{name} {format_bytes(size)}" for name, size in largest)
+        raise PayloadBudgetError(
+            f"{payload['page']} emitted {format_bytes(payload['total'])}, "
+            f"over its {format_bytes(budget)} budget ({breakdown})"
+        )
+
+def render_payload_report():
+    """Show the current page's emitted HTML size against its budget in the sidebar"""
+    payload = current_payload()
+    if payload is None:
+        return
+    message = f"Page payload: {format_bytes(payload['total'])} of {format_bytes(payload['budget'])} budget"
+    if payload['total'] > payload['budget']:
+        st.sidebar.warning(message)
+    else:
+        st.sidebar.caption(message)
+
+def measure_page(script, state=None, lite=False, timeout=60):
+    """Run a page headlessly with Streamlit's AppTest and return its payload summary"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(script, default_timeout=timeout)
+    app.session_state['lite_mode'] = lite
+    for key, value in (state or {}).items():
+        app.session_state[key] = value
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"{script} raised: {app.exception[0].value}")
+    return summarize_payload(app.session_state[_SESSION_KEY])
+
+def check_page_budgets(pages=None, modes=(False, True)):
+    """Measure pages in full and lite mode; returns (summaries, failure messages)"""
+    summaries = []
+    failures = []
+    for page in pages or PAGE_SCRIPTS:
+        script, state = PAGE_SCRIPTS[page]
+        for lite in modes:
+            label = f"{page} ({'lite' if lite else 'full'})"
+            try:
+                payload = measure_page(script, state, lite)
+                summaries.append(dict(payload, mode='lite' if lite else 'full'))
+                assert_within_budget(payload)
+            except PayloadBudgetError as e:
+                failures.append(f"{label}: {e}")
+            except Exception as e:
+                failures.append(f"{label}: could not be measured: {e}")
+    return summaries, failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the HTML payload of each EduScan page")
+    parser.add_argument('--check', action='store_true', help="Exit non-zero if any page is over budget")
+    parser.add_argument('--pages', nargs='+', choices=list(PAGE_SCRIPTS))
+    parser.add_argument('--mode', choices=['full', 'lite', 'both'], default='both')
+    parser.add_argument('--output', help="Write the measurements as JSON to this file")
+    args = parser.parse_args(argv)
+
+    modes = {'full': (False,), 'lite': (True,), 'both': (False, True)}[args.mode]
+    summaries, failures = check_page_budgets(args.pages, modes)
+    for summary in summaries:
+        print(f"{summary['page']} ({summary['mode']}): {format_bytes(summary['total'])} "
+              f"of {format_bytes(summary['budget'])}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'pages': summaries, 'failures': failures}, f, indent=2)
+    return 1 if args.check and failures else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""
+Query latency profiling for EduScan Somalia
+In-process per-query call counts, rows and wall-time histograms
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is unbounded
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# Set DB_PROFILING=0 to turn recording off
+PROFILING_ENABLED = os.environ.get('DB_PROFILING', '1') != '0'
+
+_WHITESPACE = re.compile(r'\s+')
+
+def query_label(query, max_length=120):
+    """Collapse a SQL string to a one-line label; parameters are never part of it"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    label = _WHITESPACE.sub(' ', str(query)).strip()
+    if label.upper().startswith('EXECUTE '):
+        return label.split('(')[0].strip()
+    return label if len(label) <= max_length else label[:max_length - 3] + '...'
+
+class QueryProfiler:
+    """Thread-safe per-query latency histograms"""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self.enabled = PROFILING_ENABLED
+        self._lock = threading.Lock()
+        self._queries = {}
+        self._started = datetime.now()
+
+    def record(self, label, seconds, rows=0):
+        if not self.enabled:
+            return
+        elapsed_ms = seconds * 1000
+        bucket = bisect.bisect_left(self.buckets_ms, elapsed_ms)
+        with self._lock:
+            stats = self._queries.get(label)
+            if stats is None:
+                stats = self._queries[label] = {
+                    'calls': 0,
+                    'rows': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'histogram': [0] * (len(self.buckets_ms) + 1),
+                }
+            stats['calls'] += 1
+            stats['rows'] += max(rows or 0, 0)
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['histogram'][bucket] += 1
+
+    def _percentile(self, histogram, calls, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        target = calls * fraction
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else None
+        return None
+
+    def snapshot(self):
+        """Per-query stats, slowest total time first"""
+        with self._lock:
+            queries = {label: dict(stats, histogram=list(stats['histogram']))
+                       for label, stats in self._queries.items()}
+
+        results = []
+        for label, stats in queries.items():
+            calls = stats['calls']
+            results.append({
+                'query': label,
+                'calls': calls,
+                'rows': stats['rows'],
+                'total_ms': round(stats['total_ms'], 3),
+                'mean_ms': round(stats['total_ms'] / calls, 3) if calls else 0.0,
+                'max_ms': round(stats['max_ms'], 3),
+                'p50_ms': self._percentile(stats['histogram'], calls, 0.5),
+                'p95_ms': self._percentile(stats['histogram'], calls, 0.95),
+                'histogram': stats['histogram'],
+            })
+        return sorted(results, key=lambda row: row['total_ms'], reverse=True)
+
+    def to_json(self):
+        """Serialize the profile with its bucket bounds, for regression tracking"""
+        return json.dumps({
+            'started': self._started.isoformat(),
+            'dumped': datetime.now().isoformat(),
+            'buckets_ms': self.buckets_ms,
+            'queries': self.snapshot(),
+        }, indent=2)
+
+    def dump_json(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+        return file_path
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._started = datetime.now()
+
+# Process-wide profiler shared by the database layer
+query_profiler = QueryProfiler()
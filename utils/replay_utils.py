@@ -0,0 +1,94 @@
+"""
+Replay queue for EduScan Somalia
+Writes that fell back to local files while the database was down are queued
+here and replayed to the database once it recovers
+"""
+
+import os
+import threading
+from utils.file_utils import locked_file, read_json, update_json
+
+REPLAY_QUEUE_FILENAME = 'replay_queue.json'
+
+# Entries that keep failing while the database is reachable are dropped after this many tries
+MAX_REPLAY_ATTEMPTS = 5
+
+def get_replay_queue_path(data_dir):
+    """Get the replay queue path inside the data directory"""
+    return os.path.join(data_dir, REPLAY_QUEUE_FILENAME)
+
+def enqueue_writes(data_dir, kind, records):
+    """Queue records of one kind (e.g. 'prediction') for replay, oldest first"""
+    entries = [{'kind': kind, 'record': record, 'attempts': 0} for record in records]
+
+    def append(queue):
+        if not isinstance(queue, list):
+            queue = []
+        return queue + entries
+
+    update_json(get_replay_queue_path(data_dir), append, [])
+
+def pending_replay_count(data_dir):
+    """Number of queued writes waiting for the database"""
+    queue = read_json(get_replay_queue_path(data_dir), [])
+    return len(queue) if isinstance(queue, list) else 0
+
+def replay_writes(data_dir, handlers):
+    """Replay queued writes in order and return how many reached the database
+
+    handlers maps each kind to a function that saves a list of records and
+    returns a truthy value on success. Replay stops at the first exception,
+    which leaves that entry and everything after it queued for the next
+    attempt. An entry whose handler keeps returning a falsy value is dropped
+    after MAX_REPLAY_ATTEMPTS so one bad record cannot block the queue.
+    """
+    queue_path = get_replay_queue_path(data_dir)
+
+    # One replayer at a time across threads and processes; enqueueing stays unblocked
+    with locked_file(f"{queue_path}.replay"):
+        queue = read_json(queue_path, [])
+        if not isinstance(queue, list) or not queue:
+            return 0
+
+        done = 0
+        replayed = 0
+        retry = {}
+        for index, entry in enumerate(queue):
+            handler = handlers.get(entry.get('kind'))
+            if handler is None:
+                print(f"Dropping queued write of unknown kind: {entry.get('kind')}")
+                done += 1
+                continue
+            try:
+                saved = handler([entry['record']])
+            except Exception as e:
+                print(f"Replay stopped, database still unavailable: {e}")
+                break
+            if saved:
+                replayed += 1
+            elif entry.get('attempts', 0) + 1 < MAX_REPLAY_ATTEMPTS:
+                retry[index] = entry.get('attempts', 0) + 1
+            else:
+                print(f"Dropping queued {entry.get('kind')} after {MAX_REPLAY_ATTEMPTS} failed replays")
+            done += 1
+
+        # Entries queued while replaying were appended after the ones handled here
+        def remove_handled(current):
+            if not isinstance(current, list):
+                return []
+            kept = []
+            for index, entry in enumerate(current[:done]):
+                if index in retry:
+                    kept.append(dict(entry, attempts=retry[index]))
+            return kept + current[done:]
+
+        update_json(queue_path, remove_handled, [])
+        return replayed
+
+def start_replay(data_dir, handlers):
+    """Replay queued writes on a daemon thread so callers are never blocked"""
+    thread = threading.Thread(
+        target=replay_writes, args=(data_dir, handlers), name='eduscan-replay', daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,259 @@
+"""
+Columnar prediction snapshot for EduScan Somalia analytics
+Keeps a typed NumPy copy of prediction history next to the JSON/database store,
+as one .npz chunk per month plus small delta files for recent saves, so a
+save writes only its own rows and a read merges the files
+"""
+
+import io
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.file_utils import locked_file
+
+SNAPSHOT_DIRNAME = 'predictions_snapshot'
+
+# Written last by write_snapshot; without it there is no snapshot to append to
+COMPLETE_MARKER = '.complete'
+
+# Saves are written as delta files and merged into the month chunks once this many pile up
+COMPACT_AFTER_DELTAS = int(os.environ.get('SNAPSHOT_COMPACT_AFTER', 32))
+
+DELTA_PREFIX = 'delta-'
+LEGACY_SNAPSHOT_FILENAME = 'predictions_snapshot.npz'
+UNDATED_CHUNK = 'undated'
+
+# Columns stored as float32
+NUMERIC_COLUMNS = [
+    'math_score', 'reading_score', 'writing_score',
+    'attendance', 'behavior', 'literacy', 'probability'
+]
+
+# Free-text columns stored as fixed-width unicode
+TEXT_COLUMNS = ['student_name', 'grade_level']
+
+# Merged snapshots keyed by directory, reused while no file in it has changed
+_frame_cache = {}
+
+# Frames of individual chunk and delta files, reused while the file's mtime is unchanged
+_file_frame_cache = {}
+_cache_lock = threading.Lock()
+
+def get_snapshot_path(data_dir):
+    """Get the snapshot directory inside the data directory"""
+    return os.path.join(data_dir, SNAPSHOT_DIRNAME)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_datetime64(value):
+    try:
+        return np.datetime64(datetime.fromisoformat(str(value)), 's')
+    except (TypeError, ValueError):
+        return np.datetime64('NaT', 's')
+
+def records_to_columns(records):
+    """Convert prediction dicts into typed column arrays"""
+    columns = {
+        name: np.array([_to_float(r.get(name)) for r in records], dtype=np.float32)
+        for name in NUMERIC_COLUMNS
+    }
+    for name in TEXT_COLUMNS:
+        columns[name] = np.array([str(r.get(name) or '') for r in records], dtype=str)
+    columns['timestamp'] = np.array(
+        [_to_datetime64(r.get('timestamp')) for r in records], dtype='datetime64[s]'
+    )
+    columns['risk_level'] = np.array([str(r.get('risk_level') or '') for r in records], dtype=str)
+    return columns
+
+def records_to_frame(records):
+    """Build a typed frame like read_snapshot_frame's straight from prediction dicts"""
+    columns = records_to_columns(records)
+    frame = pd.DataFrame({name: columns[name] for name in NUMERIC_COLUMNS + TEXT_COLUMNS})
+    frame['timestamp'] = pd.to_datetime(columns['timestamp'])
+    frame['risk_level'] = pd.Categorical([level or None for level in columns['risk_level']])
+    return frame
+
+def _encode_risk_levels(risk_levels, categories):
+    """Encode risk level strings as int8 codes, extending categories as needed"""
+    categories = list(categories)
+    for level in risk_levels:
+        if level and level not in categories:
+            categories.append(level)
+    lookup = {level: code for code, level in enumerate(categories)}
+    codes = np.array([lookup.get(level, -1) for level in risk_levels], dtype=np.int8)
+    return codes, categories
+
+def _columns_to_arrays(columns):
+    """Stored arrays of typed columns: risk levels become int8 codes plus their categories"""
+    arrays = dict(columns)
+    codes, categories = _encode_risk_levels(arrays.pop('risk_level'), [])
+    arrays['risk_code'] = codes
+    arrays['risk_categories'] = np.array(categories, dtype=str)
+    return arrays
+
+def _arrays_to_columns(arrays):
+    columns = {name: arrays[name] for name in NUMERIC_COLUMNS + TEXT_COLUMNS + ['timestamp']}
+    categories = arrays['risk_categories'].tolist()
+    columns['risk_level'] = np.array(
+        [categories[code] if code >= 0 else '' for code in arrays['risk_code']], dtype=str
+    )
+    return columns
+
+def _concat_columns(parts):
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def _read_arrays(file_path):
+    with np.load(file_path, allow_pickle=False) as npz:
+        return {name: npz[name] for name in npz.files}
+
+def _write_arrays(file_path, arrays):
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, file_path)
+
+def _month_keys(timestamps):
+    """YYYY-MM chunk key of each timestamp, with UNDATED_CHUNK for NaT"""
+    months = np.datetime_as_string(timestamps.astype('datetime64[M]'), unit='M')
+    return np.where(np.isnat(timestamps), UNDATED_CHUNK, months)
+
+def _chunk_path(snapshot_dir, month):
+    return os.path.join(snapshot_dir, f"{month}.npz")
+
+def _list_files(snapshot_dir):
+    """(month chunk names, delta names), each in write order"""
+    chunks = []
+    deltas = []
+    for name in os.listdir(snapshot_dir):
+        if not name.endswith('.npz'):
+            continue
+        (deltas if name.startswith(DELTA_PREFIX) else chunks).append(name)
+    return sorted(chunks), sorted(deltas)
+
+def _merge_into_chunks(snapshot_dir, columns):
+    """Add rows to the month chunks they belong to, rewriting only those months"""
+    months = _month_keys(columns['timestamp'])
+    for month in np.unique(months):
+        rows = {name: values[months == month] for name, values in columns.items()}
+        chunk_path = _chunk_path(snapshot_dir, month)
+        if os.path.exists(chunk_path):
+            rows = _concat_columns([_arrays_to_columns(_read_arrays(chunk_path)), rows])
+        _write_arrays(chunk_path, _columns_to_arrays(rows))
+
+def write_snapshot(data_dir, records):
+    """Rebuild the snapshot from a full list of prediction records"""
+    snapshot_dir = get_snapshot_path(data_dir)
+    with locked_file(snapshot_dir):
+        if os.path.isdir(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+        # Single-file snapshots from before chunking are replaced by the directory
+        legacy_path = os.path.join(data_dir, LEGACY_SNAPSHOT_FILENAME)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+        os.makedirs(snapshot_dir)
+        if records:
+            _merge_into_chunks(snapshot_dir, records_to_columns(records))
+        with open(os.path.join(snapshot_dir, COMPLETE_MARKER), 'w') as f:
+            f.write(datetime.now().isoformat())
+
+def compact_snapshot(data_dir):
+    """Merge the pending delta files into the month chunks; returns the number merged"""
+    snapshot_dir = get_snapshot_path(data_dir)
+    with locked_file(snapshot_dir):
+        if not os.path.exists(os.path.join(snapshot_dir, COMPLETE_MARKER)):
+            return 0
+        _, deltas = _list_files(snapshot_dir)
+        if not deltas:
+            return 0
+        parts = [_arrays_to_columns(_read_arrays(os.path.join(snapshot_dir, name))) for name in deltas]
+        _merge_into_chunks(snapshot_dir, _concat_columns(parts))
+        for name in deltas:
+            os.remove(os.path.join(snapshot_dir, name))
+        return len(deltas)
+
+def append_to_snapshot(data_dir, records):
+    """Add new prediction records to an existing snapshot as a delta file
+
+    Each save writes only its own rows; deltas are merged into the month
+    chunks once COMPACT_AFTER_DELTAS accumulate, rewriting only the months
+    they touch. Returns False when there is no snapshot yet, so the caller
+    can rebuild it.
+    """
+    snapshot_dir = get_snapshot_path(data_dir)
+    with locked_file(snapshot_dir):
+        if not os.path.exists(os.path.join(snapshot_dir, COMPLETE_MARKER)):
+            return False
+        if records:
+            name = f"{DELTA_PREFIX}{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}.npz"
+            _write_arrays(os.path.join(snapshot_dir, name), _columns_to_arrays(records_to_columns(records)))
+        if len(_list_files(snapshot_dir)[1]) >= COMPACT_AFTER_DELTAS:
+            compact_snapshot(data_dir)
+        return True
+
+def invalidate_snapshot(data_dir):
+    """Remove the snapshot so the next read rebuilds it"""
+    snapshot_dir = get_snapshot_path(data_dir)
+    with locked_file(snapshot_dir):
+        if os.path.isdir(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+    with _cache_lock:
+        _frame_cache.pop(snapshot_dir, None)
+
+def _file_frame(file_path, mtime):
+    with _cache_lock:
+        cached = _file_frame_cache.get(file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    arrays = _read_arrays(file_path)
+    frame = pd.DataFrame({name: arrays[name] for name in NUMERIC_COLUMNS + TEXT_COLUMNS})
+    frame['timestamp'] = pd.to_datetime(arrays['timestamp'])
+    frame['risk_level'] = pd.Categorical.from_codes(
+        arrays['risk_code'], categories=arrays['risk_categories'].tolist()
+    ).astype(object)
+    with _cache_lock:
+        _file_frame_cache[file_path] = (mtime, frame)
+    return frame
+
+def read_snapshot_frame(data_dir):
+    """Load the snapshot as a typed DataFrame, or None if it does not exist
+
+    Month chunks and pending deltas are merged; only files that changed since
+    the last read are loaded again. The returned frame is shared between
+    callers and should be treated as read-only.
+    """
+    snapshot_dir = get_snapshot_path(data_dir)
+    with locked_file(snapshot_dir):
+        if not os.path.exists(os.path.join(snapshot_dir, COMPLETE_MARKER)):
+            return None
+        chunks, deltas = _list_files(snapshot_dir)
+        files = [(name, os.stat(os.path.join(snapshot_dir, name)).st_mtime_ns) for name in chunks + deltas]
+        signature = tuple(files)
+        with _cache_lock:
+            cached = _frame_cache.get(snapshot_dir)
+        if cached and cached[0] == signature:
+            return cached[1]
+        parts = [_file_frame(os.path.join(snapshot_dir, name), mtime) for name, mtime in files]
+
+    if parts:
+        frame = pd.concat(parts, ignore_index=True)
+    else:
+        frame = records_to_frame([])
+    frame['risk_level'] = pd.Categorical(frame['risk_level'])
+
+    with _cache_lock:
+        _frame_cache[snapshot_dir] = (signature, frame)
+        # Compaction removes delta files; forget their frames
+        live = {os.path.join(snapshot_dir, name) for name, _ in files}
+        for file_path in [path for path in _file_frame_cache if path.startswith(snapshot_dir + os.sep) and path not in live]:
+            del _file_frame_cache[file_path]
+    return frame
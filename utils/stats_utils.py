@@ -0,0 +1,117 @@
+"""
+Incrementally maintained storage statistics for EduScan Somalia
+A small JSON manifest of counts, latest timestamps and risk level tallies,
+updated on every save so summaries never scan the full history
+"""
+
+import os
+from utils.file_utils import locked_file, read_json, update_json
+from utils.partition_utils import partition_key
+
+STATS_FILENAME = 'stats_manifest.json'
+
+def get_stats_path(data_dir):
+    """Get the stats manifest path inside the data directory"""
+    return os.path.join(data_dir, STATS_FILENAME)
+
+def stats_lock(data_dir):
+    """Hold the manifest lock; a file save that writes its records and counts them
+    under it is seen exactly once by a concurrent rebuild"""
+    return locked_file(get_stats_path(data_dir))
+
+def _empty_dataset_stats():
+    return {'partitions': {}, 'last_timestamp': None}
+
+def _count_record(dataset_stats, record):
+    """Add one record to a dataset's per-partition tallies"""
+    key = partition_key(record)
+    partition = dataset_stats['partitions'].setdefault(key, {'count': 0, 'risk_levels': {}})
+    partition['count'] += 1
+
+    risk_level = record.get('risk_level')
+    if risk_level:
+        partition['risk_levels'][risk_level] = partition['risk_levels'].get(risk_level, 0) + 1
+
+    timestamp = record.get('timestamp')
+    if timestamp and (dataset_stats['last_timestamp'] is None or str(timestamp) > dataset_stats['last_timestamp']):
+        dataset_stats['last_timestamp'] = str(timestamp)
+
+def read_stats(data_dir):
+    """Read the stats manifest, or None if it has not been built yet"""
+    stats = read_json(get_stats_path(data_dir))
+    return stats if isinstance(stats, dict) and 'datasets' in stats else None
+
+def record_saved(data_dir, dataset, record):
+    """Count a newly saved record; a no-op until the manifest has been built"""
+    records_saved(data_dir, dataset, [record])
+
+def records_saved(data_dir, dataset, records):
+    """Count a batch of newly saved records in one manifest write"""
+    def update(stats):
+        if not isinstance(stats, dict) or 'datasets' not in stats:
+            return stats
+        dataset_stats = stats['datasets'].setdefault(dataset, _empty_dataset_stats())
+        for record in records:
+            _count_record(dataset_stats, record)
+        return stats
+
+    with stats_lock(data_dir):
+        if read_stats(data_dir) is not None:
+            update_json(get_stats_path(data_dir), update)
+
+def record_user_added(data_dir, count=1):
+    """Count newly created user accounts"""
+    def update(stats):
+        if isinstance(stats, dict) and 'datasets' in stats:
+            stats['total_users'] = stats.get('total_users', 0) + count
+        return stats
+
+    with stats_lock(data_dir):
+        if read_stats(data_dir) is not None:
+            update_json(get_stats_path(data_dir), update)
+
+def record_partitions_dropped(data_dir, dataset, partition_keys):
+    """Subtract dropped monthly partitions from the tallies"""
+    def update(stats):
+        if not isinstance(stats, dict) or 'datasets' not in stats:
+            return stats
+        dataset_stats = stats['datasets'].get(dataset)
+        if dataset_stats:
+            for key in partition_keys:
+                dataset_stats['partitions'].pop(key, None)
+            if not dataset_stats['partitions']:
+                dataset_stats['last_timestamp'] = None
+        return stats
+
+    with stats_lock(data_dir):
+        if read_stats(data_dir) is not None:
+            update_json(get_stats_path(data_dir), update)
+
+def rebuild_stats(data_dir, datasets, total_users):
+    """Build the manifest from scratch
+
+    datasets maps dataset name to an iterable of its records; this is the only
+    path that scans the history. The scan and the write both run under the
+    manifest lock, so concurrent saves are neither lost nor counted twice.
+    """
+    with stats_lock(data_dir):
+        stats = {'datasets': {}, 'total_users': total_users}
+        for dataset, records in datasets.items():
+            dataset_stats = _empty_dataset_stats()
+            for record in records:
+                _count_record(dataset_stats, record)
+            stats['datasets'][dataset] = dataset_stats
+
+        update_json(get_stats_path(data_dir), lambda current: stats, {})
+    return stats
+
+def summarize_dataset(stats, dataset):
+    """Get count, latest timestamp and risk level tallies for a dataset from the manifest"""
+    dataset_stats = stats['datasets'].get(dataset) or _empty_dataset_stats()
+    total = 0
+    risk_levels = {}
+    for partition in dataset_stats['partitions'].values():
+        total += partition['count']
+        for level, count in partition['risk_levels'].items():
+            risk_levels[level] = risk_levels.get(level, 0) + count
+    return total, dataset_stats['last_timestamp'], risk_levels
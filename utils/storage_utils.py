@@ -0,0 +1,576 @@
+"""
+Pluggable storage backends for EduScan Somalia
+One StorageBackend interface with JSON file, SQLite and PostgreSQL
+implementations, selected with the STORAGE_BACKEND environment variable
+"""
+
+import json
+import os
+import sqlite3
+import itertools
+import threading
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Protocol, runtime_checkable
+from utils.aggregate_utils import SCORE_COLUMNS, correlation_from_sums, correlation_sums_sql
+from utils.partition_utils import append_record, append_records, iter_partitions, iter_recent_records
+
+PREDICTIONS_DATASET = 'predictions'
+OBSERVATIONS_DATASET = 'observations'
+
+# 'auto' uses PostgreSQL when psycopg2 and DATABASE_URL are available, else JSON files
+STORAGE_BACKENDS = ('auto', 'postgres', 'sqlite', 'json')
+
+SQLITE_FILENAME = 'eduscan.db'
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """Storage operations shared by every backend
+
+    Records are plain dicts with the same keys everywhere: predictions carry
+    student_name and grade_level, observations carry child_name. Date ranges
+    are inclusive dates; since is an exclusive and until an inclusive timestamp.
+    """
+
+    name: str
+
+    # Whether the backend holds user accounts; otherwise users live in users.json
+    stores_users: bool
+
+    def save_prediction(self, record: dict) -> bool: ...
+
+    def save_predictions(self, records: list) -> int: ...
+
+    def save_observation(self, record: dict) -> bool: ...
+
+    def load_predictions(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                         student_name: Optional[str] = None) -> list: ...
+
+    def load_observations(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                          child_name: Optional[str] = None) -> list: ...
+
+    # One page of observations, newest first, as (records, cursor of the next
+    # page or None); cursors are opaque and only valid for the same backend
+    def load_observations_page(self, limit: int, after=None, child_name: Optional[str] = None) -> tuple: ...
+
+    def iter_predictions(self, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> Iterator[dict]: ...
+
+    def iter_observations(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> Iterator[dict]: ...
+
+    def authenticate_user(self, username: str, password: str) -> Optional[dict]: ...
+
+@runtime_checkable
+class DatabaseBackend(StorageBackend, Protocol):
+    """A StorageBackend with a query engine, which data_utils uses as DATABASE_BACKEND
+
+    Aggregates run as queries and are shaped as in utils.aggregate_utils;
+    with file storage data_utils computes them from the snapshot frame instead.
+    """
+
+    def daily_risk_counts(self, start_date: Optional[date] = None,
+                          end_date: Optional[date] = None) -> list: ...
+
+    def grade_averages(self) -> list: ...
+
+    def score_correlation(self) -> dict: ...
+
+    def student_trend(self, student_name: str) -> list: ...
+
+    def student_names(self) -> list: ...
+
+    # Totals the store keeps itself, shared by every app instance and shaped
+    # like data_utils.get_data_summary's; None means use the local stats manifest
+    def summary(self) -> Optional[dict]: ...
+
+def _parse_timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+def _in_window(record, since, until):
+    """Whether since < record timestamp <= until"""
+    if since is None and until is None:
+        return True
+    timestamp = _parse_timestamp(record.get('timestamp'))
+    if timestamp is None:
+        return False
+    if since is not None and timestamp <= since:
+        return False
+    if until is not None and timestamp > until:
+        return False
+    return True
+
+class JsonBackend:
+    """Month-partitioned JSON files under data_dir"""
+
+    name = 'json'
+    stores_users = False
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+
+    def save_prediction(self, record):
+        append_record(self.data_dir, PREDICTIONS_DATASET, record)
+        return True
+
+    def save_predictions(self, records):
+        append_records(self.data_dir, PREDICTIONS_DATASET, records)
+        return len(records)
+
+    def save_observation(self, record):
+        append_record(self.data_dir, OBSERVATIONS_DATASET, record)
+        return True
+
+    def _load(self, dataset, start_date, end_date, name_key, name):
+        records = []
+        for partition in iter_partitions(self.data_dir, dataset, start_date, end_date):
+            if name is None:
+                records.extend(partition)
+            else:
+                records.extend(record for record in partition if record.get(name_key) == name)
+        return records
+
+    def load_predictions(self, start_date=None, end_date=None, student_name=None):
+        return self._load(PREDICTIONS_DATASET, start_date, end_date, 'student_name', student_name)
+
+    def load_observations(self, start_date=None, end_date=None, child_name=None):
+        return self._load(OBSERVATIONS_DATASET, start_date, end_date, 'child_name', child_name)
+
+    def load_observations_page(self, limit, after=None, child_name=None):
+        # Records have no ids here, so the cursor is the number already shown
+        offset = after or 0
+        matching = (
+            record for record in iter_recent_records(self.data_dir, OBSERVATIONS_DATASET)
+            if child_name is None or record.get('child_name') == child_name
+        )
+        records = list(itertools.islice(matching, offset, offset + limit + 1))
+        return records[:limit], offset + limit if len(records) > limit else None
+
+    def _iter(self, dataset, since, until):
+        # Partitions before since's month are never opened
+        start_date = since.date() if since is not None else None
+        for partition in iter_partitions(self.data_dir, dataset, start_date):
+            for record in partition:
+                if _in_window(record, since, until):
+                    yield record
+
+    def iter_predictions(self, since=None, until=None):
+        return self._iter(PREDICTIONS_DATASET, since, until)
+
+    def iter_observations(self, since=None, until=None):
+        return self._iter(OBSERVATIONS_DATASET, since, until)
+
+    def authenticate_user(self, username, password):
+        return None
+
+# Observation columns after student_id, in table order
+OBSERVATION_COLUMNS = [
+    'child_name', 'date', 'homework_completion', 'reading_time', 'focus_level',
+    'subjects_struggled', 'behavior_rating', 'mood_rating', 'sleep_hours', 'energy_level',
+    'social_interactions', 'learning_wins', 'challenges_faced', 'strategies_used',
+    'screen_time', 'physical_activity', 'medication_taken', 'special_events', 'timestamp'
+]
+
+# Prediction columns after student_id, in table order
+PREDICTION_COLUMNS = [
+    'math_score', 'reading_score', 'writing_score', 'attendance', 'behavior', 'literacy',
+    'prediction', 'probability', 'risk_level', 'notes', 'timestamp'
+]
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        grade_level TEXT,
+        created_date TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS predictions (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+        math_score REAL,
+        reading_score REAL,
+        writing_score REAL,
+        attendance REAL,
+        behavior REAL,
+        literacy REAL,
+        prediction INTEGER,
+        probability REAL,
+        risk_level TEXT,
+        notes TEXT,
+        timestamp TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS parent_observations (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+        child_name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        homework_completion REAL,
+        reading_time REAL,
+        focus_level REAL,
+        subjects_struggled TEXT,
+        behavior_rating REAL,
+        mood_rating REAL,
+        sleep_hours REAL,
+        energy_level REAL,
+        social_interactions TEXT,
+        learning_wins TEXT,
+        challenges_faced TEXT,
+        strategies_used TEXT,
+        screen_time REAL,
+        physical_activity REAL,
+        medication_taken INTEGER DEFAULT 0,
+        special_events TEXT,
+        timestamp TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS predictions_student_timestamp_idx ON predictions (student_id, timestamp DESC);
+    CREATE INDEX IF NOT EXISTS predictions_timestamp_id_idx ON predictions (timestamp DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS parent_observations_child_timestamp_idx ON parent_observations (child_name, timestamp DESC, id DESC);
+    DROP INDEX IF EXISTS parent_observations_child_date_idx;
+    CREATE INDEX IF NOT EXISTS parent_observations_timestamp_id_idx ON parent_observations (timestamp DESC, id DESC);
+"""
+
+def _sqlite_timestamp(value):
+    """Store timestamps as ISO text so they sort and compare as strings"""
+    timestamp = _parse_timestamp(value) if value else None
+    return (timestamp or datetime.now()).isoformat()
+
+def _sqlite_value(value):
+    """Convert NumPy scalars and NaN to plain SQLite values"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def _time_filters(start_date, end_date, since, until):
+    clauses = []
+    params = []
+    if start_date is not None:
+        clauses.append("t.timestamp >= ?")
+        params.append(datetime.combine(start_date, datetime.min.time()).isoformat())
+    if end_date is not None:
+        clauses.append("t.timestamp < ?")
+        params.append(datetime.combine(end_date + timedelta(days=1), datetime.min.time()).isoformat())
+    if since is not None:
+        clauses.append("t.timestamp > ?")
+        params.append(since.isoformat())
+    if until is not None:
+        clauses.append("t.timestamp <= ?")
+        params.append(until.isoformat())
+    return clauses, params
+
+class SQLiteBackend:
+    """Single-file SQLite database with the same tables and indexes as PostgreSQL"""
+
+    name = 'sqlite'
+    stores_users = False
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SQLITE_SCHEMA)
+
+    def _connection(self):
+        """One connection per thread; WAL lets readers run alongside a writer"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _student_id(self, conn, name, grade_level):
+        conn.execute(
+            "INSERT INTO students (name, grade_level) VALUES (?, ?) ON CONFLICT (name) DO NOTHING",
+            (name, grade_level)
+        )
+        return conn.execute("SELECT id FROM students WHERE name = ?", (name,)).fetchone()[0]
+
+    def _prediction_row(self, conn, record):
+        student_id = self._student_id(
+            conn, record.get('student_name') or 'Unknown Student', record.get('grade_level') or 'Unknown'
+        )
+        values = [_sqlite_value(record.get(column)) for column in PREDICTION_COLUMNS[:-1]]
+        if values[PREDICTION_COLUMNS.index('notes')] is None:
+            values[PREDICTION_COLUMNS.index('notes')] = ''
+        return [student_id] + values + [_sqlite_timestamp(record.get('timestamp'))]
+
+    def save_prediction(self, record):
+        return self.save_predictions([record]) == 1
+
+    def save_predictions(self, records):
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO predictions (student_id, {', '.join(PREDICTION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(PREDICTION_COLUMNS) + 1))})",
+                [self._prediction_row(conn, record) for record in records]
+            )
+        return len(records)
+
+    def save_observation(self, record):
+        conn = self._connection()
+        child_name = record.get('child_name', 'Unknown Child')
+        subjects_struggled = record.get('subjects_struggled', [])
+        if isinstance(subjects_struggled, list):
+            subjects_struggled = json.dumps(subjects_struggled)
+
+        values = {column: _sqlite_value(record.get(column)) for column in OBSERVATION_COLUMNS}
+        values.update({
+            'child_name': child_name,
+            'date': str(record.get('date') or date.today().isoformat())[:10],
+            'subjects_struggled': subjects_struggled,
+            'medication_taken': int(bool(record.get('medication_taken', False))),
+            'timestamp': _sqlite_timestamp(record.get('timestamp')),
+        })
+        for column in ('social_interactions', 'learning_wins', 'challenges_faced',
+                       'strategies_used', 'special_events'):
+            if values[column] is None:
+                values[column] = ''
+
+        with conn:
+            student_id = self._student_id(conn, child_name, 'Unknown')
+            conn.execute(
+                f"INSERT INTO parent_observations (student_id, {', '.join(OBSERVATION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(OBSERVATION_COLUMNS) + 1))})",
+                [student_id] + [values[column] for column in OBSERVATION_COLUMNS]
+            )
+        return True
+
+    @staticmethod
+    def _prediction_dict(row):
+        record = {'id': row['id']}
+        record.update({column: row[column] for column in PREDICTION_COLUMNS})
+        record['student_name'] = row['name']
+        record['grade_level'] = row['grade_level']
+        return record
+
+    @staticmethod
+    def _observation_dict(row):
+        record = {'id': row['id']}
+        record.update({column: row[column] for column in OBSERVATION_COLUMNS})
+        try:
+            record['subjects_struggled'] = json.loads(record['subjects_struggled'] or '[]')
+        except json.JSONDecodeError:
+            record['subjects_struggled'] = []
+        record['medication_taken'] = bool(record['medication_taken'])
+        return record
+
+    def _query_predictions(self, start_date=None, end_date=None, since=None, until=None, student_name=None):
+        clauses, params = _time_filters(start_date, end_date, since, until)
+        if student_name is not None:
+            clauses.append("s.name = ?")
+            params.append(student_name)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._connection().execute(f"""
+            SELECT t.id, {', '.join(f't.{column}' for column in PREDICTION_COLUMNS)}, s.name, s.grade_level
+            FROM predictions t
+            JOIN students s ON t.student_id = s.id
+            {where}
+            ORDER BY t.timestamp DESC, t.id DESC
+        """, params)
+
+    def _query_observations(self, start_date=None, end_date=None, since=None, until=None, child_name=None):
+        clauses, params = _time_filters(start_date, end_date, since, until)
+        if child_name is not None:
+            clauses.append("t.child_name = ?")
+            params.append(child_name)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._connection().execute(f"""
+            SELECT t.id, {', '.join(f't.{column}' for column in OBSERVATION_COLUMNS)}
+            FROM parent_observations t
+            {where}
+            ORDER BY t.timestamp DESC, t.id DESC
+        """, params)
+
+    def load_predictions(self, start_date=None, end_date=None, student_name=None):
+        cursor = self._query_predictions(start_date, end_date, student_name=student_name)
+        return [self._prediction_dict(row) for row in cursor]
+
+    def load_observations(self, start_date=None, end_date=None, child_name=None):
+        cursor = self._query_observations(start_date, end_date, child_name=child_name)
+        return [self._observation_dict(row) for row in cursor]
+
+    def load_observations_page(self, limit, after=None, child_name=None):
+        clauses = []
+        params = []
+        if after is not None:
+            clauses.append("(t.timestamp, t.id) < (?, ?)")
+            params.extend(after)
+        if child_name is not None:
+            clauses.append("t.child_name = ?")
+            params.append(child_name)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(f"""
+            SELECT t.id, {', '.join(f't.{column}' for column in OBSERVATION_COLUMNS)}
+            FROM parent_observations t
+            {where}
+            ORDER BY t.timestamp DESC, t.id DESC
+            LIMIT ?
+        """, params + [limit + 1]).fetchall()
+        records = [self._observation_dict(row) for row in rows[:limit]]
+        next_cursor = (rows[limit - 1]['timestamp'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return records, next_cursor
+
+    def iter_predictions(self, since=None, until=None):
+        for row in self._query_predictions(since=since, until=until):
+            yield self._prediction_dict(row)
+
+    def iter_observations(self, since=None, until=None):
+        for row in self._query_observations(since=since, until=until):
+            yield self._observation_dict(row)
+
+    def authenticate_user(self, username, password):
+        return None
+
+    def summary(self):
+        return None
+
+    def daily_risk_counts(self, start_date=None, end_date=None):
+        clauses, params = _time_filters(start_date, end_date, None, None)
+        clauses.append("t.risk_level IS NOT NULL AND t.risk_level <> ''")
+        rows = self._connection().execute(f"""
+            SELECT substr(t.timestamp, 1, 10) AS day, t.risk_level, COUNT(*)
+            FROM predictions t
+            WHERE {' AND '.join(clauses)}
+            GROUP BY day, t.risk_level
+            ORDER BY day, t.risk_level
+        """, params)
+        return [{'date': day, 'risk_level': risk_level, 'count': count} for day, risk_level, count in rows]
+
+    def grade_averages(self):
+        rows = self._connection().execute(f"""
+            SELECT s.grade_level, COUNT(*), {', '.join(f'AVG(t.{column})' for column in SCORE_COLUMNS)}
+            FROM predictions t
+            JOIN students s ON t.student_id = s.id
+            GROUP BY s.grade_level
+            ORDER BY s.grade_level
+        """)
+        return [
+            dict({'grade_level': row[0], 'count': row[1]}, **dict(zip(SCORE_COLUMNS, row[2:])))
+            for row in rows
+        ]
+
+    def score_correlation(self):
+        row = self._connection().execute(
+            f"SELECT {', '.join(correlation_sums_sql(SCORE_COLUMNS, 't'))} FROM predictions t"
+        ).fetchone()
+        return correlation_from_sums(SCORE_COLUMNS, tuple(row))
+
+    def student_trend(self, student_name):
+        rows = self._connection().execute("""
+            SELECT t.timestamp, t.probability, t.risk_level
+            FROM predictions t
+            JOIN students s ON t.student_id = s.id
+            WHERE s.name = ?
+            ORDER BY t.timestamp, t.id
+        """, (student_name,))
+        return [
+            {'timestamp': timestamp, 'probability': probability, 'risk_level': risk_level}
+            for timestamp, probability, risk_level in rows
+        ]
+
+    def student_names(self):
+        rows = self._connection().execute("""
+            SELECT s.name
+            FROM students s
+            WHERE EXISTS (SELECT 1 FROM predictions t WHERE t.student_id = s.id)
+            ORDER BY s.name
+        """)
+        return [row[0] for row in rows]
+
+class PostgresBackend:
+    """PostgreSQL through the pooled, circuit-broken functions in utils.db_utils"""
+
+    name = 'postgres'
+    stores_users = True
+
+    def __init__(self):
+        from utils import db_utils
+        self.db = db_utils
+        self.circuit = db_utils.database_circuit
+
+    def save_prediction(self, record):
+        return self.db.save_prediction_to_db(record)
+
+    def save_predictions(self, records):
+        return self.db.save_predictions_bulk_to_db(records)
+
+    def save_observation(self, record):
+        return self.db.save_parent_observation_to_db(record)
+
+    def load_predictions(self, start_date=None, end_date=None, student_name=None):
+        return self.db.load_student_predictions(start_date, end_date, student_name=student_name)
+
+    def load_observations(self, start_date=None, end_date=None, child_name=None):
+        return self.db.load_parent_observations(start_date, end_date, child_name=child_name)
+
+    def load_observations_page(self, limit, after=None, child_name=None):
+        return self.db.load_parent_observations_page(limit, after, child_name)
+
+    def iter_predictions(self, since=None, until=None):
+        return self.db.iter_student_predictions(since=since, until=until)
+
+    def iter_observations(self, since=None, until=None):
+        return self.db.iter_parent_observations(since=since, until=until)
+
+    def authenticate_user(self, username, password):
+        return self.db.authenticate_user_db(username, password)
+
+    def daily_risk_counts(self, start_date=None, end_date=None):
+        return self.db.get_daily_risk_counts_db(start_date, end_date)
+
+    def grade_averages(self):
+        return self.db.get_grade_averages_db()
+
+    def score_correlation(self):
+        return self.db.get_score_correlation_db()
+
+    def student_trend(self, student_name):
+        return self.db.get_student_trend_db(student_name)
+
+    def student_names(self):
+        return self.db.get_student_names_db()
+
+    def summary(self):
+        return self.db.get_database_stats()
+
+def get_configured_backend_name():
+    """Resolve STORAGE_BACKEND ('auto' by default) to a concrete backend name"""
+    name = os.environ.get('STORAGE_BACKEND', 'auto').strip().lower()
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{name}', expected one of {', '.join(STORAGE_BACKENDS)}")
+    if name != 'auto':
+        return name
+    if not os.environ.get('DATABASE_URL'):
+        return 'json'
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return 'json'
+    return 'postgres'
+
+def create_backend(name, data_dir):
+    """Create a backend by name; data_dir holds the JSON partitions and SQLite file"""
+    if name == 'postgres':
+        return PostgresBackend()
+    if name == 'sqlite':
+        return SQLiteBackend(os.environ.get('SQLITE_PATH') or os.path.join(data_dir, SQLITE_FILENAME))
+    if name == 'json':
+        return JsonBackend(data_dir)
+    raise ValueError(f"Unknown storage backend: {name}")
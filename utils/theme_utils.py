@@ -0,0 +1,231 @@
+"""
+Shared theme stylesheet for EduScan Somalia
+Bundles styles/*.css into one minified, deduplicated stylesheet with a
+scoped section per page, injected once per session and content hash
+Vendor the Poppins font files with: python -m utils.theme_utils --fetch-fonts
+"""
+
+import argparse
+import base64
+import functools
+import hashlib
+import os
+import re
+import urllib.request
+from utils.asset_utils import PROJECT_ROOT, STATIC_SERVING_ENABLED, asset_registry, publish_bytes
+from utils.inject_utils import inject_once
+from utils.lite_utils import LITE_CSS, is_lite_mode
+from utils.payload_utils import emit_html
+
+STYLES_DIR = os.path.join(PROJECT_ROOT, 'styles')
+FONT_DIR = os.path.join(STYLES_DIR, 'fonts')
+
+# @font-face rules, emitted unscoped ahead of every section
+FONTS_STYLESHEET = 'fonts'
+
+# Source of --fetch-fonts; the user agent makes Google Fonts answer with WOFF2
+FONT_FAMILY = 'Poppins'
+FONT_WEIGHTS = [300, 400, 500, 600, 700]
+FONT_SUBSETS = ['latin']
+FONT_SOURCE_URL = 'https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap'
+FONT_SOURCE_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+# Sections of the bundle, in cascade order; each is styles/<name>.css
+THEME_SECTIONS = ['app', '01_Prediction', '02_Teacher_Resources', '03_Parent_Tracker', '04_Educational_Content']
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_IMPORT = re.compile(r'@import\s+(?:url\([^)]*\)|\'[^\']*\'|"[^"]*")[^;]*;')
+_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_FONT_FACE = re.compile(r'@font-face\s*\{([^{}]*)\}')
+_LOCAL_FONT = re.compile(r"url\((['\"]?)(fonts/[^'\")]+)\1\)")
+_SOURCE_FACE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^{}]*)\}')
+_DATA_URI = re.compile(r"url\((['\"]?)data:image/(\w+);base64,([A-Za-z0-9+/=\s]+)\1\)")
+
+def _minify_selector(selector):
+    selector = re.sub(r'\s+', ' ', selector.strip())
+    return re.sub(r'\s*([>+~,])\s*', r'\1', selector)
+
+def _minify_declarations(body):
+    body = re.sub(r'\s+', ' ', body.strip())
+    body = re.sub(r'\s*([:;,])\s*', r'\1', body)
+    return body.rstrip(';')
+
+def parse_css(css):
+    """(@import statements, [(selector, declarations)]) of a flat stylesheet, minified"""
+    css = _COMMENT.sub('', css)
+    imports = [re.sub(r'\s+', ' ', statement) for statement in _IMPORT.findall(css)]
+    css = _IMPORT.sub('', css)
+    rules = []
+    for selector, body in _RULE.findall(css):
+        declarations = _minify_declarations(body)
+        if declarations:
+            rules.append((_minify_selector(selector), declarations))
+    return imports, rules
+
+def section_class(section):
+    """Marker class a page renders so its scoped section applies"""
+    return f"eduscan-theme-{section}"
+
+def scope_selector(selector, section):
+    """Limit each selector in a list to pages showing the section's marker"""
+    scope = f".stApp:has(.{section_class(section)})"
+    scoped = []
+    for part in selector.split(','):
+        if part.startswith('.stApp'):
+            scoped.append(scope + part[len('.stApp'):])
+        else:
+            scoped.append(f"{scope} {part}")
+    return ','.join(scoped)
+
+def _externalize_images(css, section):
+    """Move inline base64 backgrounds to cacheable static files"""
+    if not STATIC_SERVING_ENABLED:
+        return css
+
+    def publish(match):
+        extension = 'jpg' if match.group(2) == 'jpeg' else match.group(2)
+        try:
+            data = base64.b64decode(re.sub(r'\s+', '', match.group(3)))
+        except ValueError:
+            return match.group(0)
+        url = publish_bytes(f"{section}-background.{extension}", data)
+        return f"url('{url}')" if url else match.group(0)
+
+    return _DATA_URI.sub(publish, css)
+
+def _font_url(relative_path):
+    """Static URL of a vendored font file, a data: URI without static serving; None if missing"""
+    path = os.path.join(STYLES_DIR, *relative_path.split('/'))
+    if not os.path.exists(path):
+        return None
+    return asset_registry.get_url(path, 'font/woff2')
+
+def _font_source(entry):
+    """A src entry with its local font file resolved, or None to drop it"""
+    match = _LOCAL_FONT.search(entry)
+    if match is None:
+        return entry
+    url = _font_url(match.group(2))
+    return entry.replace(match.group(0), f"url('{url}')") if url else None
+
+def font_faces():
+    """Minified @font-face rules pointing at the vendored font files
+
+    Missing files are dropped from src, leaving the local() names and the
+    fallback fonts; the stylesheet never fetches fonts from a third party.
+    """
+    path = os.path.join(STYLES_DIR, f"{FONTS_STYLESHEET}.css")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        css = _COMMENT.sub('', f.read())
+
+    rules = []
+    for body in _FONT_FACE.findall(css):
+        declarations = []
+        for declaration in _minify_declarations(body).split(';'):
+            name, _, value = declaration.partition(':')
+            if name == 'src':
+                sources = [source for source in map(_font_source, value.split(',')) if source]
+                if not sources:
+                    continue
+                value = ','.join(sources)
+            declarations.append(f"{name}:{value}")
+        if any(declaration.startswith('src:') for declaration in declarations):
+            rules.append(f"@font-face{{{';'.join(declarations)}}}")
+    return rules
+
+def fetch_fonts(subsets=FONT_SUBSETS, timeout=30):
+    """Download the WOFF2 files that fonts.css refers to into FONT_DIR; returns the paths written"""
+    request = urllib.request.Request(FONT_SOURCE_URL, headers={'User-Agent': FONT_SOURCE_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        css = response.read().decode('utf-8')
+
+    os.makedirs(FONT_DIR, exist_ok=True)
+    written = []
+    for subset, body in _SOURCE_FACE.findall(css):
+        weight = re.search(r'font-weight:\s*(\d+)', body)
+        source = re.search(r'url\(([^)]+\.woff2)\)', body)
+        if subset not in subsets or not weight or not source:
+            continue
+        with urllib.request.urlopen(source.group(1), timeout=timeout) as response:
+            data = response.read()
+        target_path = os.path.join(FONT_DIR, f"{FONT_FAMILY.lower()}-{subset}-{weight.group(1)}.woff2")
+        with open(target_path, 'wb') as f:
+            f.write(data)
+        written.append(target_path)
+    return written
+
+def _read_section(section):
+    with open(os.path.join(STYLES_DIR, f"{section}.css"), encoding='utf-8') as f:
+        return _externalize_images(f.read(), section)
+
+@functools.lru_cache(maxsize=1)
+def build_theme():
+    """(bundle css, content hash) of every section
+
+    Rules found verbatim in every section are emitted once, unscoped; the
+    rest are scoped to their page and deduplicated within it.
+    """
+    imports = []
+    sections = {}
+    for section in THEME_SECTIONS:
+        section_imports, rules = parse_css(_read_section(section))
+        imports.extend(statement for statement in section_imports if statement not in imports)
+        sections[section] = list(dict.fromkeys(rules))
+
+    shared = set.intersection(*(set(rules) for rules in sections.values())) if sections else set()
+    parts = list(imports)
+    parts.extend(font_faces())
+    parts.extend(f"{selector}{{{body}}}" for selector, body in sections[THEME_SECTIONS[0]] if (selector, body) in shared)
+    for section, rules in sections.items():
+        parts.extend(
+            f"{scope_selector(selector, section)}{{{body}}}"
+            for selector, body in rules if (selector, body) not in shared
+        )
+    css = ''.join(parts)
+    return css, hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]
+
+def apply_theme(section):
+    """Style the current page: inject the bundle if this session lacks it, then mark the page
+
+    Lite mode emits the minimal stylesheet instead.
+    """
+    if is_lite_mode():
+        emit_html(LITE_CSS, 'apply_theme')
+        return
+    try:
+        css, version = build_theme()
+    except (OSError, ValueError) as e:
+        print(f"Error building theme stylesheet: {e}")
+        emit_html(LITE_CSS, 'apply_theme')
+        return
+    inject_once('theme', version, css, kind='css')
+    emit_html(f'<div class="{section_class(section)}"></div>', 'apply_theme')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the EduScan theme stylesheet")
+    parser.add_argument('--fetch-fonts', action='store_true',
+                        help=f"Download the {FONT_FAMILY} WOFF2 files into styles/fonts")
+    args = parser.parse_args(argv)
+
+    if args.fetch_fonts:
+        try:
+            paths = fetch_fonts()
+        except OSError as e:
+            print(f"Error fetching fonts: {e}")
+            return 1
+        for path in paths:
+            print(f"Wrote {os.path.relpath(path, PROJECT_ROOT)}")
+        missing = [weight for weight in FONT_WEIGHTS
+                   if not any(path.endswith(f"-{weight}.woff2") for path in paths)]
+        if missing:
+            print(f"Missing weights: {', '.join(map(str, missing))}")
+            return 1
+
+    css, version = build_theme()
+    print(f"Theme {version}: {len(css.encode('utf-8'))} bytes, {len(font_faces())} font faces")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())